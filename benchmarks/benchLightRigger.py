@@ -0,0 +1,299 @@
+'''
+Benchmarks for lightRigger against the recording maya.cmds stand-in.
+
+Drives LightRigger.createRig, createRigFromSelected, populate and
+RigWidget.getAttr/setAttr/addModule on synthetic scenes and reports wall time
+and the number of cmd.* round trips per operation.
+
+Run from mayapy, or any python with Qt.py and PySide2 available:
+    python benchmarks/benchLightRigger.py
+    python benchmarks/benchLightRigger.py --scenes 10,1000 --lights 10,100 --json bench.json
+'''
+import argparse
+import json
+import os
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cmdsStandIn
+
+cmd = cmdsStandIn.install()
+
+from Qt import QtWidgets
+import lightCore
+import lightEvents
+import lightPlacement
+import lightRigger
+import lightSchema
+
+
+SCENES = [10, 1000, 50000]
+LIGHTS = [10, 100, 999]
+RIGS_IN_SCENE = 20
+
+
+def makeRigger():
+    '''
+    Builds a LightRigger without a dock or dialog parent, only the widget and its UI.
+    It watches the stand-in scene through a ManualSceneWatcher.
+    '''
+    rigger = lightRigger.LightRigger.__new__(lightRigger.LightRigger)
+    QtWidgets.QWidget.__init__(rigger)
+    rigger.buildUI()
+    watcher = lightEvents.ManualSceneWatcher()
+    cmd.listeners.append(watcher.emit)
+    rigger.watchScene(watcher)
+    return rigger
+
+
+def releaseRigger(rigger):
+    rigger.watcher.stop()
+    cmd.listeners.remove(rigger.watcher.emit)
+    rigger.deleteLater()
+
+
+def resetScene(nTransforms):
+    cmd.clear()
+    lightSchema.schema.invalidate()
+    return cmd.addTransforms(nTransforms)
+
+
+def measure(func, repeat=1):
+    '''
+    Runs func repeat times, returns the best wall time and the stand-in stats of that run
+    '''
+    best = None
+    for _ in range(repeat):
+        cmd.stats.reset()
+        start = default_timer()
+        func()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, cmd.stats.total(), cmd.stats.totalTime(), cmd.stats.snapshot())
+    return best
+
+
+def setRiggerInputs(rigger, name, nLights, placement, lightType='pointLight'):
+    rigger.name.setText(name)
+    rigger.nLights.setText(str(nLights))
+    rigger.lightType.setCurrentIndex(rigger.lightType.findText(lightType))
+    rigger.placement.blockSignals(True)
+    rigger.placement.setCurrentIndex(rigger.placement.findText(placement))
+    rigger.placement.blockSignals(False)
+
+
+def benchCreateRig(rigger, nTransforms, nLights, placement):
+    props = resetScene(nTransforms)
+    state = {'idx': 0}
+
+    def run():
+        state['idx'] += 1
+        setRiggerInputs(rigger, 'bench%d' % state['idx'], nLights, placement)
+        if placement in lightPlacement.LAYOUTS:
+            cmd.spaceLocator(n=lightRigger.LightRigger.distanceLocators[0])
+            locB = cmd.spaceLocator(n=lightRigger.LightRigger.distanceLocators[1])[0]
+            cmd.setAttr('%s.translateZ' % locB, 5)
+        else:
+            cmd.select(props[:nLights])
+        cmd.stats.reset()
+        rigger.createRig()
+        #The rig is built a chunk per event loop tick
+        while rigger.builder is not None:
+            QtWidgets.QApplication.processEvents()
+
+    if placement == 'Stick to Selected' and nLights > nTransforms:
+        return None
+    return measureSetup(run)
+
+
+def measureSetup(run):
+    '''
+    Like measure, but run resets the stats itself after its own setup
+    '''
+    start = default_timer()
+    run()
+    elapsed = default_timer() - start
+    return (elapsed, cmd.stats.total(), cmd.stats.totalTime(), cmd.stats.snapshot())
+
+
+def benchCreateFromSelected(rigger, nTransforms, nLights):
+    resetScene(nTransforms)
+    lights = [cmd.pointLight(n='loose%d' % i) for i in range(nLights)]
+
+    def run():
+        setRiggerInputs(rigger, 'fromSel', nLights, 'Stick to Selected')
+        cmd.select(cmd.listRelatives(lights, p=True))
+        cmd.stats.reset()
+        rigger.createRigFromSelected()
+    return measureSetup(run)
+
+
+def buildRigs(nTransforms, nLights, nRigs):
+    '''
+    Builds a scene with nTransforms props and nRigs rigs of nLights point lights each
+    '''
+    resetScene(nTransforms)
+    for r in range(nRigs):
+        shapes = [cmd.pointLight(n='rig%d_%d' % (r, i)) for i in range(nLights)]
+        cmd.group(shapes, n='rig%d_lgtRig' % r)
+
+
+def benchPopulate(rigger, nTransforms, nLights, repeat):
+    buildRigs(nTransforms, nLights, RIGS_IN_SCENE)
+    rigger.eventBatcher.events = []
+    return measure(rigger.populate, repeat)
+
+
+def benchRefresh(rigger, nLights):
+    '''
+    Incremental refresh after one rig is added to the scene of benchPopulate
+    '''
+    rigger.eventBatcher.flush()
+    shapes = [cmd.pointLight(n='added_%d' % i) for i in range(nLights)]
+    cmd.group(shapes, n='added_lgtRig')
+
+    def run():
+        cmd.stats.reset()
+        rigger.eventBatcher.flush()
+    return measureSetup(run)
+
+
+def benchRigWidget(nTransforms, nLights, repeat):
+    '''
+    getAttr, setAttr and addModule on a single rig of nLights
+    '''
+    buildRigs(nTransforms, nLights, 1)
+    shapes = cmd.listRelatives(cmd.listRelatives('rig0_lgtRig'), type=lightRigger.LightRigger.lightTypes)
+    info = dict((s, cmd.listRelatives(s, p=True)[0]) for s in shapes)
+    widget = lightRigger.RigWidget('rig0', info)
+    results = {}
+    results['RigWidget.getAttr'] = measure(lambda: widget.getAttr('intensity'), repeat)
+    results['RigWidget.setAttr'] = measure(lambda: widget.setAttr('intensity', 5), repeat)
+
+    def halfUniform():
+        #Every other light already holds the value, only the rest is written
+        for i, shape in enumerate(shapes):
+            cmd.setAttr('%s.intensity' % shape, 7 if i % 2 else 2)
+        widget.state.revalidate(['intensity'])
+        widget.getAttr('intensity')
+        cmd.stats.reset()
+        widget.setAttr('intensity', 7)
+    results['RigWidget.setAttr half set'] = measureSetup(halfUniform)
+    print('rig mirror on %d lights: %s' % (nLights, widget.state.report()))
+
+    def addModule():
+        combo = widget.attrs['attr_at_%d' % widget.columnCount]
+        combo.blockSignals(True)
+        combo.setCurrentIndex(combo.findText('aiSamples'))
+        combo.blockSignals(False)
+        widget.addModule(widget.columnCount)
+    results['RigWidget.addModule'] = measureSetup(addModule)
+
+    def sliderDrag():
+        #60 valueChanged ticks faster than the scheduler rate, then the release
+        slider = widget.widgets['subWidget_at%d' % (widget.columnCount - 1)]
+        cmd.stats.reset()
+        for value in range(60):
+            slider.setValue(value % (slider.maximum() + 1))
+        slider.sliderReleased.emit()
+    dropped = widget.scheduler.dropped
+    results['RigWidget slider drag'] = measureSetup(sliderDrag)
+    print('slider drag on %d lights: %s, %d dropped in this drag' % (
+        nLights, widget.scheduler.report(), widget.scheduler.dropped - dropped))
+    widget.deleteLater()
+    return results
+
+
+def benchMultiRig(rigger, nTransforms, nLights):
+    '''
+    One intensity change on every rig of the scene selected in the panel
+    '''
+    buildRigs(nTransforms, nLights, RIGS_IN_SCENE)
+    rigger.populate()
+    rigger.rigView.selectAll()
+    widget = rigger.batchWidget
+
+    def run():
+        widget.getAttr('intensity')
+        cmd.stats.reset()
+        widget.setAttr('intensity', 9)
+    result = measureSetup(run)
+    rigger.rigView.clearSelection()
+    return result
+
+
+def benchAim(nTransforms, nLights, mode):
+    '''
+    Aim turned on then off on one rig, in one of lightCore.AIM_MODES
+    '''
+    resetScene(nTransforms)
+    rig, id = lightCore.createRig('aimed', 'spotLight', nLights, 'Ring', start=[0, 4, 0], end=[6, 4, 0])
+
+    def run():
+        cmd.stats.reset()
+        lightCore.setAim('aimed', id, True, [0, 0, 0], mode)
+        lightCore.setAim('aimed', id, False)
+    return measureSetup(run)
+
+
+def formatRow(op, nTransforms, nLights, result):
+    elapsed, calls, cmdTime, snapshot = result
+    top = sorted(snapshot.items(), key=lambda x: -x[1]['calls'])[:3]
+    topText = ', '.join('%s=%d' % (name, data['calls']) for name, data in top)
+    return '%-28s %8d %6d %10.2f %9d %9.1f  %s' % (op, nTransforms, nLights, elapsed * 1000.0, calls,
+                                                  float(calls) / max(nLights, 1), topText)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenes', default=','.join(str(x) for x in SCENES),
+                        help='comma separated transform counts of the synthetic scenes')
+    parser.add_argument('--lights', default=','.join(str(x) for x in LIGHTS),
+                        help='comma separated number of lights per rig')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measure, best one is kept')
+    parser.add_argument('--json', help='also writes the results to this file')
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    scenes = [int(x) for x in args.scenes.split(',')]
+    lightCounts = [int(x) for x in args.lights.split(',')]
+    rows = []
+
+    print('%-28s %8s %6s %10s %9s %9s  %s' % ('operation', 'scene', 'lights', 'wall ms', 'calls', 'calls/lgt',
+                                              'top commands'))
+    for nTransforms in scenes:
+        for nLights in lightCounts:
+            rigger = makeRigger()
+            results = [
+                ('createRig Distance', benchCreateRig(rigger, nTransforms, nLights, 'Distance')),
+                ('createRig Sphere', benchCreateRig(rigger, nTransforms, nLights, 'Sphere')),
+                ('createRig Stick to Selected', benchCreateRig(rigger, nTransforms, nLights, 'Stick to Selected')),
+                ('createRigFromSelected', benchCreateFromSelected(rigger, nTransforms, nLights)),
+                ('populate (%d rigs)' % RIGS_IN_SCENE, benchPopulate(rigger, nTransforms, nLights, args.repeat)),
+                ('refreshRigs (1 rig added)', benchRefresh(rigger, nLights)),
+                ('setAttr on %d selected rigs' % RIGS_IN_SCENE, benchMultiRig(rigger, nTransforms, nLights)),
+                ('aim on/off constraint', benchAim(nTransforms, nLights, 'constraint')),
+                ('aim on/off bake', benchAim(nTransforms, nLights, 'bake')),
+            ]
+            results.extend(sorted(benchRigWidget(nTransforms, nLights, args.repeat).items()))
+            for op, result in results:
+                if result is None:
+                    continue
+                print(formatRow(op, nTransforms, nLights, result))
+                rows.append({'operation': op, 'transforms': nTransforms, 'lights': nLights,
+                             'wallSeconds': result[0], 'calls': result[1], 'cmdSeconds': result[2],
+                             'commands': result[3]})
+            releaseRigger(rigger)
+            app.processEvents()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2, sort_keys=True)
+    return rows
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+'''
+Benchmark of lightRunner against the recording maya.cmds stand-in.
+
+Each worker process installs its own stand-in, "opening" a scene resets it to a
+synthetic scene of props, then the spec is applied as in mayapy. Scenes named
+with 'hang' sleep past the timeout and scenes named with 'fail' raise, to exercise
+the kill, retry and summary paths.
+
+    python benchmarks/benchRunner.py
+    python benchmarks/benchRunner.py --scenes 200 --processes 8 --lights 500 --json runner.json
+'''
+import argparse
+import json
+import os
+import sys
+import time
+from timeit import default_timer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lightRunner
+
+
+class StandInWorker(object):
+    '''
+    Worker of lightRunner on the cmds stand-in, nothing is saved
+    '''
+
+    def __init__(self, props=1000, hang=60.0):
+        '''
+        :param props: int, transforms of every scene
+        :param hang: float, seconds a 'hang' scene sleeps
+        '''
+        self.props = props
+        self.hang = hang
+
+    def start(self):
+        import cmdsStandIn
+        self.cmd = cmdsStandIn.install()
+
+    def run(self, scene, spec):
+        import lightBatch
+        import lightSchema
+        self.cmd.clear()
+        lightSchema.schema.invalidate()
+        self.cmd.addTransforms(self.props)
+        if 'hang' in scene:
+            time.sleep(self.hang)
+        if 'fail' in scene:
+            raise RuntimeError('Cannot open %s' % scene)
+        report = lightBatch.apply(spec)
+        if report['failed']:
+            raise RuntimeError('; '.join('%s: %s' % tuple(x) for x in report['failed']))
+        return report
+
+    def stop(self):
+        pass
+
+
+def makeSpec(lights):
+    return {
+        'rigs': [
+            {'name': 'key', 'lightType': 'spotLight', 'count': lights, 'placement': 'Ring',
+             'start': [0, 4, 0], 'end': [6, 4, 0], 'attrs': {'intensity': 3, 'color': [1, 0.8, 0.6]},
+             'aim': [0, 0, 0]},
+            {'name': 'fill', 'lightType': 'pointLight', 'count': lights, 'placement': 'Distance',
+             'bake': {'attrs': ['intensity'], 'start': 1, 'end': 48, 'source': {'type': 'noise'}}},
+            {'name': 'old', 'count': 3},
+        ],
+        'update': [{'name': 'key', 'attrs': {'intensity': 1.5}, 'aim': False}],
+        'delete': ['old'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenes', type=int, default=24, help='number of scenes')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--lights', type=int, default=100, help='lights per rig')
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--faults', action='store_true', help="adds a 'hang' and a 'fail' scene")
+    parser.add_argument('--json', help='writes the summary to this file')
+    args = parser.parse_args(argv)
+
+    scenes = ['shot%03d.ma' % i for i in range(args.scenes)]
+    if args.faults:
+        scenes[1:1] = ['shot_hang.ma', 'shot_fail.ma']
+    runner = lightRunner.Runner(StandInWorker(), args.processes, args.timeout, args.retries)
+    start = default_timer()
+    summary = runner.run(scenes, makeSpec(args.lights))
+    print(summary.report())
+    print('%.2f scenes/s with %d processes' % (len(scenes) / (default_timer() - start), args.processes))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary.toDict(), f, indent=2)
+    return 0 if summary.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
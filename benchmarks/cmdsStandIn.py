@@ -0,0 +1,822 @@
+'''
+In-memory stand-in for maya.cmds used by the lightRigger benchmarks.
+
+Models a small DAG (transforms, light shapes, locators, constraints) with the
+commands lightRigger uses, and records the count and time of every call so a
+benchmark can report how many round trips an operation makes.
+
+Scene changes are reported to the callables in cmd.listeners as
+listener(kind, name, oldName), kind being 'added', 'removed', 'renamed' or
+'reparented', the same events lightEvents.SceneWatcher emits.
+
+maya.mel is stood in too, eval runs the few MEL commands lightRigger batches
+(createNode, sets) and is recorded as 'mel.eval'.
+
+Usage:
+    import cmdsStandIn
+    cmd = cmdsStandIn.install()     # registers itself as maya.cmds and a MelStandIn as maya.mel
+    cmd.stats.reset()
+    ...
+    cmd.stats.report()
+'''
+import fnmatch
+import math
+import re
+import sys
+import types
+from timeit import default_timer
+
+
+LIGHT_TYPES = ['pointLight', 'spotLight', 'directionalLight', 'areaLight', 'volumeLight']
+
+#Attribute schemas per node type: attr: (attributeType, default, min, max, softMin, softMax)
+_TRANSFORM_ATTRS = {
+    'translate': ('double3', (0.0, 0.0, 0.0), None, None, None, None),
+    'rotate': ('double3', (0.0, 0.0, 0.0), None, None, None, None),
+    'scale': ('double3', (1.0, 1.0, 1.0), None, None, None, None),
+    'visibility': ('bool', True, 0, 1, None, None),
+}
+_LIGHT_ATTRS = {
+    'intensity': ('float', 1.0, None, None, 0.0, 10.0),
+    'color': ('float3', (1.0, 1.0, 1.0), None, None, None, None),
+    'emitDiffuse': ('bool', True, 0, 1, None, None),
+    'emitSpecular': ('bool', True, 0, 1, None, None),
+    'aiExposure': ('float', 0.0, None, None, -5.0, 10.0),
+    'aiSamples': ('long', 1, 0, None, 0, 10),
+    'aiRadius': ('float', 0.0, 0.0, None, 0.0, 10.0),
+}
+_SPOT_ATTRS = {
+    'coneAngle': ('doubleAngle', 40.0, 0.006, 179.994, 0.006, 179.994),
+    'penumbraAngle': ('doubleAngle', 0.0, -179.994, 179.994, -10.0, 10.0),
+    'dropoff': ('double', 0.0, 0.0, None, 0.0, 255.0),
+}
+SCHEMAS = {
+    'transform': _TRANSFORM_ATTRS,
+    'locator': {'localPosition': ('double3', (0.0, 0.0, 0.0), None, None, None, None)},
+    'distanceDimShape': {'distance': ('double', 0.0, None, None, None, None)},
+    'aimConstraint': {'offset': ('double3', (0.0, 0.0, 0.0), None, None, None, None)},
+    'spotLight': dict(_LIGHT_ATTRS, **_SPOT_ATTRS),
+}
+#Animation curves keep their keys as a list of (time, value) in 'ktv'
+for _curveType in ('animCurveTU', 'animCurveTA', 'animCurveTL'):
+    SCHEMAS[_curveType] = {'output': ('double', 0.0, None, None, None, None),
+                           'ktv': ('keys', (), None, None, None, None)}
+for _lightType in LIGHT_TYPES:
+    SCHEMAS.setdefault(_lightType, dict(_LIGHT_ATTRS))
+
+_STRING_TYPES = (str, type(u''))
+#MEL tokens, a double quoted string or a run of non blank characters
+_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+_AXES = ('X', 'Y', 'Z')
+_COLOR_AXES = ('R', 'G', 'B')
+
+
+# --- matrix helpers (row vectors, Maya convention: world = local * parentWorld) ---
+
+def _identity():
+    return [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+
+
+def _mult(a, b):
+    return [[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+
+
+def _inverse(m):
+    #Affine inverse through Gauss-Jordan, matrices here are small and well conditioned
+    n = [list(row) + [1.0 if i == j else 0.0 for j in range(4)] for i, row in enumerate(m)]
+    for col in range(4):
+        pivot = max(range(col, 4), key=lambda r: abs(n[r][col]))
+        n[col], n[pivot] = n[pivot], n[col]
+        p = n[col][col]
+        n[col] = [v / p for v in n[col]]
+        for r in range(4):
+            if r != col:
+                f = n[r][col]
+                n[r] = [a - f * b for a, b in zip(n[r], n[col])]
+    return [row[4:] for row in n]
+
+
+def _rotation(rx, ry, rz):
+    '''Rotation matrix for XYZ rotate order, angles in degrees'''
+    x, y, z = [math.radians(v) for v in (rx, ry, rz)]
+    cx, sx, cy, sy, cz, sz = math.cos(x), math.sin(x), math.cos(y), math.sin(y), math.cos(z), math.sin(z)
+    return [[cy * cz, cy * sz, -sy],
+            [-cx * sz + sx * sy * cz, cx * cz + sx * sy * sz, sx * cy],
+            [sx * sz + cx * sy * cz, -sx * cz + cx * sy * sz, cx * cy]]
+
+
+def _euler(r):
+    '''XYZ euler angles in degrees from a 3x3 rotation matrix'''
+    cy = math.sqrt(r[0][0] ** 2 + r[0][1] ** 2)
+    ry = math.atan2(-r[0][2], cy)
+    if cy > 1e-6:
+        rx = math.atan2(r[1][2], r[2][2])
+        rz = math.atan2(r[0][1], r[0][0])
+    else:
+        rx = math.atan2(r[1][0] * -r[0][2], r[1][1])
+        rz = 0.0
+    return [math.degrees(rx), math.degrees(ry), math.degrees(rz)]
+
+
+def _compose(t, r, s):
+    rot = _rotation(*r)
+    m = _identity()
+    for i in range(3):
+        for j in range(3):
+            m[i][j] = rot[i][j] * s[i]
+    m[3][:3] = list(t)
+    return m
+
+
+def _decompose(m):
+    t = list(m[3][:3])
+    s = [math.sqrt(sum(m[i][j] ** 2 for j in range(3))) for i in range(3)]
+    r = [[m[i][j] / s[i] if s[i] else 0.0 for j in range(3)] for i in range(3)]
+    return t, _euler(r), s
+
+
+def _aimRotation(position, target, offset):
+    '''Rotation aiming +X at target with +Y up, offset applied in local space (aimConstraint defaults)'''
+    aim = [b - a for a, b in zip(position, target)]
+    length = math.sqrt(sum(v * v for v in aim)) or 1.0
+    x = [v / length for v in aim]
+    up = [0.0, 1.0, 0.0]
+    z = [x[1] * up[2] - x[2] * up[1], x[2] * up[0] - x[0] * up[2], x[0] * up[1] - x[1] * up[0]]
+    zLen = math.sqrt(sum(v * v for v in z))
+    if zLen < 1e-9:
+        z = [0.0, 0.0, 1.0]
+    else:
+        z = [v / zLen for v in z]
+    y = [z[1] * x[2] - z[2] * x[1], z[2] * x[0] - z[0] * x[2], z[0] * x[1] - z[1] * x[0]]
+    off = _rotation(*offset)
+    aimMatrix = [x, y, z]
+    rot = [[sum(off[i][k] * aimMatrix[k][j] for k in range(3)) for j in range(3)] for i in range(3)]
+    return _euler(rot)
+
+
+class Node(object):
+    __slots__ = ('name', 'type', 'parent', 'children', 'values', 'schema', 'constraint')
+
+    def __init__(self, name, nodeType):
+        self.name = name
+        self.type = nodeType
+        self.parent = None
+        self.children = []
+        self.schema = dict(SCHEMAS.get(nodeType, {}))
+        self.schema['message'] = ('message', None, None, None, None, None)
+        self.values = {}
+        self.constraint = None
+        for attr, spec in self.schema.items():
+            self.values[attr] = spec[1]
+
+
+class Stats(object):
+    '''Call count and cumulative time per command'''
+
+    def __init__(self):
+        self.calls = {}
+        self.time = {}
+
+    def reset(self):
+        self.calls.clear()
+        self.time.clear()
+
+    def total(self):
+        return sum(self.calls.values())
+
+    def totalTime(self):
+        return sum(self.time.values())
+
+    def snapshot(self):
+        return dict((name, {'calls': count, 'seconds': self.time.get(name, 0.0)})
+                    for name, count in self.calls.items())
+
+    def report(self, top=None):
+        lines = []
+        for name, count in sorted(self.calls.items(), key=lambda x: -x[1])[:top]:
+            lines.append('%-22s %8d calls %10.3f ms' % (name, count, self.time[name] * 1000.0))
+        return '\n'.join(lines)
+
+
+class CmdsStandIn(object):
+    '''
+    Recording stand-in for maya.cmds. Every public command is wrapped so its
+    calls and time are added to self.stats.
+    '''
+
+    _commands = ['ls', 'objExists', 'objectType', 'listRelatives', 'listConnections', 'parent', 'group',
+                 'rename', 'delete', 'select', 'setAttr', 'getAttr', 'attributeQuery', 'addAttr', 'xform',
+                 'shadingNode', 'pointLight', 'spotLight', 'directionalLight', 'spaceLocator',
+                 'distanceDimension', 'aimConstraint', 'warning', 'confirmDialog', 'colorEditor',
+                 'workspaceControl', 'deleteUI', 'window', 'createNode', 'connectAttr', 'disconnectAttr',
+                 'deleteAttr', 'undoInfo', 'undo']
+    #Commands that never change the scene, the others are entries of the undo queue
+    _queries = set(['ls', 'objExists', 'objectType', 'listRelatives', 'listConnections', 'getAttr',
+                    'attributeQuery', 'warning', 'confirmDialog', 'colorEditor', 'workspaceControl',
+                    'window', 'undoInfo', 'undo'])
+
+    def __init__(self):
+        self.stats = Stats()
+        self.nodes = {}
+        self.selection = []
+        self.warnings = []
+        self.listeners = []
+        self.setMembers = {}
+        #[sourceNode, sourceAttr, destinationNode, destinationAttr], nodes so renames keep them
+        self.connections = []
+        self.nextColor = (1.0, 1.0, 1.0)
+        #Undo is off unless turned on. When on, the names of the undo entries are queued
+        #and open chunks count their commands, undo() only pops the queue, nothing is restored
+        self.undoEnabled = False
+        self.undoQueue = []
+        self.undone = []
+        #[name, commands] of the open chunks
+        self.undoChunks = []
+        for name in self._commands:
+            setattr(self, name, self._record(name, getattr(self, '_' + name)))
+
+    def _record(self, name, func):
+        stats = self.stats
+
+        def recorded(*args, **kwargs):
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.calls[name] = stats.calls.get(name, 0) + 1
+                stats.time[name] = stats.time.get(name, 0.0) + default_timer() - start
+                if self.undoEnabled and name not in self._queries and not (kwargs.get('q') or kwargs.get('query')):
+                    self._undoable(name)
+        recorded.__name__ = name
+        return recorded
+
+    # --- scene helpers, not recorded ---
+
+    def clear(self):
+        self.nodes.clear()
+        self.setMembers.clear()
+        del self.connections[:]
+        del self.selection[:]
+        del self.warnings[:]
+
+    def _emit(self, kind, name, oldName=None):
+        for listener in self.listeners:
+            listener(kind, name, oldName)
+
+    def _uniqueName(self, name):
+        if name not in self.nodes:
+            return name
+        base = re.sub(r'\d+$', '', name)
+        idx = 1
+        while '%s%d' % (base, idx) in self.nodes:
+            idx += 1
+        return '%s%d' % (base, idx)
+
+    def _newNode(self, name, nodeType, parent=None):
+        node = Node(self._uniqueName(name), nodeType)
+        self.nodes[node.name] = node
+        if parent is not None:
+            node.parent = parent
+            parent.children.append(node)
+        self._emit('added', node.name)
+        return node
+
+    def _node(self, name):
+        try:
+            return self.nodes[name.split('|')[-1]]
+        except KeyError:
+            raise ValueError('No object matches name: %s' % name)
+
+    @staticmethod
+    def _flatten(args):
+        out = []
+        for arg in args:
+            if arg is None:
+                continue
+            if isinstance(arg, _STRING_TYPES):
+                out.append(arg)
+            else:
+                out.extend(CmdsStandIn._flatten(list(arg)))
+        return out
+
+    def _transformOf(self, node):
+        return node.parent if node.type != 'transform' and node.parent is not None else node
+
+    def _localMatrix(self, node):
+        self._solveConstraint(node)
+        v = node.values
+        return _compose(v['translate'], v['rotate'], v['scale'])
+
+    def _worldMatrix(self, node):
+        m = _identity()
+        while node is not None:
+            if node.type == 'transform':
+                m = _mult(m, self._localMatrix(node))
+            node = node.parent
+        return m
+
+    def _setWorldMatrix(self, node, world, parent):
+        local = world if parent is None else _mult(world, _inverse(self._worldMatrix(parent)))
+        t, r, s = _decompose(local)
+        node.values['translate'] = tuple(t)
+        node.values['rotate'] = tuple(r)
+        node.values['scale'] = tuple(s)
+
+    def _solveConstraint(self, node):
+        if not node.constraint:
+            return
+        target, offset = node.constraint
+        if target.name not in self.nodes:
+            node.constraint = None
+            return
+        position = list(node.values['translate'])
+        if node.parent is not None:
+            position = _mult(_compose(position, (0, 0, 0), (1, 1, 1)), self._worldMatrix(node.parent))[3][:3]
+        rotate = _aimRotation(position, self._worldMatrix(target)[3][:3], offset)
+        if node.parent is not None:
+            #The constraint drives the local rotate, the aim is in world space
+            local = _mult(_compose(position, rotate, (1, 1, 1)), _inverse(self._worldMatrix(node.parent)))
+            rotate = _decompose(local)[1]
+        node.values['rotate'] = tuple(rotate)
+
+    def _reparent(self, node, parent):
+        world = self._worldMatrix(node) if node.type == 'transform' else None
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+        if world is not None:
+            self._setWorldMatrix(node, world, parent)
+        self._emit('reparented', node.name)
+
+    def _plug(self, plug):
+        nodeName, attr = plug.split('.', 1)
+        node = self._node(nodeName)
+        for axes in (_AXES, _COLOR_AXES):
+            if attr[-1:] in axes and attr[:-1] in node.schema and node.schema[attr[:-1]][0].endswith('3'):
+                return node, attr[:-1], axes.index(attr[-1])
+        if attr not in node.schema and attr not in ('worldMatrix', 'matrix'):
+            raise RuntimeError('setAttr: No object matches name: %s' % plug)
+        return node, attr, None
+
+    def _splitPlug(self, plug):
+        nodeName, attr = plug.split('.', 1)
+        return self._node(nodeName), attr
+
+    def _connect(self, source, sourceAttr, destination, destinationAttr):
+        self.connections.append([source, sourceAttr, destination, destinationAttr])
+
+    def _createLight(self, lightType, name):
+        transform = self._newNode(name or lightType + '1', 'transform')
+        shape = self._newNode(transform.name + 'Shape', lightType, transform)
+        return transform, shape
+
+    def addTransforms(self, count, prefix='prop_', seed=1):
+        '''Fills the scene with count transforms at deterministic pseudo random positions'''
+        state = seed
+        names = []
+        for i in range(count):
+            node = self._newNode('%s%06d' % (prefix, i), 'transform')
+            values = []
+            for _ in range(3):
+                state = (state * 1103515245 + 12345) & 0x7fffffff
+                values.append((state % 20000) / 100.0 - 100.0)
+            node.values['translate'] = tuple(values)
+            names.append(node.name)
+        return names
+
+    # --- commands ---
+
+    def _ls(self, *args, **kwargs):
+        selection = kwargs.get('sl', kwargs.get('selection', False))
+        nodeType = kwargs.get('type', kwargs.get('typ'))
+        if selection:
+            nodes = [self.nodes[x] for x in self.selection if x in self.nodes]
+        elif args:
+            nodes = []
+            for pattern in self._flatten(args):
+                if '*' in pattern or '?' in pattern:
+                    nodes.extend(self.nodes[x] for x in fnmatch.filter(self.nodes, pattern))
+                elif pattern in self.nodes:
+                    nodes.append(self.nodes[pattern])
+        else:
+            nodes = list(self.nodes.values())
+        if nodeType:
+            types_ = [nodeType] if isinstance(nodeType, _STRING_TYPES) else list(nodeType)
+            nodes = [x for x in nodes if x.type in types_]
+        if kwargs.get('st') or kwargs.get('showType'):
+            return [v for x in nodes for v in (x.name, x.type)]
+        return [x.name for x in nodes]
+
+    def _objExists(self, name):
+        nodeName, _, attr = name.partition('.')
+        node = self.nodes.get(nodeName.split('|')[-1])
+        if node is None or not attr:
+            return node is not None
+        return attr.split('[')[0] in node.schema
+
+    def _objectType(self, name):
+        return self._node(name).type
+
+    def _listRelatives(self, *args, **kwargs):
+        nodeType = kwargs.get('type')
+        types_ = None if nodeType is None else ([nodeType] if isinstance(nodeType, _STRING_TYPES) else list(nodeType))
+        result = []
+        for name in self._flatten(args):
+            node = self._node(name)
+            if kwargs.get('p') or kwargs.get('parent'):
+                found = [node.parent] if node.parent is not None else []
+            elif kwargs.get('ad') or kwargs.get('allDescendents'):
+                found, stack = [], list(node.children)
+                while stack:
+                    child = stack.pop()
+                    found.append(child)
+                    stack.extend(child.children)
+            else:
+                found = list(node.children)
+                if kwargs.get('s') or kwargs.get('shapes'):
+                    found = [x for x in found if x.type != 'transform']
+            result.extend(x.name for x in found if types_ is None or x.type in types_)
+        return result or None
+
+    def _listConnections(self, name, **kwargs):
+        source = kwargs.get('s', kwargs.get('source', True))
+        destination = kwargs.get('d', kwargs.get('destination', True))
+        plugs = kwargs.get('p', kwargs.get('plugs', False))
+        nodeType = kwargs.get('type', kwargs.get('t'))
+        result = []
+        for name in self._flatten([name]):
+            node, attr = self._splitPlug(name) if '.' in name else (self._node(name), None)
+            for src, srcAttr, dst, dstAttr in self.connections:
+                for this, thisAttr, other, otherAttr, wanted in ((dst, dstAttr, src, srcAttr, source),
+                                                                 (src, srcAttr, dst, dstAttr, destination)):
+                    if not wanted or this is not node or (nodeType and not other.type.startswith(nodeType)):
+                        continue
+                    if attr is None or thisAttr.split('[')[0] == attr.split('[')[0]:
+                        result.append('%s.%s' % (other.name, otherAttr) if plugs else other.name)
+        return result or None
+
+    def _connectAttr(self, source, destination, **kwargs):
+        src, srcAttr = self._splitPlug(source)
+        dst, dstAttr = self._splitPlug(destination)
+        if kwargs.get('na') or kwargs.get('nextAvailable'):
+            used = [int(x[3].split('[')[1][:-1]) for x in self.connections
+                    if x[2] is dst and x[3].split('[')[0] == dstAttr]
+            dstAttr = '%s[%d]' % (dstAttr, max(used) + 1 if used else 0)
+        self._connect(src, srcAttr, dst, dstAttr)
+
+    def _disconnectAttr(self, source, destination):
+        src, srcAttr = self._splitPlug(source)
+        dst, dstAttr = self._splitPlug(destination)
+        self.connections = [x for x in self.connections
+                            if not (x[0] is src and x[1] == srcAttr and x[2] is dst and x[3] == dstAttr)]
+
+    def _parent(self, *args, **kwargs):
+        names = self._flatten(args)
+        if kwargs.get('w') or kwargs.get('world'):
+            parent = None
+        else:
+            parent = self._node(names.pop())
+        result = []
+        for name in names:
+            node = self._transformOf(self._node(name))
+            self._reparent(node, parent)
+            result.append(node.name)
+        return result
+
+    def _group(self, *args, **kwargs):
+        names = self._flatten(args)
+        group = self._newNode(kwargs.get('n', kwargs.get('name', 'group1')), 'transform')
+        for name in names:
+            self._reparent(self._transformOf(self._node(name)), group)
+        return group.name
+
+    def _rename(self, old, new):
+        node = self._node(old)
+        oldName = node.name
+        del self.nodes[node.name]
+        node.name = self._uniqueName(new)
+        self.nodes[node.name] = node
+        self._emit('renamed', node.name, oldName)
+        for child in node.children:
+            if child.type != 'transform':
+                oldChild = child.name
+                del self.nodes[child.name]
+                child.name = self._uniqueName(node.name + 'Shape')
+                self.nodes[child.name] = child
+                self._emit('renamed', child.name, oldChild)
+        return node.name
+
+    def _delete(self, *args, **kwargs):
+        for name in self._flatten(args):
+            if name not in self.nodes:
+                continue
+            node = self.nodes[name]
+            if node.parent is not None:
+                node.parent.children.remove(node)
+            stack, removed = [node], set()
+            while stack:
+                current = stack.pop()
+                self._emit('removed', current.name)
+                self.nodes.pop(current.name, None)
+                removed.add(id(current))
+                stack.extend(current.children)
+            self.connections = [x for x in self.connections if id(x[0]) not in removed and id(x[2]) not in removed]
+
+    def _select(self, *args, **kwargs):
+        names = self._flatten(args)
+        if kwargs.get('add'):
+            self.selection.extend(names)
+        elif kwargs.get('cl') or kwargs.get('clear'):
+            del self.selection[:]
+        else:
+            self.selection[:] = names
+
+    def _setAttr(self, plug, *values, **kwargs):
+        node, attr, index = self._plug(plug)
+        if attr in ('worldMatrix', 'matrix'):
+            raise RuntimeError('setAttr: The attribute %s is locked or read only' % plug)
+        if len(values) == 1 and isinstance(values[0], (list, tuple)):
+            values = tuple(values[0])
+        if index is not None:
+            current = list(node.values[attr])
+            current[index] = float(values[0])
+            node.values[attr] = tuple(current)
+        elif kwargs.get('type') == 'string' or node.schema[attr][0] == 'string':
+            node.values[attr] = values[0]
+        elif node.schema[attr][0].endswith('3'):
+            node.values[attr] = tuple(float(v) for v in values)
+        else:
+            node.values[attr] = values[0]
+
+    def _getAttr(self, plug, **kwargs):
+        node, attr, index = self._plug(plug)
+        self._solveConstraint(node)
+        if attr == 'worldMatrix':
+            return [v for row in self._worldMatrix(node) for v in row]
+        if attr == 'matrix':
+            return [v for row in self._localMatrix(node) for v in row]
+        if node.type == 'distanceDimShape' and attr == 'distance':
+            a, b = [self._worldMatrix(self._node(x))[3][:3] for x in self._listConnections(node.name, d=False)]
+            return math.sqrt(sum((p - q) ** 2 for p, q in zip(a, b)))
+        value = node.values[attr]
+        if index is not None:
+            return value[index]
+        if isinstance(value, tuple):
+            return [value]
+        return value
+
+    def _attributeQuery(self, attr, **kwargs):
+        if kwargs.get('node') is not None:
+            schema = self._node(kwargs['node']).schema
+        else:
+            schema = SCHEMAS.get(kwargs.get('type', kwargs.get('typ')), {})
+        spec = schema.get(attr)
+        if kwargs.get('mxe') or kwargs.get('maxExists'):
+            return spec is not None and spec[3] is not None
+        if kwargs.get('mne') or kwargs.get('minExists'):
+            return spec is not None and spec[2] is not None
+        if kwargs.get('sxe') or kwargs.get('softMaxExists'):
+            return spec is not None and spec[5] is not None
+        if kwargs.get('sme') or kwargs.get('softMinExists'):
+            return spec is not None and spec[4] is not None
+        if kwargs.get('ex') or kwargs.get('exists'):
+            return spec is not None
+        if spec is None:
+            raise RuntimeError('attributeQuery: Attribute %s does not exist' % attr)
+        for flags, idx in ((('max', 'maximum'), 3), (('min', 'minimum'), 2),
+                           (('smx', 'softMax'), 5), (('smn', 'softMin'), 4)):
+            if any(kwargs.get(x) for x in flags):
+                return [spec[idx]]
+        if kwargs.get('at') or kwargs.get('attributeType'):
+            return spec[0]
+        return spec is not None
+
+    def _addAttr(self, *args, **kwargs):
+        name = kwargs.get('ln', kwargs.get('longName'))
+        attrType = kwargs.get('at', kwargs.get('attributeType')) or kwargs.get('dt', kwargs.get('dataType'))
+        default = kwargs.get('dv', kwargs.get('defaultValue', '' if attrType == 'string' else 0.0))
+        for target in self._flatten(args) or self.selection:
+            node = self._node(target)
+            if name in node.schema:
+                raise RuntimeError('addAttr: Found a conflicting attribute name %s' % name)
+            node.schema[name] = (attrType, default, kwargs.get('min'), kwargs.get('max'),
+                                 kwargs.get('smn', kwargs.get('softMinValue')),
+                                 kwargs.get('smx', kwargs.get('softMaxValue')))
+            node.values[name] = default
+
+    def _deleteAttr(self, plug):
+        node, attr = self._splitPlug(plug)
+        node.schema.pop(attr, None)
+        node.values.pop(attr, None)
+
+    def _xform(self, name, **kwargs):
+        node = self._transformOf(self._node(name))
+        worldSpace = kwargs.get('ws') or kwargs.get('worldSpace')
+        query = kwargs.get('q') or kwargs.get('query')
+        matrix = self._worldMatrix(node) if worldSpace else self._localMatrix(node)
+        if query:
+            if kwargs.get('m') or kwargs.get('matrix'):
+                return [v for row in matrix for v in row]
+            if kwargs.get('t') or kwargs.get('translation'):
+                return list(matrix[3][:3])
+            if kwargs.get('ro') or kwargs.get('rotation'):
+                return _decompose(matrix)[1]
+            return None
+        m = kwargs.get('m', kwargs.get('matrix'))
+        if m is not None:
+            matrix = [list(m[i * 4:i * 4 + 4]) for i in range(4)]
+        else:
+            t, r, s = _decompose(matrix)
+            t = kwargs.get('t', kwargs.get('translation', t))
+            r = kwargs.get('ro', kwargs.get('rotation', r))
+            matrix = _compose(t, r, s)
+        if worldSpace:
+            self._setWorldMatrix(node, matrix, node.parent)
+        else:
+            self._setWorldMatrix(node, matrix, None)
+
+    def _shadingNode(self, nodeType, **kwargs):
+        transform, shape = self._createLight(nodeType, kwargs.get('n', kwargs.get('name')))
+        return transform.name
+
+    def _pointLight(self, **kwargs):
+        return self._createLight('pointLight', kwargs.get('n', kwargs.get('name')))[1].name
+
+    def _spotLight(self, **kwargs):
+        return self._createLight('spotLight', kwargs.get('n', kwargs.get('name')))[1].name
+
+    def _directionalLight(self, **kwargs):
+        return self._createLight('directionalLight', kwargs.get('n', kwargs.get('name')))[1].name
+
+    def _spaceLocator(self, **kwargs):
+        transform = self._newNode(kwargs.get('n', kwargs.get('name', 'locator1')), 'transform')
+        shape = self._newNode(transform.name + 'Shape', 'locator', transform)
+        shape.values['localPosition'] = tuple(kwargs.get('p', kwargs.get('position', (0.0, 0.0, 0.0))))
+        return [transform.name]
+
+    def _distanceDimension(self, sp, ep, **kwargs):
+        ends = []
+        for position in (sp, ep):
+            found = None
+            for node in self.nodes.values():
+                if node.type == 'transform' and any(c.type == 'locator' for c in node.children):
+                    if all(abs(a - b) < 1e-6 for a, b in zip(self._worldMatrix(node)[3][:3], position)):
+                        found = node
+                        break
+            if found is None:
+                found = self.nodes[self._spaceLocator()[0]]
+                found.values['translate'] = tuple(position)
+            ends.append(found.name)
+        transform = self._newNode('distanceDimension1', 'transform')
+        shape = self._newNode('distanceDimensionShape1', 'distanceDimShape', transform)
+        for end, attr in zip(ends, ('startPoint', 'endPoint')):
+            self._connect(self.nodes[end], 'worldPosition', shape, attr)
+        return shape.name
+
+    def _aimConstraint(self, *args, **kwargs):
+        names = self._flatten(args)
+        target = self._node(names[0])
+        result = []
+        for name in names[1:]:
+            node = self._transformOf(self._node(name))
+            constraint = self._newNode(node.name + '_aimConstraint1', 'aimConstraint', node)
+            constraint.values['offset'] = tuple(kwargs.get('o', kwargs.get('offset', (0.0, 0.0, 0.0))))
+            node.constraint = (target, constraint.values['offset'])
+            result.append(constraint.name)
+        return result
+
+    def _createNode(self, nodeType, **kwargs):
+        parent = kwargs.get('p', kwargs.get('parent'))
+        return self._newNode(kwargs.get('n', kwargs.get('name', nodeType + '1')), nodeType,
+                             self._node(parent) if parent else None).name
+
+    def _warning(self, message):
+        self.warnings.append(message)
+
+    def _undoable(self, name):
+        #Commands inside a chunk are one entry with the chunk, empty chunks are not queued
+        if self.undoChunks:
+            self.undoChunks[-1][1] += 1
+        else:
+            self.undoQueue.append(name)
+
+    def _undoInfo(self, q=False, query=False, state=False, st=False, openChunk=False, ock=False,
+                  closeChunk=False, cck=False, chunkName=None, cn=None, undoName=False, un=False):
+        if q or query:
+            if state or st:
+                return self.undoEnabled
+            if undoName or un:
+                return self.undoQueue[-1] if self.undoQueue else ''
+            return None
+        if openChunk or ock:
+            self.undoChunks.append([chunkName or cn or '', 0])
+        elif (closeChunk or cck) and self.undoChunks:
+            chunk, commands = self.undoChunks.pop()
+            if commands and self.undoChunks:
+                self.undoChunks[-1][1] += commands
+            elif commands:
+                self.undoQueue.append(chunk)
+
+    def _undo(self):
+        if self.undoQueue:
+            self.undone.append(self.undoQueue.pop())
+
+    def _confirmDialog(self, **kwargs):
+        return kwargs.get('b', kwargs.get('button', 'OK'))
+
+    def _colorEditor(self, **kwargs):
+        return '%s %s %s 1.0' % tuple(self.nextColor)
+
+    def _workspaceControl(self, name, **kwargs):
+        return False if kwargs.get('query') or kwargs.get('q') else name
+
+    def _deleteUI(self, *args, **kwargs):
+        pass
+
+    def _window(self, name, **kwargs):
+        return False if kwargs.get('query') or kwargs.get('q') else name
+
+
+class MelStandIn(object):
+    '''
+    maya.mel stand-in, eval understands 'createNode type -n name -p parent;',
+    'setAttr plug values;', 'connectAttr source destination;' and
+    'sets -add set members;' statements and runs them on a CmdsStandIn
+    '''
+
+    def __init__(self, cmds):
+        self.cmds = cmds
+        self.eval = cmds._record('mel.eval', self._eval)
+
+    def _eval(self, script):
+        result = None
+        for statement in script.split(';'):
+            tokens = self._tokens(statement)
+            if not tokens:
+                continue
+            command, args, flags = tokens[0], [], {}
+            i = 1
+            while i < len(tokens):
+                if tokens[i].startswith('-') and not self._isNumber(tokens[i]):
+                    flags[tokens[i][1:]] = tokens[i + 1]
+                    i += 2
+                else:
+                    args.append(tokens[i])
+                    i += 1
+            if command == 'createNode':
+                result = self.cmds._createNode(args[0], **flags)
+            elif command == 'setAttr' and '[' in args[0]:
+                #Whole key lists, 'setAttr -s 2 "curve.ktv[0:1]" 1 0.5 2 0.7'
+                values = [self._number(x) for x in args[1:]]
+                node, attr = self.cmds._splitPlug(args[0])
+                node.values[attr.split('[')[0]] = tuple(zip(values[::2], values[1::2]))
+            elif command == 'setAttr':
+                values = args[1:] if flags.get('type') == 'string' else [self._number(x) for x in args[1:]]
+                self.cmds._setAttr(args[0], *values, **flags)
+            elif command == 'connectAttr':
+                self.cmds._connectAttr(args[0], args[1])
+            elif command == 'sets':
+                self.cmds.setMembers.setdefault(flags['add'], []).extend(args)
+            else:
+                raise RuntimeError('MelStandIn: unsupported command %s' % command)
+        return result
+
+    @staticmethod
+    def _tokens(statement):
+        #Quoted strings or runs of non blank characters, quicker than shlex on key lists
+        return [bare or quoted.replace('\\"', '"').replace('\\\\', '\\') for quoted, bare in _TOKEN.findall(statement)]
+
+    @staticmethod
+    def _number(token):
+        return int(token) if token.lstrip('-').isdigit() else float(token)
+
+    @staticmethod
+    def _isNumber(token):
+        try:
+            float(token)
+        except ValueError:
+            return False
+        return True
+
+
+def install(standIn=None):
+    '''
+    Registers a stand-in as maya.cmds, and a MelStandIn on it as maya.mel, so modules
+    doing "from maya import cmds" pick it up.
+    The real maya package is kept when available, otherwise a bare one is created.
+    :param standIn: CmdsStandIn, a new one is created if not given
+    :return: CmdsStandIn
+    '''
+    standIn = standIn or CmdsStandIn()
+    try:
+        import maya
+    except ImportError:
+        maya = types.ModuleType('maya')
+        maya.__path__ = []
+        sys.modules['maya'] = maya
+    maya.cmds = standIn
+    sys.modules['maya.cmds'] = standIn
+    maya.mel = sys.modules['maya.mel'] = MelStandIn(standIn)
+    return standIn
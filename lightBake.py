@@ -0,0 +1,193 @@
+'''
+Keyframe baking of light attributes.
+
+The key values of every light and frame are computed together from a value
+source, with NumPy when it is available, then written as whole animation curves:
+each curve is created with all its keys in a single setAttr on its keyTimeValue
+list, the way Maya files store them, and a MEL batch creates the curves of many
+lights at once. No setKeyframe per light per frame.
+
+Sources are dicts, {'type': 'noise', 'base': 1.0, 'amplitude': 0.5}:
+    constant: value
+    ramp: startValue at startFrame to endValue at endFrame, clamped outside
+    noise: smooth flicker around base, amplitude, frequency in cycles per frame, seed;
+        each light gets its own noise
+A per-light offset shifts the source in time by offset frames times the light index,
+so a ramp travels through the rig instead of every light changing together.
+Compound attributes like 'color' are keyed per channel with the source scaling
+the current value of each light, a red light flickers red.
+'''
+import math
+
+from maya import cmds as cmd
+from maya import mel
+
+import lightNodes
+from lightGradient import latticeHash
+from lightSchema import schema
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#Channels baked for compound attributes, 'color' keys colorR, colorG and colorB scaled by the source
+CHANNELS = {'color': ['colorR', 'colorG', 'colorB']}
+#Animation curve type per attribute type, time to unitless by default
+CURVE_TYPES = {'doubleAngle': 'animCurveTA', 'doubleLinear': 'animCurveTL'}
+CHUNK_SIZE = 100
+
+
+class _Scalar(object):
+    '''
+    Math of the sources on plain floats, NumPy is used the same way on arrays
+    '''
+    floor = staticmethod(math.floor)
+    sin = staticmethod(math.sin)
+
+    @staticmethod
+    def clip(value, low, high):
+        return min(max(value, low), high)
+
+
+def constant(t, light, m, value=1.0):
+    return value + 0.0 * t
+
+
+def ramp(t, light, m, startFrame=1.0, endFrame=100.0, startValue=0.0, endValue=1.0):
+    u = m.clip((t - startFrame) / float(max(endFrame - startFrame, 1e-6)), 0.0, 1.0)
+    return startValue + (endValue - startValue) * u
+
+
+def noise(t, light, m, base=1.0, amplitude=0.5, frequency=0.25, seed=0):
+    '''
+    Value noise: random values at every 1 / frequency frames, eased in between
+    '''
+    x = t * frequency
+    cell = m.floor(x)
+    f = x - cell
+    f = f * f * (3.0 - 2.0 * f)
+    lightSeed = seed + light * 1.618
+    a = latticeHash(cell, lightSeed, m)
+    b = latticeHash(cell + 1.0, lightSeed, m)
+    return base + amplitude * (2.0 * (a + (b - a) * f) - 1.0)
+
+
+SOURCES = {
+    'constant': constant,
+    'ramp': ramp,
+    'noise': noise,
+}
+
+
+def frameRange(start, end, step=1.0):
+    '''
+    Frames from start to end, both included
+    '''
+    count = int(math.floor((end - start) / float(step) + 1e-9)) + 1
+    return [start + i * step for i in range(max(count, 0))]
+
+
+def keyValues(source, frames, count, offset=0.0):
+    '''
+    Values of every light at every frame
+    :param source: dict, 'type' is a key of SOURCES, the rest its parameters
+    :param frames: list of frames
+    :param count: int, number of lights
+    :param offset: float, frames the source is shifted per light, or a list with the shift of each light
+    :return: count lists of len(frames) values, a NumPy array when it is available
+    '''
+    params = dict(source)
+    func = SOURCES[params.pop('type')]
+    offsets = offset if isinstance(offset, (list, tuple)) else [offset * i for i in range(count)]
+    if np is not None:
+        times = np.asarray(frames, dtype=float)[None, :] + np.asarray(offsets, dtype=float)[:, None]
+        lights = np.arange(count, dtype=float)[:, None]
+        return np.broadcast_to(func(times, lights, np, **params), times.shape)
+    return [[func(frame + shift, float(light), _Scalar, **params) for frame in frames]
+            for light, shift in enumerate(offsets)]
+
+
+def _keys(keyFormat, frames, values):
+    #One format operation per curve, time and value pairs interleaved
+    pairs = [None] * (2 * len(frames))
+    pairs[::2] = frames
+    pairs[1::2] = values
+    return keyFormat % tuple(pairs)
+
+
+def curveType(light, attr):
+    info = schema.info(cmd.objectType(light), attr, light)
+    return CURVE_TYPES.get(info.type, 'animCurveTU')
+
+
+def channelValues(attr, values, bases):
+    '''
+    Key values of each channel of an attribute
+    :param values: values of the source, count lists of len(frames) values or a NumPy array
+    :param bases: list, current value of the compound attribute of each light, ignored for other attributes
+    :return: dict, Key: channel, Value: count lists of len(frames) values
+    '''
+    channels = CHANNELS.get(attr)
+    if not channels:
+        return {attr: values.tolist() if np is not None else values}
+    byChannel = {}
+    for i, channel in enumerate(channels):
+        if np is not None:
+            byChannel[channel] = (values * np.asarray([x[i] for x in bases], dtype=float)[:, None]).tolist()
+        else:
+            byChannel[channel] = [[v * base[i] for v in row] for row, base in zip(values, bases)]
+    return byChannel
+
+
+def bake(lights, attrs, start, end, source, offset=0.0, step=1.0, chunkSize=CHUNK_SIZE, bases=None):
+    '''
+    Keys the attributes of the lights over a frame range, replacing their animation
+    :param lights: list, light shapes
+    :param attrs: list, 'intensity', 'color'...
+    :param start: float, first frame
+    :param end: float, last frame
+    :param source: dict, see keyValues
+    :param offset: float or list, see keyValues
+    :param step: float, frames between keys
+    :param chunkSize: int, lights per MEL batch
+    :param bases: dict, Key: compound attribute, Value: list of its current value on each light, the mirrored
+        ones of a RigState, read from the lights when missing
+    :return: int, number of keys written
+    '''
+    if not lights or not attrs:
+        return 0
+    frames = frameRange(start, end, step)
+    values = keyValues(source, frames, len(lights), offset)
+    keyed = {}
+    for attr in attrs:
+        base = (bases or {}).get(attr)
+        if attr in CHANNELS and base is None:
+            base = [cmd.getAttr('%s.%s' % (light, attr))[0] for light in lights]
+        keyed.update(channelValues(attr, values, base))
+    channels = [channel for attr in attrs for channel in CHANNELS.get(attr, [attr])]
+    types = dict((channel, curveType(lights[0], channel)) for channel in channels)
+
+    #Animation already on the plugs is replaced
+    plugs = ['%s.%s' % (light, channel) for light in lights for channel in channels]
+    old = cmd.listConnections(plugs, s=True, d=False, type='animCurve') or []
+    if old:
+        cmd.delete(list(set(old)))
+
+    names = ['%s_%s' % (light, channel) for light in lights for channel in channels]
+    taken = set(cmd.ls(names) or [])
+    last = len(frames) - 1
+    keyFormat = ' '.join(['%g %.6g'] * len(frames))
+    for first in range(0, len(lights), chunkSize):
+        script = []
+        for i in range(first, min(first + chunkSize, len(lights))):
+            for channel in channels:
+                keys = _keys(keyFormat, frames, keyed[channel][i])
+                name = '%s_%s' % (lights[i], channel)
+                if name in taken:
+                    name = lightNodes.reserveNames(name + '%d', 1, 1)[0]
+                script.append('createNode %s -n "%s";' % (types[channel], name))
+                script.append('setAttr -s %d "%s.ktv[0:%d]" %s;' % (len(frames), name, last, keys))
+                script.append('connectAttr "%s.output" "%s.%s";' % (name, lights[i], channel))
+        mel.eval(''.join(script))
+    return len(lights) * len(channels) * len(frames)
@@ -0,0 +1,166 @@
+'''
+Batch rig building from a spec file, for mayapy and farm jobs. No Qt is imported.
+
+    mayapy lightBatch.py rigs.json --scene shot010.ma --output shot010_lit.ma
+
+Spec (JSON), every key is optional, --scene and --output override the file:
+    {
+        "scene": "shot010.ma",
+        "output": "shot010_lit.ma",
+        "rigs": [
+            {"name": "inner_house", "lightType": "spotLight", "count": 12, "placement": "Ring",
+             "start": [0, 4, 0], "end": [6, 4, 0],
+             "attrs": {"intensity": 3, "color": [1, 0.8, 0.6]},
+             "gradient": {"type": "kelvin", "start": 2700, "end": 6500, "shape": "radial", "jitter": 0.05},
+             "aim": [0, 0, 0], "aimMode": "bake",
+             "bake": {"attrs": ["intensity"], "start": 1, "end": 100,
+                      "source": {"type": "noise", "amplitude": 0.3}, "offset": 0.5}},
+            {"import": "rigs/porch.jsonl.gz", "name": "porch"}
+        ],
+        "update": [{"name": "porch", "attrs": {"intensity": 1.5}, "aim": false}],
+        "delete": ["old_fill"]
+    }
+"rigs" are created, then the existing rigs named in "update" get their "attrs", "aim"
+([x, y, z] turns it on, false off) and "bake", then the rigs in "delete" are removed.
+"aimMode" is one of lightCore.AIM_MODES, "gradient" colors the lights after "attrs", see lightGradient.
+"placement" is one of lightCore.PLACEMENTS, "targets" lists the objects of 'Stick to Selected'
+and "curve" names the curve of 'Curve'. A rig that fails is reported and the rest are done.
+'''
+import argparse
+import json
+import sys
+
+import lightBake
+import lightCore
+import lightRegistry
+import lightRigIO
+
+
+def startMaya():
+    '''
+    Initializes Maya when running from mayapy, does nothing inside a Maya session
+    '''
+    try:
+        import maya.standalone
+        maya.standalone.initialize(name='python')
+    except (ImportError, RuntimeError):
+        pass
+
+
+def buildRig(spec):
+    '''
+    Builds one rig of a spec
+    :param spec: dict, one entry of "rigs"
+    :return: string, rig group
+    '''
+    if 'import' in spec:
+        rig = lightRigIO.importRig(spec['import'], spec.get('name'))
+        if rig is None:
+            raise ValueError('Name already exists')
+    else:
+        rig, id = lightCore.createRig(spec.get('name'), spec.get('lightType', 'pointLight'), int(spec.get('count', 5)),
+                                      spec.get('placement', 'Distance'), spec.get('start'), spec.get('end'),
+                                      spec.get('targets'), spec.get('curve'))
+    return editRig(rig, spec)
+
+
+def editRig(rig, spec):
+    '''
+    Applies the "attrs", "gradient", "aim" and "bake" of a spec to a rig
+    :return: string, rig group
+    '''
+    name = lightRegistry.rigName(rig)
+    for attr, value in sorted(spec.get('attrs', {}).items()):
+        lightCore.setAttr(rig, attr, tuple(value) if isinstance(value, list) else value)
+    if spec.get('gradient'):
+        lightCore.colorRig(rig, spec['gradient'])
+    aim = spec.get('aim')
+    if aim is False:
+        lightCore.setAim(name, lightCore.rigInfo(rig), False)
+    elif aim is not None:
+        lightCore.setAim(name, lightCore.rigInfo(rig), True, aim, spec.get('aimMode'))
+    bake = spec.get('bake')
+    if bake:
+        byType = lightCore.lightsByType(lightCore.rigInfo(rig))
+        for attr in bake.get('attrs', ['intensity']):
+            lightBake.bake(lightCore.lightsWithAttr(byType, attr), [attr], bake.get('start', 1), bake.get('end', 100),
+                           bake.get('source', {'type': 'constant'}), bake.get('offset', 0.0), bake.get('step', 1.0))
+    return rig
+
+
+def updateRig(spec):
+    rig = lightCore.findRig(spec.get('name'))
+    if rig is None:
+        raise ValueError('No rig named %s' % spec.get('name'))
+    return editRig(rig, spec)
+
+
+def deleteRig(name):
+    rig = lightCore.findRig(name)
+    if rig is None:
+        raise ValueError('No rig named %s' % name)
+    lightCore.deleteRig(rig)
+    return rig
+
+
+def apply(spec):
+    '''
+    Creates, updates and deletes the rigs of a spec, a failing rig does not stop the others
+    :param spec: dict
+    :return: dict, 'created', 'updated' and 'deleted' rig groups, 'failed' list of [rig, error message]
+    '''
+    report = {'created': [], 'updated': [], 'deleted': [], 'failed': []}
+    steps = [('created', buildRig, x, x.get('name') or x.get('import')) for x in spec.get('rigs', [])]
+    steps.extend(('updated', updateRig, x, x.get('name')) for x in spec.get('update', []))
+    steps.extend(('deleted', deleteRig, x, x) for x in spec.get('delete', []))
+    for key, func, rigSpec, label in steps:
+        try:
+            report[key].append(func(rigSpec))
+        except Exception as error:
+            report['failed'].append([label, str(error)])
+    return report
+
+
+def openScene(scene):
+    from maya import cmds as cmd
+    cmd.file(scene, open=True, force=True)
+
+
+def saveScene(output=None):
+    '''
+    Saves the open scene, under output if given
+    '''
+    from maya import cmds as cmd
+    if output:
+        cmd.file(rename=output)
+    path = output or cmd.file(q=True, sceneName=True)
+    cmd.file(save=True, force=True, type='mayaBinary' if path.endswith('.mb') else 'mayaAscii')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('spec', help='JSON spec file')
+    parser.add_argument('--scene', help='scene opened before building, overrides the spec')
+    parser.add_argument('--output', help='scene file saved after building, overrides the spec')
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    scene = args.scene or spec.get('scene')
+    output = args.output or spec.get('output')
+
+    startMaya()
+    if scene:
+        openScene(scene)
+    report = apply(spec)
+    for label, error in report['failed']:
+        sys.stderr.write('lightBatch: %s failed: %s\n' % (label, error))
+    if output:
+        saveScene(output)
+    sys.stdout.write('lightBatch: %d created, %d updated, %d deleted, %d failed\n' % (
+        len(report['created']), len(report['updated']), len(report['deleted']), len(report['failed'])))
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
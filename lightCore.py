@@ -0,0 +1,514 @@
+'''
+Headless core of lightRigger: rig creation, placement, discovery and attribute
+editing without any Qt import, for mayapy and farm scripts. The panel in
+lightRigger is a front end over these functions.
+
+    import lightCore
+    rig, lights = lightCore.createRig('inner_house', 'spotLight', 12, 'Ring', start=[0, 4, 0], end=[6, 4, 0])
+    lightCore.setAttr(rig, 'intensity', 3)
+
+Errors are raised as ValueError, the panel checks its inputs first and warns instead.
+'''
+import json
+from collections import OrderedDict
+from timeit import default_timer
+
+from maya import cmds as cmd
+
+import lightGradient
+import lightModel
+import lightNodes
+import lightPlacement
+import lightQuery
+import lightRegistry
+import lightState
+import lightTransaction
+from lightSchema import schema
+
+LIGHT_TYPES = ['pointLight', 'spotLight', 'directionalLight', 'areaLight', 'volumeLight']
+PLACEMENTS = ['Stick to Selected', 'Curve'] + sorted(lightPlacement.LAYOUTS)
+#Offset of the aim constraints, -Z of the lights (where they shine) points at the locator
+AIM_OFFSET = [0, 270, 0]
+#Aim modes: 'bake' computes the rotations of every light in one pass and writes them,
+#'constraint' makes one aimConstraint per light that follows the locator
+AIM_MODES = ['bake', 'constraint']
+AIM_MODE = 'bake'
+#Attributes of the aim locator, its mode and what turning it off needs as JSON
+AIM_MODE_ATTR = 'lightRigAimMode'
+AIM_DATA_ATTR = 'lightRigAimData'
+#Seconds a chunk of RigBuilder should take, and the lights of its first chunk
+BUILD_BUDGET = 0.05
+BUILD_CHUNK = 32
+
+
+def aimLocator(name):
+    return name + '_aimLoc'
+
+
+def rigs():
+    '''
+    Rig groups of the scene
+    '''
+    return lightRegistry.rigs()
+
+
+def rigInfo(rig):
+    '''
+    Shape and transform nodes of the lights of a rig
+    :param rig: string, rig group
+    :return: lightModel.RigModel, reads like a dict Key: light shape, Value: light transform
+    '''
+    return lightModel.RigModel.fromRig(rig, lightRegistry.rigName(rig), LIGHT_TYPES)
+
+
+def lightsByType(shapes):
+    '''
+    Light shapes grouped by node type, attribute schemas are looked up once per type
+    :param shapes: list of light shapes, or a lightModel.RigModel that knows their types already
+    :return: OrderedDict, Key: node type, Value: list of shapes
+    '''
+    if isinstance(shapes, lightModel.RigModel):
+        return shapes.byType()
+    byType = OrderedDict()
+    for shape in shapes:
+        byType.setdefault(cmd.objectType(shape), []).append(shape)
+    return byType
+
+
+def lightsWithAttr(byType, attr):
+    '''
+    Lights that have the attribute, from their node type or added to them by hand
+    :param byType: OrderedDict from lightsByType
+    :return: list
+    '''
+    lights = []
+    for lightType, typeLights in byType.items():
+        lights.extend(schema.nodesWith(lightType, attr, typeLights))
+    return lights
+
+
+def layout(placement, count, start=None, end=None, targets=None, curve=None, stickOffset=None):
+    '''
+    Transforms of count lights for a placement method
+    :param placement: string, one of PLACEMENTS
+    :param start: [x, y, z], locator 'A' of the locator layouts
+    :param end: [x, y, z], locator 'B' of the locator layouts
+    :param targets: list, objects the 'Stick to Selected' lights are placed on
+    :param curve: string, nurbsCurve of 'Curve', or a list of points sampled on it
+    :param stickOffset: list, 16 values, extra offset of 'Stick to Selected' lights
+    :return: lightPlacement.Layout
+    '''
+    if placement == 'Stick to Selected':
+        if not targets or len(targets) < count:
+            raise ValueError('Not enough objects selected')
+        matrices = [cmd.getAttr('%s.worldMatrix' % x) for x in targets[:count]]
+        return lightPlacement.stick(matrices, stickOffset)
+    if placement == 'Curve':
+        if not curve:
+            raise ValueError('No curve selected')
+        points = lightPlacement.sampleCurve(curve) if isinstance(curve, lightNodes.STRING_TYPES) else curve
+        return lightPlacement.curve(points, count)
+    if placement not in lightPlacement.LAYOUTS:
+        raise ValueError('Unknown placement %s' % placement)
+    return lightPlacement.LAYOUTS[placement](start or [0.0, 0.0, 0.0], end or [0.0, 0.0, 5.0], count)
+
+
+def placeLights(lights, layout):
+    '''
+    Writes the translate and rotate of a placement layout to the lights
+    :param lights: list, light transforms, or a lightModel.RigModel whose cache is updated too
+    :param layout: lightPlacement.Layout
+    '''
+    with lightTransaction.transaction('lightRigger placeLights') as transaction:
+        if isinstance(lights, lightModel.RigModel):
+            #Only the lights that move are written
+            for attr, values in (('translate', layout.translates), ('rotate', layout.rotates)):
+                for row, value in lights.assignEach(attr, values[:len(lights)]):
+                    transaction.setAttr('%s.%s' % (lights.node(row, attr), attr), *value)
+            return
+        for light, (translate, rotate) in zip(lights, layout):
+            transaction.setAttr('%s.translate' % light, *translate)
+            transaction.setAttr('%s.rotate' % light, *rotate)
+
+
+def checkName(name):
+    '''
+    Raises ValueError if name cannot be the name of a new rig: empty, not letters, digits and _, or in use
+    '''
+    if not name:
+        raise ValueError('No name given')
+    if not lightNodes.isIdentifier(name):
+        raise ValueError('Invalid rig name %r, use letters, digits and _' % (name,))
+    if cmd.objExists(lightRegistry.rigGroupName(name)):
+        raise ValueError('Name already exists')
+
+
+def createRig(name, lightType='pointLight', count=5, placement='Distance', start=None, end=None,
+              targets=None, curve=None, stickOffset=None):
+    '''
+    Creates a rig of count lights placed with a placement method, one undo chunk
+    :param name: string, rig name, the group is '<name>_lgtRig'
+    :param lightType: string, one of LIGHT_TYPES
+    :param count: int
+    :param placement: string, the rest of the arguments are the ones of layout
+    :return: (rig group, lightModel.RigModel of the lights)
+    '''
+    checkName(name)
+    #Computed first, a bad placement fails before anything is created
+    lightLayout = layout(placement, count, start, end, targets, curve, stickOffset)
+    with lightTransaction.transaction('lightRigger createRig'):
+        id = lightModel.RigModel.fromLights(name, None, lightNodes.createLights(lightType, count, name + '%d'), lightType)
+        placeLights(id, lightLayout)
+        id.rig = cmd.group(id.keys(), n=lightRegistry.rigGroupName(name))
+        lightRegistry.register(id.rig, name)
+    return id.rig, id
+
+
+class RigBuilder(object):
+    '''
+    Creates a rig a chunk of lights at a time, for callers that run an event loop
+    between chunks. The group is made with the first chunk, then each step creates and
+    places as many lights as fit in the time budget, in one MEL batch. Each step is its own
+    transaction and undo step, nothing is left open between steps so what is done in the
+    scene meanwhile is not tied to the build.
+    New lights take the values the model holds for the first light, so edits made on the
+    rig while it is being built reach the whole rig. cancel() deletes the group and the
+    lights created so far, a failing step cancels the build.
+
+        builder = lightCore.RigBuilder('inner_house', 'spotLight', 999, 'Ring', start=[0, 4, 0], end=[6, 4, 0])
+        while not builder.done:
+            builder.step()
+    '''
+
+    def __init__(self, name, lightType='pointLight', count=5, placement='Distance', start=None, end=None,
+                 targets=None, curve=None, stickOffset=None, budget=BUILD_BUDGET):
+        '''
+        Arguments of createRig
+        :param budget: float, seconds a step should take
+        '''
+        checkName(name)
+        #Computed first, a bad placement fails before anything is created
+        self.layout = layout(placement, count, start, end, targets, curve, stickOffset)
+        self.name = name
+        self.lightType = lightType
+        self.count = count
+        self.budget = budget
+        self.model = lightModel.RigModel(name)
+        self.chunk = BUILD_CHUNK
+        #Number the next light name is tried from
+        self.next = 0
+        self.cancelled = False
+
+    @property
+    def rig(self):
+        return self.model.rig
+
+    @property
+    def created(self):
+        return len(self.model)
+
+    @property
+    def done(self):
+        return self.cancelled or self.created >= self.count
+
+    def step(self):
+        '''
+        Creates the next chunk, sized from the time the previous one took
+        :return: list, light shapes created
+        '''
+        if self.done:
+            return []
+        started = default_timer()
+        first, size = self.created, min(self.chunk, self.count - self.created)
+        #Values the rig was given so far, the placement of each light is added to them
+        inherited = {}
+        for attr, column in self.model.columns.items():
+            if attr not in lightNodes.TRANSFORM_ATTRS and column.loaded[0]:
+                inherited[attr] = column.get(0)
+        translates = self.layout.translates[first:first + size]
+        rotates = self.layout.rotates[first:first + size]
+        values = [dict(inherited, translate=[float(x) for x in t], rotate=[float(x) for x in r])
+                  for t, r in zip(translates, rotates)]
+
+        try:
+            with lightTransaction.transaction('lightRigger createRig') as transaction:
+                if self.rig is None:
+                    self.model.rig = cmd.group(empty=True, n=lightRegistry.rigGroupName(self.name))
+                    lightRegistry.register(self.rig, self.name)
+                lights = lightNodes.createLights(self.lightType, size, self.name + '%d', self.next, values, self.rig)
+                transaction.flush()
+        except Exception:
+            self.cancel()
+            raise
+        transforms = list(lights.values())
+        self.next = int(transforms[-1][len(self.name):]) + 1
+        rows = [self.model.append(shape, transform, self.lightType) for shape, transform in lights.items()]
+        self.model.assignEach('translate', translates, rows)
+        self.model.assignEach('rotate', rotates, rows)
+        for attr, value in inherited.items():
+            self.model.assign(attr, value, rows)
+
+        elapsed = default_timer() - started
+        self.chunk = max(1, min(4 * self.chunk, int(size * self.budget / max(elapsed, 1e-6))))
+        return list(lights)
+
+    def cancel(self):
+        '''
+        Stops the build and deletes the rig group and the lights created so far, in one undo step,
+        lights moved out of the group meanwhile included
+        '''
+        self.cancelled = True
+        with lightTransaction.transaction('lightRigger cancel createRig'):
+            if self.rig is not None and cmd.objExists(self.rig):
+                deleteRig(self.rig)
+            lights = [x for x in self.model.values() if x and cmd.objExists(x)]
+            if lights:
+                cmd.delete(lights)
+
+
+def rigFromLights(name, lights):
+    '''
+    Groups existing lights into a rig
+    :param lights: list, lights or their transforms, other nodes are ignored
+    :return: (rig group, lightModel.RigModel of the lights)
+    '''
+    checkName(name)
+    lightShapes = cmd.listRelatives(lights, type=LIGHT_TYPES)
+    if not lightShapes:
+        raise ValueError('No lights selected')
+    id = OrderedDict(zip(lightShapes, lightNodes.parentsOf(lightShapes)))
+
+    with lightTransaction.transaction('lightRigger createRigFromSelected'):
+        cmd.parent(id.values(), w=True)
+        rig = cmd.group(id.keys(), n=lightRegistry.rigGroupName(name))
+        lightRegistry.register(rig, name)
+    return rig, lightModel.RigModel.fromLights(name, rig, id)
+
+
+def _model(rig, state):
+    #Model of a rig, the one of its mirror when it has one
+    return state.model if state is not None and state.model.rig == rig else rigInfo(rig)
+
+
+def getAttr(rig, attr, state=None):
+    '''
+    Value of the first light of a rig that has the attribute, None if none has it
+    :param state: lightState.RigState, mirror the value is read through
+    '''
+    model = _model(rig, state)
+    lights = lightsWithAttr(lightsByType(model), attr)
+    if not lights:
+        return None
+    return (state or lightState.RigState(rig, model)).value(attr, lights)
+
+
+def setAttr(rig, attr, value, state=None):
+    '''
+    Sets the attribute on every light of a rig that has it, lights already holding the value are skipped
+    :param state: lightState.RigState, mirror the values are written through
+    :return: int, number of lights with the attribute
+    '''
+    model = _model(rig, state)
+    lights = lightsWithAttr(lightsByType(model), attr)
+    (state or lightState.RigState(rig, model)).write(attr, value, lights)
+    return len(lights)
+
+
+def setAttrEach(rig, attr, values, state=None):
+    '''
+    Sets one value per light of a rig, the lights without the attribute are skipped
+    :param values: list or NumPy array, one value per light in the order of rigInfo
+    :param state: lightState.RigState, mirror the values are written through
+    :return: int, number of lights with the attribute
+    '''
+    model = _model(rig, state)
+    lights = lightsWithAttr(lightsByType(model), attr)
+    (state or lightState.RigState(rig, model)).writeEach(attr, [values[row] for row in model.rows(lights)], lights)
+    return len(lights)
+
+
+def colorRig(rig, gradient, state=None):
+    '''
+    Colors the lights of a rig with a gradient over their positions in the rig, written as one batch
+    :param gradient: dict, see lightGradient
+    :param state: lightState.RigState, mirror the positions are read and the colors written through
+    :return: int, number of lights colored
+    '''
+    model = _model(rig, state)
+    lights = lightsWithAttr(lightsByType(model), 'color')
+    if not lights:
+        return 0
+    state = state or lightState.RigState(rig, model)
+    state.writeEach('color', lightGradient.colors(gradient, state.get('translate', lights)), lights)
+    return len(lights)
+
+
+def hasAim(name):
+    return cmd.objExists(aimLocator(name))
+
+
+def aimMode(name):
+    '''
+    Mode of the aim of a rig, None if it is off. Locators made before the modes existed are 'constraint'
+    '''
+    locatorName = aimLocator(name)
+    if not cmd.objExists(locatorName):
+        return None
+    if cmd.objExists('%s.%s' % (locatorName, AIM_MODE_ATTR)):
+        return cmd.getAttr('%s.%s' % (locatorName, AIM_MODE_ATTR))
+    return 'constraint'
+
+
+def _aimData(locatorName, mode=None, data=None):
+    #Reads the aim data of a locator, or tags the locator with its mode and data
+    plug = '%s.%s' % (locatorName, AIM_DATA_ATTR)
+    if mode is None:
+        return json.loads(cmd.getAttr(plug)) if cmd.objExists(plug) else {}
+    for attr, value in ((AIM_MODE_ATTR, mode), (AIM_DATA_ATTR, json.dumps(data))):
+        if not cmd.objExists('%s.%s' % (locatorName, attr)):
+            cmd.addAttr(locatorName, ln=attr, dt='string')
+        cmd.setAttr('%s.%s' % (locatorName, attr), value, type='string')
+
+
+def solveAim(lights, target):
+    '''
+    Rotations aiming the lights at a world position like the aim constraints, all in one pass
+    :param lights: list, light transforms, children of the same rig group
+    :param target: [x, y, z]
+    :return: list of [x, y, z] rotations
+    '''
+    parent = cmd.listRelatives(lights[0], p=True)
+    parentMatrix = cmd.xform(parent[0], q=True, ws=True, m=True) if parent else None
+    translates = [cmd.getAttr('%s.translate' % x)[0] for x in lights]
+    return lightPlacement.aimAt(translates, target, parentMatrix)
+
+
+def _writeRotates(transaction, info, rotates):
+    '''
+    Writes one rotation per light of a rig, through the cache of a lightModel.RigModel so it does not go stale
+    :param info: dict, Key: light shape, Value: light transform, or a lightModel.RigModel
+    :param rotates: list of [x, y, z], in the order of info.values()
+    '''
+    if not isinstance(info, lightModel.RigModel):
+        for light, rotate in zip(info.values(), rotates):
+            transaction.setAttr('%s.rotate' % light, *rotate)
+        return
+    #The cache would keep rotations that were never written if the transaction fails
+    transaction.onRollback(lambda: info.invalidate(['rotate']))
+    for row, rotate in info.assignEach('rotate', rotates):
+        transaction.setAttr('%s.rotate' % info.node(row, 'rotate'), *rotate)
+
+
+def _staleRotates(info):
+    '''
+    Drops the cached rotations of a lightModel.RigModel after Maya changed them, constraints or restored values
+    '''
+    if isinstance(info, lightModel.RigModel):
+        info.invalidate(['rotate'])
+
+
+def setAim(name, info, on, position=None, mode=None):
+    '''
+    Makes the lights of a rig aim at a '<name>_aimLoc' locator, or removes the locator and puts the lights back.
+    The locator keeps what turning it off needs, nothing is looked up in the hierarchy.
+    :param name: string, rig name
+    :param info: dict, Key: light shape, Value: light transform, a lightModel.RigModel has its rotate cache kept right
+    :param on: bool
+    :param position: [x, y, z], locator position when turned on
+    :param mode: string, one of AIM_MODES when turned on, AIM_MODE by default
+    :return: the locator position when turned off, as getAttr returns it, otherwise None
+    '''
+    locatorName = aimLocator(name)
+    lights = list(info.values())
+    mode = mode or AIM_MODE
+    #Checked before the undo chunk opens
+    if on and mode not in AIM_MODES:
+        raise ValueError('Unknown aim mode %s' % mode)
+    with lightTransaction.transaction('lightRigger aim') as transaction:
+        if on:
+            if cmd.objExists(locatorName):
+                return None
+            cmd.spaceLocator(n=locatorName)
+            if mode == 'constraint':
+                if position:
+                    transaction.setAttr('%s.translate' % locatorName, *position)
+                constrains = [cmd.aimConstraint(locatorName, i, mo=False, o=AIM_OFFSET)[0] for i in lights]
+                _aimData(locatorName, mode, {'constraints': constrains})
+                _staleRotates(info)
+                return None
+            #Current rotations are kept on the locator to be restored when turned off
+            transaction.flush()
+            rotates = [list(cmd.getAttr('%s.rotate' % i)[0]) for i in lights]
+            _aimData(locatorName, mode, {'lights': lights, 'rotates': rotates})
+            if lights:
+                _writeRotates(transaction, info, solveAim(lights, list(position or [0.0, 0.0, 0.0])))
+            if position:
+                transaction.setAttr('%s.translate' % locatorName, *position)
+            return None
+
+        if not cmd.objExists(locatorName):
+            return None
+        mode = aimMode(name)
+        data = _aimData(locatorName)
+        if mode == 'bake':
+            existing = set(cmd.ls(data.get('lights', [])) or [])
+            for light, rotate in zip(data.get('lights', []), data.get('rotates', [])):
+                if light in existing:
+                    transaction.setAttr('%s.rotate' % light, *rotate)
+        else:
+            #Locators made before the modes existed have no list of their constraints
+            constrains = cmd.ls(data['constraints']) if 'constraints' in data else \
+                cmd.listRelatives(lights, type='aimConstraint')
+            if constrains:
+                cmd.delete(constrains)
+        _staleRotates(info)
+        position = cmd.getAttr('%s.translate' % locatorName)
+        cmd.delete(locatorName)
+        return position
+
+
+def updateAim(name, info):
+    '''
+    Aims the lights of a rig in 'bake' mode at the current position of its locator again
+    :return: bool, False if the rig has no baked aim
+    '''
+    if aimMode(name) != 'bake':
+        return False
+    lights = list(info.values())
+    with lightTransaction.transaction('lightRigger aim') as transaction:
+        transaction.flush()
+        target = cmd.xform(aimLocator(name), q=True, ws=True, t=True)
+        _writeRotates(transaction, info, solveAim(lights, target))
+    return True
+
+
+def deleteRig(rig):
+    '''
+    Deletes a rig, its lights and its aim locator, and takes it out of the registry
+    :param rig: string, rig group
+    '''
+    with lightTransaction.transaction('lightRigger deleteRig') as transaction:
+        setAim(lightRegistry.rigName(rig), rigInfo(rig), False)
+        #Rotations a baked aim restores are written while their lights still exist
+        transaction.flush()
+        lightRegistry.unregister(rig)
+        cmd.delete(rig)
+
+
+def findRig(name):
+    '''
+    Registered rig group of a rig name, None if there is none
+    '''
+    for rig in rigs():
+        if lightRegistry.rigName(rig) == name:
+            return rig
+    return None
+
+
+def findLights(query, rigs=None):
+    '''
+    Lights of the rigs matching a query, 'intensity > 50 and type == spotLight', see lightQuery
+    :param rigs: list of rig groups, every rig by default
+    :return: OrderedDict, Key: rig group, Value: list of light shapes, only rigs with matches
+    '''
+    return lightQuery.LightIndex((rig, rigInfo(rig)) for rig in (lightRegistry.rigs() if rigs is None else rigs)).query(query)
@@ -0,0 +1,126 @@
+'''
+Scene change notifications for the rig panel.
+
+A SceneWatcher reports DAG nodes being added, removed, renamed or reparented to
+its listeners. MayaSceneWatcher gets them from Maya's message callbacks,
+ManualSceneWatcher is a stand-in whose events are fired by hand. EventBatcher
+collects the events of one event loop tick and delivers them together.
+'''
+
+ADDED = 'added'
+REMOVED = 'removed'
+RENAMED = 'renamed'
+REPARENTED = 'reparented'
+
+
+class SceneWatcher(object):
+    '''
+    Interface of the scene watchers, listeners are called as listener(kind, name, oldName)
+    '''
+
+    def __init__(self):
+        self.listeners = []
+        self.active = False
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def emit(self, kind, name, oldName=None):
+        '''
+        :param kind: ADDED, REMOVED, RENAMED or REPARENTED
+        :param name: string, current name of the node
+        :param oldName: string, previous name on RENAMED events
+        '''
+        if not self.active:
+            return
+        for listener in list(self.listeners):
+            listener(kind, name, oldName)
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+
+class ManualSceneWatcher(SceneWatcher):
+    '''
+    Watcher without a scene behind it, events are fired calling emit
+    '''
+
+
+class MayaSceneWatcher(SceneWatcher):
+    '''
+    Watches DAG nodes through OpenMaya message callbacks, they are removed on stop
+    '''
+
+    def __init__(self):
+        super(MayaSceneWatcher, self).__init__()
+        self.callbackIds = []
+
+    def start(self):
+        if self.active:
+            return
+        import maya.OpenMaya as om
+        self.om = om
+        self.callbackIds = [
+            om.MDGMessage.addNodeAddedCallback(self._added, 'dagNode'),
+            om.MDGMessage.addNodeRemovedCallback(self._removed, 'dagNode'),
+            om.MNodeMessage.addNameChangedCallback(om.MObject(), self._renamed),
+            om.MDagMessage.addAllDagChangesCallback(self._reparented),
+        ]
+        super(MayaSceneWatcher, self).start()
+
+    def stop(self):
+        super(MayaSceneWatcher, self).stop()
+        for callbackId in self.callbackIds:
+            self.om.MMessage.removeCallback(callbackId)
+        self.callbackIds = []
+
+    def _name(self, node):
+        return self.om.MFnDependencyNode(node).name()
+
+    def _added(self, node, clientData):
+        self.emit(ADDED, self._name(node))
+
+    def _removed(self, node, clientData):
+        self.emit(REMOVED, self._name(node))
+
+    def _renamed(self, node, oldName, clientData):
+        if node.hasFn(self.om.MFn.kDagNode):
+            self.emit(RENAMED, self._name(node), oldName)
+
+    def _reparented(self, msgType, child, parent, clientData):
+        self.emit(REPARENTED, self._name(child.node()))
+
+
+class EventBatcher(object):
+    '''
+    Listener that queues events and hands them over in one call per event loop tick
+    '''
+
+    def __init__(self, callback, defer):
+        '''
+        :param callback: function called with the list of (kind, name, oldName) events
+        :param defer: function that runs its argument on the next event loop tick
+        '''
+        self.callback = callback
+        self.defer = defer
+        self.events = []
+        self.scheduled = False
+
+    def __call__(self, kind, name, oldName=None):
+        self.events.append((kind, name, oldName))
+        if not self.scheduled:
+            self.scheduled = True
+            self.defer(self.flush)
+
+    def flush(self):
+        events, self.events = self.events, []
+        self.scheduled = False
+        if events:
+            self.callback(events)
@@ -0,0 +1,160 @@
+'''
+Color gradients across the lights of a rig.
+
+The color of every light is computed in one pass from the light positions, with
+NumPy when it is available, and written as a batch by the caller. Pure math, it
+runs without Maya.
+
+Gradients are dicts, {'type': 'kelvin', 'start': 2700, 'end': 6500, 'shape': 'radial'}:
+    type: 'ramp' from the color start to the color end, 'kelvin' from the temperature
+        start to the temperature end (in Kelvin)
+    shape: 'linear' along axis, 'radial' out from center
+    axis: 'x', 'y', 'z', [x, y, z], or 'auto' for the longest side of the rig
+    center: [x, y, z], center of 'radial', the middle of the lights by default
+    jitter: random variation of each channel of each light, 0.1 is +-10%
+    seed: int, the same seed gives the same jitter
+'''
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TYPES = ['ramp', 'kelvin']
+SHAPES = ['linear', 'radial']
+AXES = {'x': [1.0, 0.0, 0.0], 'y': [0.0, 1.0, 0.0], 'z': [0.0, 0.0, 1.0]}
+KELVIN_RANGE = (1000.0, 40000.0)
+
+
+def kelvin(temperatures):
+    '''
+    RGB of black body temperatures, Tanner Helland's fit normalized to 0-1
+    :param temperatures: list of floats in Kelvin
+    :return: N x 3, a NumPy array when it is available
+    '''
+    if np is not None:
+        t = np.clip(np.asarray(temperatures, dtype=float), *KELVIN_RANGE) / 100.0
+        warm = t <= 66.0
+        hot = np.maximum(t - 60.0, 1e-6)
+        r = np.where(warm, 255.0, 329.698727446 * hot ** -0.1332047592)
+        g = np.where(warm, 99.4708025861 * np.log(t) - 161.1195681661, 288.1221695283 * hot ** -0.0755148492)
+        cool = 138.5177312231 * np.log(np.maximum(t - 10.0, 1e-6)) - 305.0447927307
+        b = np.where(t >= 66.0, 255.0, np.where(t <= 19.0, 0.0, cool))
+        return np.clip(np.stack([r, g, b], axis=1), 0.0, 255.0) / 255.0
+    colors = []
+    for temperature in temperatures:
+        t = min(max(float(temperature), KELVIN_RANGE[0]), KELVIN_RANGE[1]) / 100.0
+        if t <= 66.0:
+            r, g = 255.0, 99.4708025861 * math.log(t) - 161.1195681661
+        else:
+            r, g = 329.698727446 * (t - 60.0) ** -0.1332047592, 288.1221695283 * (t - 60.0) ** -0.0755148492
+        if t >= 66.0:
+            b = 255.0
+        elif t <= 19.0:
+            b = 0.0
+        else:
+            b = 138.5177312231 * math.log(t - 10.0) - 305.0447927307
+        colors.append([min(max(x, 0.0), 255.0) / 255.0 for x in (r, g, b)])
+    return colors
+
+
+def _axis(axis, positions):
+    if isinstance(axis, (list, tuple)):
+        length = math.sqrt(sum(v * v for v in axis)) or 1.0
+        return [v / length for v in axis]
+    if axis in AXES:
+        return AXES[axis]
+    #'auto', the longest side of the bounding box
+    if np is not None:
+        sizes = (positions.max(axis=0) - positions.min(axis=0)).tolist() if len(positions) else [0.0]
+    else:
+        sizes = [max(p[i] for p in positions) - min(p[i] for p in positions) for i in range(3)] if positions else [0.0]
+    return AXES['xyz'[sizes.index(max(sizes))]]
+
+
+def latticeHash(n, seed, m):
+    '''
+    Pseudo random value in [0, 1) per lattice point n, the same with math and NumPy
+    :param n: float, or an array of them with m = numpy
+    :param m: module with sin and floor, math or numpy
+    '''
+    x = m.sin(n * 12.9898 + seed * 78.233) * 43758.5453
+    return x - m.floor(x)
+
+
+def _jitter(count, seed):
+    #Pseudo random values in [-1, 1) per light and channel
+    if np is not None:
+        n = np.arange(count, dtype=float)[:, None] * 3.0 + np.arange(3, dtype=float)[None, :]
+        return 2.0 * latticeHash(n, seed, np) - 1.0
+    return [[2.0 * latticeHash(light * 3.0 + channel, seed, math) - 1.0 for channel in range(3)]
+            for light in range(count)]
+
+
+def parameters(positions, shape='linear', axis='auto', center=None):
+    '''
+    Position of each light along the gradient, 0 at its start and 1 at its end
+    :param positions: N x 3, light positions
+    :return: N values, a NumPy array when it is available
+    '''
+    if shape not in SHAPES:
+        raise ValueError('Unknown gradient shape %s' % shape)
+    if np is not None:
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        if shape == 'radial':
+            middle = positions.mean(axis=0) if center is None else np.asarray(center, dtype=float)
+            values = np.linalg.norm(positions - middle, axis=1)
+            low = 0.0
+        else:
+            values = np.dot(positions, np.asarray(_axis(axis, positions)))
+            low = values.min() if len(values) else 0.0
+        span = values.max() - low if len(values) else 0.0
+        return (values - low) / span if span > 1e-9 else np.zeros(len(values))
+
+    if shape == 'radial':
+        if center is None:
+            center = [sum(p[i] for p in positions) / float(len(positions) or 1) for i in range(3)]
+        values = [math.sqrt(sum((a - c) ** 2 for a, c in zip(p, center))) for p in positions]
+        low = 0.0
+    else:
+        direction = _axis(axis, positions)
+        values = [sum(a * d for a, d in zip(p, direction)) for p in positions]
+        low = min(values) if values else 0.0
+    span = max(values) - low if values else 0.0
+    return [(v - low) / span if span > 1e-9 else 0.0 for v in values]
+
+
+def colors(gradient, positions):
+    '''
+    Color of every light
+    :param gradient: dict, see the module docstring
+    :param positions: N x 3, light positions
+    :return: N x 3, a NumPy array when it is available
+    '''
+    gradientType = gradient.get('type', 'ramp')
+    u = parameters(positions, gradient.get('shape', 'linear'), gradient.get('axis', 'auto'), gradient.get('center'))
+    if gradientType == 'ramp':
+        start, end = gradient.get('start', [1.0, 1.0, 1.0]), gradient.get('end', [1.0, 1.0, 1.0])
+        if np is not None:
+            start = np.asarray(start, dtype=float)
+            result = start + (np.asarray(end, dtype=float) - start) * u[:, None]
+        else:
+            result = [[a + (b - a) * x for a, b in zip(start, end)] for x in u]
+    elif gradientType == 'kelvin':
+        start, end = float(gradient.get('start', 2700.0)), float(gradient.get('end', 6500.0))
+        if np is not None:
+            result = kelvin(start + (end - start) * u)
+        else:
+            result = kelvin([start + (end - start) * x for x in u])
+    else:
+        raise ValueError('Unknown gradient type %s' % gradientType)
+
+    jitter = float(gradient.get('jitter', 0.0))
+    if jitter:
+        noise = _jitter(len(u), gradient.get('seed', 0))
+        if np is not None:
+            result = np.maximum(result * (1.0 + jitter * noise), 0.0)
+        else:
+            result = [[max(c * (1.0 + jitter * n), 0.0) for c, n in zip(color, row)] for color, row in zip(result, noise)]
+    return result
@@ -0,0 +1,374 @@
+'''
+Columnar model of the lights of a rig.
+
+A RigModel keeps one row per light in parallel columns: shape and transform
+names, the node type as a small integer into a table of type names, and the
+cached values of the attributes read so far. Numeric attributes live in flat
+array('d') columns, width 3 for compounds such as color or translate, with a
+bytearray of loaded flags, so 100k lights cost a few bytes per light and
+attribute instead of a dict entry and a python float each.
+
+It reads like the {light shape: light transform} dicts it replaces (keys,
+values, items, len, in), so code written for those keeps working, and adds
+row based and vectorized access:
+
+    model = lightCore.rigInfo(rig)
+    intensities = model.array('intensity')        #NumPy array when available
+    changed = model.assignEach('intensity', values)   #rows whose cached value changed
+
+The cache does not see edits made outside the tool, see lightState.
+'''
+from array import array
+from collections import OrderedDict
+
+from maya import cmds as cmd
+
+from lightNodes import TRANSFORM_ATTRS, parentsOf, plainValue
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#Type of the rows added without one, resolved on first use
+UNKNOWN = ''
+
+
+class Column(object):
+    '''
+    Cached values of one attribute, one entry (or width entries) per row.
+    Numbers are stored in an array('d') and given back as kind, other values in a list.
+    version counts the changes of the values, indexes built on the column compare it to know they are stale.
+    '''
+    __slots__ = ('width', 'kind', 'data', 'loaded', 'version')
+
+    def __init__(self, sample, rows):
+        '''
+        :param sample: a value of the attribute, sets the width and kind of the column
+        :param rows: int, rows of the model
+        '''
+        if np is not None and isinstance(sample, np.generic):
+            sample = sample.item()
+        if isinstance(sample, (list, tuple)) or (np is not None and isinstance(sample, np.ndarray)):
+            self.width, self.kind = len(sample), float
+        elif isinstance(sample, (bool, int, float)):
+            self.width, self.kind = 1, type(sample)
+        else:
+            self.width, self.kind = 1, None
+        self.data = array('d', [0.0]) * (rows * self.width) if self.kind else [None] * rows
+        self.loaded = bytearray(rows)
+        self.version = 0
+
+    def grow(self, rows):
+        added = rows - len(self.loaded)
+        if added > 0:
+            self.data.extend(array('d', [0.0]) * (added * self.width) if self.kind else [None] * added)
+            self.loaded.extend(bytearray(added))
+
+    def get(self, row):
+        if not self.kind:
+            return self.data[row]
+        if self.width == 1:
+            return self.kind(self.data[row])
+        return tuple(self.data[row * self.width:(row + 1) * self.width])
+
+    def put(self, row, value):
+        '''
+        Stores a value
+        :return: bool, True if the row was not loaded or held another value
+        '''
+        if not self.kind:
+            changed = not self.loaded[row] or self.data[row] != value
+            self.data[row] = value
+        elif self.width == 1:
+            value = float(value)
+            changed = not self.loaded[row] or self.data[row] != value
+            self.data[row] = value
+        else:
+            start = row * self.width
+            value = array('d', [float(x) for x in value])
+            changed = not self.loaded[row] or self.data[start:start + self.width] != value
+            self.data[start:start + self.width] = value
+        self.loaded[row] = 1
+        if changed:
+            self.version += 1
+        return changed
+
+
+class RigModel(object):
+    '''
+    Lights of a rig in columns, see the module docstring
+    '''
+    __slots__ = ('name', 'rig', 'shapes', 'transforms', 'typeNames', 'types', 'columns', '_rows')
+
+    def __init__(self, name='', rig=None):
+        '''
+        :param name: string, rig name
+        :param rig: string, rig group
+        '''
+        self.name = name
+        self.rig = rig
+        self.shapes = []
+        self.transforms = []
+        #Node type of each row, an index into typeNames
+        self.typeNames = [UNKNOWN]
+        self.types = array('B')
+        #Key: attribute, Value: Column
+        self.columns = {}
+        #Key: shape, Value: row, built on first lookup
+        self._rows = None
+
+    @classmethod
+    def fromLights(cls, name, rig, lights, lightTypes=None):
+        '''
+        :param lights: dict or list of pairs, light shape and light transform
+        :param lightTypes: string, node type of every light, or a list with the type of each one
+        '''
+        model = cls(name, rig)
+        pairs = list(lights.items()) if hasattr(lights, 'items') else list(lights)
+        if isinstance(lightTypes, (list, tuple)):
+            types = lightTypes
+        else:
+            types = [lightTypes or UNKNOWN] * len(pairs)
+        for (shape, transform), lightType in zip(pairs, types):
+            model.append(shape, transform, lightType)
+        return model
+
+    @classmethod
+    def fromRig(cls, rig, name=None, lightTypes=None):
+        '''
+        Reads the lights of a rig group, their types come with them in one ls
+        :param lightTypes: list, node types the light shapes are found with
+        '''
+        model = cls(name or rig, rig)
+        transforms = cmd.listRelatives(rig) or []
+        shapes = cmd.listRelatives(transforms, type=lightTypes) if lightTypes else \
+            cmd.listRelatives(transforms, shapes=True)
+        if not shapes:
+            return model
+        typed = cmd.ls(shapes, showType=True) or []
+        types = dict(zip(typed[::2], typed[1::2]))
+        #Other children of the rig, locators or groups, have no light shape, each shape is paired with its own parent
+        for shape, transform in zip(shapes, parentsOf(shapes)):
+            model.append(shape, transform, types.get(shape, UNKNOWN))
+        return model
+
+    @classmethod
+    def merge(cls, models, name=''):
+        '''
+        One model with the rows of several, a light in several of them once, the cached values are not carried over
+        '''
+        merged = cls(name)
+        index = merged.rowIndex()
+        for model in models:
+            for row, shape in enumerate(model.shapes):
+                if shape not in index:
+                    merged.append(shape, model.transforms[row], model.typeNames[model.types[row]])
+        return merged
+
+    #Dict of light shape to light transform interface
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def __iter__(self):
+        return iter(self.shapes)
+
+    def __contains__(self, shape):
+        return shape in self.rowIndex()
+
+    def __getitem__(self, shape):
+        return self.transforms[self.rowIndex()[shape]]
+
+    def __eq__(self, other):
+        if isinstance(other, RigModel):
+            return self.shapes == other.shapes and self.transforms == other.transforms
+        if hasattr(other, 'items'):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def get(self, shape, default=None):
+        row = self.rowIndex().get(shape)
+        return default if row is None else self.transforms[row]
+
+    def keys(self):
+        return list(self.shapes)
+
+    def values(self):
+        return list(self.transforms)
+
+    def items(self):
+        return list(zip(self.shapes, self.transforms))
+
+    #Rows
+
+    def rowIndex(self):
+        if self._rows is None:
+            self._rows = dict((shape, row) for row, shape in enumerate(self.shapes))
+        return self._rows
+
+    def append(self, shape, transform=None, lightType=UNKNOWN):
+        '''
+        Adds a light
+        :return: int, its row
+        '''
+        row = len(self.shapes)
+        self.shapes.append(shape)
+        self.transforms.append(transform)
+        if lightType not in self.typeNames:
+            self.typeNames.append(lightType)
+        self.types.append(self.typeNames.index(lightType))
+        if self._rows is not None:
+            self._rows[shape] = row
+        for column in self.columns.values():
+            column.grow(row + 1)
+        return row
+
+    def rows(self, lights, add=False):
+        '''
+        Rows of lights
+        :param lights: list, light shapes
+        :param add: bool, lights missing in the model are appended instead of raising KeyError
+        :return: list of int
+        '''
+        index = self.rowIndex()
+        if not add:
+            return [index[x] for x in lights]
+        return [index[x] if x in index else self.append(x) for x in lights]
+
+    def lightType(self, row):
+        if not self.types[row]:
+            lightType = cmd.objectType(self.shapes[row])
+            if lightType not in self.typeNames:
+                self.typeNames.append(lightType)
+            self.types[row] = self.typeNames.index(lightType)
+        return self.typeNames[self.types[row]]
+
+    def byType(self):
+        '''
+        Light shapes grouped by node type, in the order of the rows
+        :return: OrderedDict, Key: node type, Value: list of shapes
+        '''
+        byType = OrderedDict()
+        for row, shape in enumerate(self.shapes):
+            byType.setdefault(self.lightType(row), []).append(shape)
+        return byType
+
+    def node(self, row, attr):
+        '''
+        Node holding the attribute of a light, its transform for the transform attributes
+        '''
+        if attr in TRANSFORM_ATTRS and self.transforms[row]:
+            return self.transforms[row]
+        return self.shapes[row]
+
+    #Cached attribute values
+
+    def load(self, attr, rows):
+        '''
+        Reads the attribute of the rows not cached yet
+        :return: Column, None if there are no rows
+        '''
+        column = self.columns.get(attr)
+        for row in rows:
+            if column is not None and column.loaded[row]:
+                continue
+            value = plainValue(cmd.getAttr('%s.%s' % (self.node(row, attr), attr)))
+            if column is None:
+                column = self.columns[attr] = Column(value, len(self.shapes))
+            column.put(row, value)
+        return column
+
+    def read(self, attr, rows):
+        '''
+        Cached values of rows, loaded first if needed
+        :return: list
+        '''
+        column = self.load(attr, rows)
+        return [column.get(row) for row in rows]
+
+    def value(self, attr, row):
+        return self.load(attr, [row]).get(row)
+
+    def array(self, attr, rows=None):
+        '''
+        Cached values of rows as one array, loaded first if needed
+        :param rows: list of int, every row by default
+        :return: NumPy array (N or N x width) when available, otherwise a list
+        '''
+        rows = list(range(len(self.shapes))) if rows is None else rows
+        column = self.load(attr, rows)
+        if column is None:
+            return np.zeros(0) if np is not None else []
+        if np is None or not column.kind:
+            return [column.get(row) for row in rows]
+        data = np.frombuffer(column.data, dtype=float).reshape(-1, column.width)[rows]
+        return data[:, 0] if column.width == 1 else data
+
+    def assign(self, attr, value, rows=None):
+        '''
+        Puts one value in the cache of every row
+        :param rows: list of int, every row by default
+        :return: list of (row, value) of the rows whose cached value changed
+        '''
+        return self._assign(attr, value, rows, True)
+
+    def assignEach(self, attr, values, rows=None):
+        '''
+        Puts one value per row in the cache
+        :param values: list or array, N values (N x width for compounds)
+        :return: list of (row, value) of the rows whose cached value changed
+        '''
+        return self._assign(attr, values, rows, False)
+
+    def _assign(self, attr, values, rows, single):
+        rows = list(range(len(self.shapes))) if rows is None else rows
+        if not rows:
+            return []
+        column = self.columns.get(attr)
+        if column is None:
+            column = self.columns[attr] = Column(values if single else values[0], len(self.shapes))
+        if np is not None and column.kind and len(rows) > 1:
+            return self._assignArray(column, values, rows, single)
+        changed = []
+        for i, row in enumerate(rows):
+            value = values if single else values[i]
+            if column.put(row, value):
+                changed.append((row, value))
+        return changed
+
+    def _assignArray(self, column, values, rows, single):
+        #Vectorized compare and store, views on the column buffers are dropped before returning
+        new = np.broadcast_to(np.asarray(values, dtype=float).reshape(-1, column.width),
+                              (len(rows), column.width))
+        index = np.asarray(rows)
+        data = np.frombuffer(column.data, dtype=float).reshape(-1, column.width)
+        loaded = np.frombuffer(column.loaded, dtype=np.uint8)
+        differs = (loaded[index] == 0) | np.any(data[index] != new, axis=1)
+        data[index] = new
+        loaded[index] = 1
+        del data, loaded
+        positions = np.nonzero(differs)[0]
+        if len(positions):
+            column.version += 1
+        changedRows = index[positions].tolist()
+        if single:
+            return [(row, values) for row in changedRows]
+        if column.width == 1:
+            return list(zip(changedRows, [column.kind(x) for x in new[positions, 0].tolist()]))
+        return list(zip(changedRows, [tuple(x) for x in new[positions].tolist()]))
+
+    def invalidate(self, attrs=None):
+        '''
+        Forgets cached values, the next read comes from the scene
+        :param attrs: list of attributes, all by default
+        '''
+        for attr in (list(self.columns) if attrs is None else attrs):
+            self.columns.pop(attr, None)
+
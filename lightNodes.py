@@ -0,0 +1,135 @@
+'''
+Bulk creation of light nodes.
+
+createLights makes any number of lights of one type in a single MEL batch:
+names are reserved up front with one ls, every transform and shape is created
+in one mel.eval, and the shape/transform pairs are resolved with one
+listRelatives, instead of several cmds calls per light. Initial attribute
+values and the parent group can go in the same batch. Node names, node types
+and attribute names go into the MEL unquoted or between quotes, they have to
+be Maya identifiers, see isIdentifier.
+'''
+import re
+from collections import OrderedDict
+
+from maya import cmds as cmd
+from maya import mel
+
+SHAPE_SUFFIX = 'Shape'
+LIGHT_SET = 'defaultLightSet'
+#Attributes set on the transform, the rest go to the light shape
+TRANSFORM_ATTRS = ['translate', 'rotate', 'scale', 'visibility']
+STRING_TYPES = (str, type(u''))
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*$')
+#Node names with namespaces and DAG paths, 'ns:rig_lgtRig', '|group|light1'
+_NODE_NAME = re.compile(r'\|?[A-Za-z_][A-Za-z0-9_]*(?:[|:][A-Za-z_][A-Za-z0-9_]*)*$')
+
+
+def isIdentifier(name):
+    '''
+    True if name is a valid Maya node, node type or attribute name, nothing in it can break out of a MEL command
+    '''
+    return isinstance(name, STRING_TYPES) and _IDENTIFIER.match(name) is not None
+
+
+def isNodeName(name):
+    '''
+    True if name is an existing node name as Maya writes them, namespaces and DAG paths allowed
+    '''
+    return isinstance(name, STRING_TYPES) and _NODE_NAME.match(name) is not None
+
+
+def plainValue(value):
+    '''
+    Value of a getAttr without its wrapping, compounds come as [(x, y, z)] and are given back as (x, y, z)
+    '''
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], tuple):
+        return value[0]
+    return value
+
+
+def melValue(value):
+    '''
+    MEL setAttr arguments of a python value
+    '''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(melValue(x) for x in value)
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return '-type "string" "%s"' % str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def melSetAttr(node, attr, value):
+    return 'setAttr "%s.%s" %s;' % (node, attr, melValue(value))
+
+
+def parentsOf(shapes):
+    '''
+    Transform of each shape, in the same order, whatever else the transforms hold
+    :param shapes: list
+    :return: list
+    '''
+    parents = cmd.listRelatives(shapes, p=True) or []
+    if len(parents) != len(shapes):
+        #Shapes sharing a transform give it once
+        parents = [cmd.listRelatives(x, p=True)[0] for x in shapes]
+    return parents
+
+
+def reserveNames(nameFormat, count, start=0):
+    '''
+    Returns count names, with their shape names, not used in the scene
+    :param nameFormat: string with one %d, 'inner_house%d'
+    :param count: int
+    :param start: int, first number tried
+    :return: list
+    '''
+    names = []
+    idx = start
+    while len(names) < count:
+        candidates = [nameFormat % i for i in range(idx, idx + count - len(names))]
+        idx += len(candidates)
+        taken = set(cmd.ls(candidates + [x + SHAPE_SUFFIX for x in candidates]) or [])
+        names.extend(x for x in candidates if x not in taken and x + SHAPE_SUFFIX not in taken)
+    return names
+
+
+def createLights(lightType, count, nameFormat='light%d', start=0, values=None, parent=None):
+    '''
+    Creates count lights of lightType named from nameFormat, linked to the default light set
+    :param lightType: string, 'pointLight', 'areaLight'...
+    :param count: int
+    :param nameFormat: string with one %d, numbers start at start and skip the names in use
+    :param values: list of dicts, attribute values of each light, {'translate': [0, 1, 0], 'intensity': 2}
+    :param parent: string, group the lights are created under
+    :return: OrderedDict, Key: light shape, Value: light transform, in creation order
+    :raises ValueError: lightType, nameFormat or parent could not go in the MEL batch as they are
+    '''
+    if count < 1:
+        return OrderedDict()
+    if not isIdentifier(lightType):
+        raise ValueError('Invalid light type %r' % (lightType,))
+    if not isinstance(nameFormat, STRING_TYPES) or nameFormat.count('%') != 1 or \
+            not isIdentifier(nameFormat.replace('%d', '0')):
+        raise ValueError('Invalid light names %r, letters, digits, _ and one %%d' % (nameFormat,))
+    if parent and not isNodeName(parent):
+        raise ValueError('Invalid parent %r' % (parent,))
+    names = reserveNames(nameFormat, count, start)
+    script = []
+    for i, name in enumerate(names):
+        shape = name + SHAPE_SUFFIX
+        if parent:
+            script.append('createNode transform -n "%s" -p "%s";' % (name, parent))
+        else:
+            script.append('createNode transform -n "%s";' % name)
+        script.append('createNode %s -n "%s" -p "%s";' % (lightType, shape, name))
+        for attr, value in sorted((values[i] if values else {}).items()):
+            if value is not None:
+                script.append(melSetAttr(name if attr in TRANSFORM_ATTRS else shape, attr, value))
+    script.append('sets -add %s %s;' % (LIGHT_SET, ' '.join('"%s"' % x for x in names)))
+    mel.eval(''.join(script))
+
+    shapes = cmd.listRelatives(names, shapes=True)
+    return OrderedDict(zip(shapes, names))
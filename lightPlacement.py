@@ -0,0 +1,340 @@
+'''
+Placement engine for the lights of a rig.
+
+Computes the translate and rotate of every light of a layout in one batch, from
+the positions of the two distance locators or from points sampled on a curve.
+Pure math: it runs without Maya, uses NumPy when it is available and falls back
+to plain python otherwise. Rotations are XYZ euler angles in degrees.
+
+Orientations:
+    along: +X follows the layout direction, as the aimConstraint of the 'Distance' placement did
+    facing: -Z, the direction lights shine, points to the center of the layout
+    down: -Z points down
+'''
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GOLDEN_ANGLE = math.pi * (3.0 - math.sqrt(5.0))
+
+
+class Layout(object):
+    '''
+    Translates and rotates of the lights of a layout, lists of [x, y, z]
+    '''
+    __slots__ = ('translates', 'rotates')
+
+    def __init__(self, translates, rotates):
+        self.translates = _toList(translates)
+        self.rotates = _toList(rotates)
+
+    def __len__(self):
+        return len(self.translates)
+
+    def __iter__(self):
+        return iter(zip(self.translates, self.rotates))
+
+
+def _toList(values):
+    if np is not None and isinstance(values, np.ndarray):
+        return values.tolist()
+    return [list(v) for v in values]
+
+
+def _eulerRows(r0, r1, r2):
+    '''
+    XYZ euler angles in degrees of the rotation matrix with rows r0, r1, r2
+    '''
+    cy = math.sqrt(r0[0] ** 2 + r0[1] ** 2)
+    if cy > 1e-6:
+        angles = (math.atan2(r1[2], r2[2]), math.atan2(-r0[2], cy), math.atan2(r0[1], r0[0]))
+    else:
+        angles = (math.atan2(r1[0] * -r0[2], r1[1]), math.atan2(-r0[2], cy), 0.0)
+    return [math.degrees(a) for a in angles]
+
+
+def _aimFrame(direction):
+    '''
+    Rows of the frame with +X along direction and +Y as close to world up as possible
+    '''
+    length = math.sqrt(sum(v * v for v in direction)) or 1.0
+    x = [v / length for v in direction]
+    z = [-x[2], 0.0, x[0]]
+    zLen = math.sqrt(z[0] ** 2 + z[2] ** 2)
+    z = [v / zLen for v in z] if zLen > 1e-9 else [0.0, 0.0, 1.0]
+    y = [z[1] * x[2] - z[2] * x[1], z[2] * x[0] - z[0] * x[2], z[0] * x[1] - z[1] * x[0]]
+    return x, y, z
+
+
+def aimRotations(directions, facing=False):
+    '''
+    Rotations pointing each light along its direction
+    :param directions: N x 3, aim vectors
+    :param facing: bool, -Z along the direction (aimConstraint with o=[0, 270, 0]), +X otherwise
+    :return: N x 3 rotations in degrees
+    '''
+    if np is not None:
+        return _eulerNumpy(*_aimRowsNumpy(np.asarray(directions, dtype=float).reshape(-1, 3), facing))
+    return [_eulerRows(*_aimRows(direction, facing)) for direction in directions]
+
+
+def _aimRows(direction, facing):
+    x, y, z = _aimFrame(direction)
+    return (z, y, [-v for v in x]) if facing else (x, y, z)
+
+
+def _aimRowsNumpy(directions, facing):
+    lengths = np.linalg.norm(directions, axis=1)
+    x = directions / np.where(lengths > 0, lengths, 1.0)[:, None]
+    z = np.stack([-x[:, 2], np.zeros(len(x)), x[:, 0]], axis=1)
+    zLen = np.linalg.norm(z, axis=1)
+    degenerate = zLen <= 1e-9
+    z = z / np.where(degenerate, 1.0, zLen)[:, None]
+    z[degenerate] = [0.0, 0.0, 1.0]
+    y = np.cross(z, x)
+    return (z, y, -x) if facing else (x, y, z)
+
+
+def aimAt(translates, target, parentMatrix=None):
+    '''
+    Rotations of lights aiming -Z at a target with world up +Y, the result of an
+    aimConstraint with o=[0, 270, 0] computed for all the lights in one pass
+    :param translates: N x 3, translates of the lights in the space of their parent
+    :param target: [x, y, z], world position
+    :param parentMatrix: flat world matrix (16 values) of the parent of the lights, the world if not given
+    :return: list of [x, y, z] rotations in degrees, in the space of the parent
+    '''
+    parent = _rows(parentMatrix) if parentMatrix else None
+    if parent is not None:
+        scale = [math.sqrt(sum(parent[i][j] ** 2 for j in range(3))) or 1.0 for i in range(3)]
+        #Rotation of the parent, its transpose brings world rows to the parent space
+        rotation = [[parent[i][j] / scale[i] for j in range(3)] for i in range(3)]
+
+    if np is not None:
+        points = np.asarray(translates, dtype=float).reshape(-1, 3)
+        if parent is not None:
+            points = np.dot(points, np.asarray(parent, dtype=float)[:3, :3]) + np.asarray(parent[3][:3], dtype=float)
+        rows = _aimRowsNumpy(np.asarray(target, dtype=float) - points, True)
+        if parent is not None:
+            inverse = np.asarray(rotation, dtype=float).T
+            rows = [np.dot(row, inverse) for row in rows]
+        return _toList(_eulerNumpy(*rows))
+
+    rotations = []
+    for point in translates:
+        if parent is not None:
+            point = [sum(point[k] * parent[k][j] for k in range(3)) + parent[3][j] for j in range(3)]
+        rows = _aimRows([t - p for p, t in zip(point, target)], True)
+        if parent is not None:
+            rows = [[sum(row[k] * rotation[j][k] for k in range(3)) for j in range(3)] for row in rows]
+        rotations.append(_eulerRows(*rows))
+    return rotations
+
+
+def _eulerNumpy(r0, r1, r2):
+    '''
+    Vectorized _eulerRows, each argument is the N x 3 array of one row of the N matrices
+    '''
+    cy = np.hypot(r0[:, 0], r0[:, 1])
+    regular = cy > 1e-6
+    rx = np.where(regular, np.arctan2(r1[:, 2], r2[:, 2]), np.arctan2(r1[:, 0] * -r0[:, 2], r1[:, 1]))
+    ry = np.arctan2(-r0[:, 2], cy)
+    rz = np.where(regular, np.arctan2(r0[:, 1], r0[:, 0]), 0.0)
+    return np.degrees(np.stack([rx, ry, rz], axis=1))
+
+
+def _facingCenter(translates, center):
+    if np is not None:
+        return aimRotations(np.asarray(center, dtype=float) - np.asarray(translates), facing=True)
+    return aimRotations([[c - t for t, c in zip(p, center)] for p in translates], facing=True)
+
+
+def line(start, end, count):
+    '''
+    Lights in a row from start, one every start-end distance, like the original 'Distance' placement
+    '''
+    direction = [b - a for a, b in zip(start, end)]
+    if np is not None:
+        translates = np.asarray(start, dtype=float) + np.arange(count)[:, None] * np.asarray(direction, dtype=float)
+    else:
+        translates = [[float(a) + i * d for a, d in zip(start, direction)] for i in range(count)]
+    return Layout(translates, aimRotations([direction] * count))
+
+
+def ring(center, edge, count):
+    '''
+    Lights on a horizontal circle around center going through edge, facing the center
+    '''
+    radius = math.sqrt((edge[0] - center[0]) ** 2 + (edge[2] - center[2]) ** 2) or \
+        math.sqrt(sum((b - a) ** 2 for a, b in zip(center, edge)))
+    offset = math.atan2(edge[2] - center[2], edge[0] - center[0])
+    if np is not None:
+        angles = offset + 2.0 * math.pi * np.arange(count) / count
+        translates = np.stack([center[0] + radius * np.cos(angles), np.full(count, float(edge[1])),
+                               center[2] + radius * np.sin(angles)], axis=1)
+    else:
+        translates = []
+        for i in range(count):
+            angle = offset + 2.0 * math.pi * i / count
+            translates.append([center[0] + radius * math.cos(angle), edge[1], center[2] + radius * math.sin(angle)])
+    return Layout(translates, _facingCenter(translates, [center[0], edge[1], center[2]]))
+
+
+def grid(start, end, count):
+    '''
+    Lights on a grid filling the rectangle between start and end, as square as possible, pointing down
+    '''
+    columns = int(math.ceil(math.sqrt(count)))
+    rows = int(math.ceil(float(count) / columns)) if count else 0
+    if np is not None:
+        idx = np.arange(count)
+        u = (idx % columns) / float(max(columns - 1, 1))
+        v = (idx // columns) / float(max(rows - 1, 1))
+        a, b = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+        translates = np.stack([a[0] + (b[0] - a[0]) * u, a[1] + (b[1] - a[1]) * v, a[2] + (b[2] - a[2]) * v], axis=1)
+    else:
+        translates = []
+        for i in range(count):
+            u = (i % columns) / float(max(columns - 1, 1))
+            v = (i // columns) / float(max(rows - 1, 1))
+            translates.append([start[0] + (end[0] - start[0]) * u, start[1] + (end[1] - start[1]) * v,
+                               start[2] + (end[2] - start[2]) * v])
+    return Layout(translates, [[-90.0, 0.0, 0.0]] * count)
+
+
+def sphere(center, edge, count, dome=False):
+    '''
+    Lights evenly spread on a Fibonacci sphere around center going through edge, facing the center
+    :param dome: bool, only the upper half of the sphere
+    '''
+    radius = math.sqrt(sum((b - a) ** 2 for a, b in zip(center, edge)))
+    span = 1.0 if dome else 2.0
+    if np is not None:
+        idx = np.arange(count)
+        y = 1.0 - span * (idx + 0.5) / count
+        ring_ = np.sqrt(np.clip(1.0 - y * y, 0.0, 1.0))
+        angles = idx * GOLDEN_ANGLE
+        unit = np.stack([np.cos(angles) * ring_, y, np.sin(angles) * ring_], axis=1)
+        translates = np.asarray(center, dtype=float) + radius * unit
+    else:
+        translates = []
+        for i in range(count):
+            y = 1.0 - span * (i + 0.5) / count
+            ring_ = math.sqrt(max(0.0, 1.0 - y * y))
+            angle = i * GOLDEN_ANGLE
+            unit = (math.cos(angle) * ring_, y, math.sin(angle) * ring_)
+            translates.append([c + radius * u for c, u in zip(center, unit)])
+    return Layout(translates, _facingCenter(translates, center))
+
+
+def dome(center, edge, count):
+    return sphere(center, edge, count, dome=True)
+
+
+def curve(points, count):
+    '''
+    Lights evenly spaced by arc length along a polyline, +X along the curve
+    :param points: M x 3, points sampled along the curve, in order
+    '''
+    if np is not None:
+        points = np.asarray(points, dtype=float)
+        segments = np.diff(points, axis=0)
+        lengths = np.concatenate([[0.0], np.cumsum(np.linalg.norm(segments, axis=1))])
+        targets = lengths[-1] * np.arange(count) / float(max(count - 1, 1))
+        translates = np.stack([np.interp(targets, lengths, points[:, axis]) for axis in range(3)], axis=1)
+        seg = np.clip(np.searchsorted(lengths, targets, side='right') - 1, 0, len(segments) - 1)
+        return Layout(translates, aimRotations(segments[seg]))
+
+    lengths = [0.0]
+    for a, b in zip(points[:-1], points[1:]):
+        lengths.append(lengths[-1] + math.sqrt(sum((q - p) ** 2 for p, q in zip(a, b))))
+    translates, directions = [], []
+    seg = 0
+    for i in range(count):
+        target = lengths[-1] * i / float(max(count - 1, 1))
+        while seg < len(points) - 2 and lengths[seg + 1] <= target:
+            seg += 1
+        a, b = points[seg], points[seg + 1]
+        span = lengths[seg + 1] - lengths[seg]
+        t = (target - lengths[seg]) / span if span else 0.0
+        translates.append([p + (q - p) * t for p, q in zip(a, b)])
+        directions.append([q - p for p, q in zip(a, b)])
+    return Layout(translates, aimRotations(directions))
+
+
+def _multMatrix(a, b):
+    return [[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+
+
+def _rows(matrix):
+    '''
+    4 x 4 nested list from a flat list of 16 values, as Maya returns matrices
+    '''
+    return [list(matrix[i * 4:i * 4 + 4]) for i in range(4)]
+
+
+def translateMatrix(x, y, z):
+    return [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, x, y, z, 1.0]
+
+
+#Offset of the 'Stick to Selected' lights in the space of their object
+STICK_OFFSET = translateMatrix(0.0, 0.0, -0.5)
+
+
+def stick(matrices, offset=None):
+    '''
+    Lights placed relative to objects, at offset * STICK_OFFSET * objectWorld with the
+    rotation of the object. Like parenting, setting the offset and unparenting, the object
+    scale moves the offset but the lights keep their own scale.
+    :param matrices: list of flat world matrices (16 values) of the objects, one per light
+    :param offset: flat matrix, extra offset in the object space
+    :return: Layout
+    '''
+    local = _rows(STICK_OFFSET) if offset is None else _multMatrix(_rows(offset), _rows(STICK_OFFSET))
+    if np is not None:
+        worlds = np.matmul(np.asarray(local, dtype=float), np.asarray(matrices, dtype=float).reshape(-1, 4, 4))
+        scales = np.linalg.norm(worlds[:, :3, :3], axis=2)
+        rows = worlds[:, :3, :3] / np.where(scales > 0, scales, 1.0)[:, :, None]
+        return Layout(worlds[:, 3, :3], _eulerNumpy(rows[:, 0], rows[:, 1], rows[:, 2]))
+
+    translates, rotates = [], []
+    for matrix in matrices:
+        world = _multMatrix(local, _rows(matrix))
+        scale = [math.sqrt(sum(world[i][j] ** 2 for j in range(3))) for i in range(3)]
+        rows = [[world[i][j] / scale[i] if scale[i] else 0.0 for j in range(3)] for i in range(3)]
+        translates.append(world[3][:3])
+        rotates.append(_eulerRows(*rows))
+    return Layout(translates, rotates)
+
+
+#Placement names of the UI and their layout, all but 'Curve' take the two distance locators
+LAYOUTS = {
+    'Distance': line,
+    'Ring': ring,
+    'Grid': grid,
+    'Sphere': sphere,
+    'Dome': dome,
+}
+
+
+def sampleCurve(curve, samplesPerSpan=16):
+    '''
+    World space points along a Maya nurbs curve, read through the API in a single pass
+    :param curve: string, curve transform or shape
+    :return: list of [x, y, z]
+    '''
+    import maya.api.OpenMaya as om
+
+    selection = om.MSelectionList()
+    selection.add(curve)
+    fn = om.MFnNurbsCurve(selection.getDagPath(0).extendToShape())
+    start, end = fn.knotDomain
+    samples = max(fn.numSpans * samplesPerSpan, 2)
+    points = []
+    for i in range(samples + 1):
+        point = fn.getPointAtParam(start + (end - start) * i / float(samples), om.MSpace.kWorld)
+        points.append([point.x, point.y, point.z])
+    return points
@@ -0,0 +1,207 @@
+'''
+Instrumentation of the Maya calls made by the tool.
+
+When enabled, the 'cmd' and 'mel' module globals of the lightRigger modules are
+swapped for proxies that time every call and file it under the UI action running
+at that moment ('createRig', 'slider drag on intensity'...). Disabling puts the
+real modules back, so a disabled profiler costs one flag check per UI action and
+nothing per Maya call.
+
+    import lightProfile
+    lightProfile.profiler.enable()
+    ...
+    lightProfile.profiler.dump('/tmp/lightRigger.json')
+'''
+import functools
+import json
+import sys
+from timeit import default_timer
+
+#Modules whose Maya calls are instrumented, the ones not imported yet are skipped
+MODULES = ['lightRigger', 'lightCore', 'lightBake', 'lightNodes', 'lightRegistry', 'lightSchema', 'lightState', 'lightModel', 'lightTransaction', 'lightRigIO']
+#Action of the calls made outside any UI action, scene callbacks, scripts...
+NO_ACTION = 'other'
+
+
+class _Instrumented(object):
+    '''
+    Proxy of maya.cmds or maya.mel, its functions are wrapped the first time they are used
+    '''
+
+    def __init__(self, module, prefix, profiler):
+        self._module = module
+        self._prefix = prefix
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if not callable(attr):
+            return attr
+        wrapped = self._profiler.wrap(self._prefix + name, attr)
+        setattr(self, name, wrapped)
+        return wrapped
+
+
+class _Action(object):
+    '''
+    Context of a UI action, only the outermost one names the calls
+    '''
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.profiler.actions.append(self.name)
+        if len(self.profiler.actions) == 1:
+            self.start = default_timer()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.profiler.actions.pop()
+        if self.start is not None:
+            self.profiler.recordAction(self.name, default_timer() - self.start)
+        return False
+
+
+class _NoAction(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+class Profiler(object):
+    '''
+    Counts and times the Maya calls per UI action
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self.actions = []
+        #Key: (action, command), Value: [calls, seconds]
+        self.calls = {}
+        #Key: action, Value: [runs, seconds]
+        self.actionTimes = {}
+        self.originals = {}
+        self.noAction = _NoAction()
+
+    def enable(self):
+        '''
+        Swaps the Maya modules of the loaded lightRigger modules for instrumented proxies
+        '''
+        if self.enabled:
+            return
+        for moduleName in MODULES:
+            module = sys.modules.get(moduleName)
+            if module is None:
+                continue
+            for attr, prefix in (('cmd', ''), ('mel', 'mel.')):
+                original = getattr(module, attr, None)
+                if original is not None:
+                    self.originals[(moduleName, attr)] = original
+                    setattr(module, attr, _Instrumented(original, prefix, self))
+        self.enabled = True
+
+    def disable(self):
+        '''
+        Puts the real Maya modules back
+        '''
+        for (moduleName, attr), original in self.originals.items():
+            setattr(sys.modules[moduleName], attr, original)
+        self.originals = {}
+        self.enabled = False
+
+    def reset(self):
+        self.calls = {}
+        self.actionTimes = {}
+
+    def wrap(self, name, func):
+        '''
+        Instrumented version of a Maya function
+        :param name: string, command name the calls are filed under
+        '''
+        profiler = self
+
+        def instrumented(*args, **kwargs):
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, default_timer() - start)
+        return instrumented
+
+    def record(self, command, seconds):
+        key = (self.actions[0] if self.actions else NO_ACTION, command)
+        entry = self.calls.get(key)
+        if entry is None:
+            self.calls[key] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def recordAction(self, action, seconds):
+        entry = self.actionTimes.setdefault(action, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def action(self, name):
+        '''
+        Context manager naming the calls made inside it, does nothing while disabled
+        :param name: string, 'createRig', 'slider drag on intensity'
+        '''
+        if not self.enabled:
+            return self.noAction
+        return _Action(self, name)
+
+    def rows(self):
+        '''
+        :return: list of (action, command, calls, seconds), slowest first
+        '''
+        rows = [(action, command, calls, seconds) for (action, command), (calls, seconds) in self.calls.items()]
+        return sorted(rows, key=lambda x: -x[3])
+
+    def report(self):
+        '''
+        :return: dict, per action its runs, wall time, and the calls and time of each command
+        '''
+        report = {}
+        for action, command, calls, seconds in self.rows():
+            entry = report.setdefault(action, {'runs': 0, 'seconds': 0.0, 'calls': 0, 'cmdSeconds': 0.0, 'commands': {}})
+            entry['commands'][command] = {'calls': calls, 'seconds': seconds}
+            entry['calls'] += calls
+            entry['cmdSeconds'] += seconds
+        for action, (runs, seconds) in self.actionTimes.items():
+            entry = report.setdefault(action, {'runs': 0, 'seconds': 0.0, 'calls': 0, 'cmdSeconds': 0.0, 'commands': {}})
+            entry['runs'] = runs
+            entry['seconds'] = seconds
+        return report
+
+    def dump(self, path):
+        '''
+        Writes the report to a JSON file
+        '''
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+
+profiler = Profiler()
+
+
+def profiled(name):
+    '''
+    Decorator running a method as a UI action of the profiler
+    :param name: string, action name
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.action(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
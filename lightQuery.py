@@ -0,0 +1,434 @@
+'''
+Finds lights across rigs by attribute value.
+
+    import lightCore
+    lightCore.findLights('intensity > 50 and type == spotLight')
+
+A query compares fields with values, joined by and, or, not and parentheses:
+    intensity > 50 and (type == spotLight or type == areaLight)
+    coneAngle >= 60 and not rig == key*
+    colorR < 0.5 or name == "*_rim*"
+Fields are light attributes, one channel of the compound ones (colorR, translateY), or
+    type: node type of the light
+    rig: rig name
+    name: light transform or shape
+type, rig, name and text attributes take == and != with * and ? globs, true and false
+are 1 and 0. A light whose type has no such attribute never matches a comparison on it.
+
+A LightIndex holds the lightModel.RigModel of every rig and answers from a snapshot
+of their columns: the values of an attribute for all the lights in one array (NumPy
+when available) with a sorted order, so ranges and equalities are binary searches
+and node types are looked up in a hash index. Values come from the model caches,
+the scene is only read for the values never loaded. The snapshot of a rig is taken
+again when its model is replaced or the version of its column moves, so edits made
+through the mirrors (lightState) only refresh the rigs they touched.
+'''
+import bisect
+import fnmatch
+import re
+from collections import OrderedDict
+
+from lightNodes import STRING_TYPES, TRANSFORM_ATTRS
+from lightSchema import schema
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#Fields that are not attributes
+FIELDS = ['type', 'rig', 'name']
+OPERATORS = ['==', '!=', '<', '<=', '>', '>=']
+#Channel suffixes of compound attributes, colorR is the first value of color
+CHANNELS = {'R': 0, 'G': 1, 'B': 2, 'X': 0, 'Y': 1, 'Z': 2}
+#Relative difference under which numbers are equal
+TOLERANCE = 1e-6
+_TOKENS = re.compile(r'''\s*(?:(?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?![^\s()=!<>"'])|'''
+                     r'''(?P<op>==|!=|<=|>=|<|>|=)|(?P<paren>[()])|(?P<string>"[^"]*"|'[^']*')|'''
+                     r'''(?P<word>[^\s()=!<>"']+))''')
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKENS.match(text, pos)
+        if match is None:
+            raise ValueError('Cannot read the query at "%s"' % text[pos:].strip())
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+def _keyword(tokens, pos, word):
+    return pos < len(tokens) and tokens[pos][0] == 'word' and tokens[pos][1].lower() == word
+
+
+def _token(tokens, pos):
+    if pos >= len(tokens):
+        raise ValueError('The query ends too early')
+    return tokens[pos]
+
+
+def _parseOr(tokens, pos):
+    tree, pos = _parseAnd(tokens, pos)
+    while _keyword(tokens, pos, 'or'):
+        right, pos = _parseAnd(tokens, pos + 1)
+        tree = ('or', tree, right)
+    return tree, pos
+
+
+def _parseAnd(tokens, pos):
+    tree, pos = _parseNot(tokens, pos)
+    while _keyword(tokens, pos, 'and'):
+        right, pos = _parseNot(tokens, pos + 1)
+        tree = ('and', tree, right)
+    return tree, pos
+
+
+def _parseNot(tokens, pos):
+    if _keyword(tokens, pos, 'not'):
+        tree, pos = _parseNot(tokens, pos + 1)
+        return ('not', tree), pos
+    kind, text = _token(tokens, pos)
+    if kind == 'paren' and text == '(':
+        tree, pos = _parseOr(tokens, pos + 1)
+        if _token(tokens, pos) != ('paren', ')'):
+            raise ValueError('Missing ) in the query')
+        return tree, pos + 1
+    if kind != 'word' or text.lower() in ('and', 'or', 'not'):
+        raise ValueError('Expected a field instead of %s' % text)
+    kind, operator = _token(tokens, pos + 1)
+    if kind != 'op':
+        raise ValueError('Expected one of %s after %s' % (' '.join(OPERATORS), text))
+    kind, value = _token(tokens, pos + 2)
+    if kind == 'number':
+        value = float(value)
+    elif kind == 'string':
+        value = value[1:-1]
+    elif kind == 'word' and value.lower() in ('true', 'false'):
+        value = 1.0 if value.lower() == 'true' else 0.0
+    elif kind != 'word':
+        raise ValueError('Expected a value after %s %s' % (text, operator))
+    return ('cmp', text, '==' if operator == '=' else operator, value), pos + 3
+
+
+def parse(text):
+    '''
+    Syntax tree of a query
+    :param text: string, see the module docstring
+    :return: tuple, ('or', a, b), ('and', a, b), ('not', a) or ('cmp', field, operator, value)
+    '''
+    tokens = _tokenize(text)
+    if not tokens:
+        raise ValueError('The query is empty')
+    tree, pos = _parseOr(tokens, 0)
+    if pos < len(tokens):
+        raise ValueError('Unexpected %s in the query' % tokens[pos][1])
+    return tree
+
+
+def _glob(pattern):
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+class _Layout(object):
+    '''
+    Rows of every rig one after the other, rebuilt when rigs or their lights change
+    '''
+
+    def __init__(self, models):
+        self.rigs = list(models)
+        self.lengths = [len(x) for x in models.values()]
+        self.offsets = [0]
+        for length in self.lengths:
+            self.offsets.append(self.offsets[-1] + length)
+        self.count = self.offsets[-1]
+        #Key: node type, Value: rows, filled on the first type query
+        self.types = None
+        self.names = None
+
+    def byType(self, models):
+        if self.types is None:
+            self.types = {}
+            for rig, offset in zip(self.rigs, self.offsets):
+                model = models[rig]
+                for row in range(len(model)):
+                    self.types.setdefault(model.lightType(row), []).append(offset + row)
+        return self.types
+
+    def lightNames(self, models):
+        #Shape and transform of every row
+        if self.names is None:
+            self.names = ([], [])
+            for rig in self.rigs:
+                self.names[0].extend(models[rig].shapes)
+                self.names[1].extend(models[rig].transforms)
+        return self.names
+
+
+class _Snapshot(object):
+    '''
+    Values of one attribute (or one channel of it) for every row, with their sorted order
+    '''
+
+    def __init__(self, attr):
+        self.attr = attr
+        #Key: rig, Value: [attribute, column, length, values, version]
+        self.segments = {}
+        self.values = None
+        #True if some light has the attribute, and if it holds text
+        self.found = False
+        self.text = False
+        self.order = None
+        self.sorted = None
+
+
+class LightIndex(object):
+    '''
+    Queryable snapshot of the lights of several rigs, see the module docstring
+    '''
+
+    def __init__(self, models=None):
+        '''
+        :param models: dict or list of pairs, rig group and its lightModel.RigModel
+        '''
+        #Key: rig group, Value: lightModel.RigModel
+        self.models = OrderedDict()
+        #Key: query field, Value: _Snapshot
+        self.snapshots = {}
+        self._layout = None
+        for rig, model in (models.items() if hasattr(models, 'items') else models or []):
+            self.setRig(rig, model)
+
+    def setRig(self, rig, model):
+        '''
+        Adds a rig or replaces its model, its lights are read again on the next query
+        '''
+        self.models[rig] = model
+        self._forget(rig)
+
+    def removeRig(self, rig):
+        if self.models.pop(rig, None) is not None:
+            self._forget(rig)
+
+    def clear(self):
+        self.models = OrderedDict()
+        self.snapshots = {}
+        self._layout = None
+
+    def _forget(self, rig):
+        self._layout = None
+        for snapshot in self.snapshots.values():
+            snapshot.segments.pop(rig, None)
+            snapshot.values = None
+
+    def layout(self):
+        if self._layout is None or self._layout.lengths != [len(x) for x in self.models.values()]:
+            self._layout = _Layout(self.models)
+        return self._layout
+
+    def __len__(self):
+        return self.layout().count
+
+    #Queries
+
+    def query(self, text):
+        '''
+        Lights matching a query
+        :param text: string, see the module docstring
+        :return: OrderedDict, Key: rig group, Value: list of light shapes, only rigs with matches
+        '''
+        layout = self.layout()
+        matched = self._evaluate(parse(text), layout)
+        rows = np.nonzero(matched)[0].tolist() if np is not None else sorted(matched)
+        result = OrderedDict()
+        rigIndex = 0
+        for row in rows:
+            while row >= layout.offsets[rigIndex + 1]:
+                rigIndex += 1
+            rig = layout.rigs[rigIndex]
+            result.setdefault(rig, []).append(self.models[rig].shapes[row - layout.offsets[rigIndex]])
+        return result
+
+    def _evaluate(self, tree, layout):
+        #Matches as a NumPy mask, or a set of rows without NumPy
+        if tree[0] == 'and':
+            return self._evaluate(tree[1], layout) & self._evaluate(tree[2], layout)
+        if tree[0] == 'or':
+            return self._evaluate(tree[1], layout) | self._evaluate(tree[2], layout)
+        if tree[0] == 'not':
+            matched = self._evaluate(tree[1], layout)
+            return ~matched if np is not None else set(range(layout.count)) - matched
+        return self._rows(self._compare(tree[1], tree[2], tree[3], layout), layout.count)
+
+    @staticmethod
+    def _rows(rows, count):
+        if np is None:
+            return set(rows)
+        mask = np.zeros(count, dtype=bool)
+        mask[np.asarray(rows, dtype=np.int64)] = True
+        return mask
+
+    def _compare(self, field, operator, value, layout):
+        '''
+        Rows where field operator value holds
+        :return: list or NumPy array of rows
+        '''
+        if field in FIELDS:
+            return self._compareField(field, operator, value, layout)
+        snapshot = self.snapshot(field, layout)
+        if not snapshot.found:
+            raise ValueError('No light has %s' % field)
+        if snapshot.text:
+            if operator not in ('==', '!='):
+                raise ValueError('%s is text, it only takes == and !=' % field)
+            match = _glob(value if isinstance(value, STRING_TYPES) else '%g' % value)
+            if operator == '==':
+                return [row for row, x in enumerate(snapshot.values) if x is not None and match(str(x))]
+            return [row for row, x in enumerate(snapshot.values) if x is not None and not match(str(x))]
+        if isinstance(value, STRING_TYPES):
+            raise ValueError('%s takes numbers, not %s' % (field, value))
+        order, values = self._sorted(snapshot)
+        #Float attributes come back in single precision, 0.1 is 0.10000000149
+        tolerance = TOLERANCE * max(1.0, abs(value))
+        if np is not None:
+            left, right = np.searchsorted(values, value - tolerance, 'left'), np.searchsorted(values, value + tolerance, 'right')
+        else:
+            left, right = bisect.bisect_left(values, value - tolerance), bisect.bisect_right(values, value + tolerance)
+        if operator == '==':
+            return order[left:right]
+        if operator == '!=':
+            return np.concatenate([order[:left], order[right:]]) if np is not None else order[:left] + order[right:]
+        if operator == '<':
+            return order[:left]
+        if operator == '<=':
+            return order[:right]
+        if operator == '>':
+            return order[right:]
+        return order[left:]
+
+    def _compareField(self, field, operator, value, layout):
+        if operator not in ('==', '!='):
+            raise ValueError('%s only takes == and !=' % field)
+        match = _glob(value if isinstance(value, STRING_TYPES) else '%g' % value)
+        if field == 'type':
+            rows = []
+            for lightType, typeRows in layout.byType(self.models).items():
+                if match(lightType):
+                    rows.extend(typeRows)
+        elif field == 'rig':
+            rows = []
+            for rig, offset, length in zip(layout.rigs, layout.offsets, layout.lengths):
+                if match(self.models[rig].name or rig) or match(rig):
+                    rows.extend(range(offset, offset + length))
+        else:
+            shapes, transforms = layout.lightNames(self.models)
+            rows = [row for row, names in enumerate(zip(shapes, transforms))
+                    if match(names[0]) or (names[1] and match(names[1]))]
+        if operator == '!=':
+            excluded = set(rows)
+            rows = [row for row in range(layout.count) if row not in excluded]
+        return rows
+
+    #Snapshots
+
+    def _sorted(self, snapshot):
+        #Order of the rows holding a value by value, and the values in that order
+        if snapshot.order is None:
+            if np is not None:
+                order = np.argsort(snapshot.values, kind='mergesort')
+                #NaN, the lights without the attribute, sort last
+                order = order[:int(np.count_nonzero(~np.isnan(snapshot.values)))]
+                snapshot.order, snapshot.sorted = order, snapshot.values[order]
+            else:
+                pairs = sorted((x, row) for row, x in enumerate(snapshot.values) if x is not None)
+                snapshot.order, snapshot.sorted = [x[1] for x in pairs], [x[0] for x in pairs]
+        return snapshot.order, snapshot.sorted
+
+    def snapshot(self, field, layout=None):
+        '''
+        Values of an attribute for every row, the rigs whose column changed are read again
+        :param field: string, attribute or channel of a compound attribute, colorR
+        :return: _Snapshot
+        '''
+        layout = layout or self.layout()
+        snapshot = self.snapshots.get(field)
+        if snapshot is None:
+            snapshot = self.snapshots[field] = _Snapshot(field)
+        stale = snapshot.values is None
+        for rig in layout.rigs:
+            stale = self._segment(snapshot, rig, self.models[rig]) or stale
+        if stale:
+            segments = [snapshot.segments[rig] for rig in layout.rigs]
+            snapshot.found = any(x[1] is not None for x in segments)
+            snapshot.text = any(x[1] is not None and not x[1].kind for x in segments)
+            if np is not None and not snapshot.text:
+                snapshot.values = np.concatenate([x[3] for x in segments]) if segments else np.zeros(0)
+            else:
+                snapshot.values = []
+                for segment in segments:
+                    values = segment[3]
+                    snapshot.values.extend(values if isinstance(values, list) else
+                                           [None if x != x else x for x in values.tolist()])
+            snapshot.order = snapshot.sorted = None
+        return snapshot
+
+    def _resolve(self, field, model, row):
+        #Column attribute and channel of a field for the type of a row, None if it does not have it
+        lightType, shape = model.lightType(row), model.shapes[row]
+        if field in TRANSFORM_ATTRS or schema.exists(lightType, field, shape):
+            return field, None
+        parent = field[:-1]
+        if field[-1:] in CHANNELS and (parent in TRANSFORM_ATTRS or (schema.exists(lightType, parent, shape) and
+                                       str(schema.info(lightType, parent, shape).type).endswith('3'))):
+            return parent, CHANNELS[field[-1]]
+        return None
+
+    def _segment(self, snapshot, rig, model):
+        '''
+        Takes the values of a rig again if its column changed since the last snapshot
+        :return: bool, True if it did
+        '''
+        segment = snapshot.segments.get(rig)
+        if segment is not None:
+            column = model.columns.get(segment[0]) if segment[0] else None
+            if segment[2] == len(model) and (column is segment[1] and
+                                             (column is None or column.version == segment[4])):
+                return False
+
+        #Rows whose node type has the field, schemas are looked up once per type
+        byType = {}
+        rows = []
+        attr = channel = None
+        for row in range(len(model)):
+            lightType = model.lightType(row)
+            if lightType not in byType:
+                byType[lightType] = self._resolve(snapshot.attr, model, row)
+            if byType[lightType] is not None:
+                rows.append(row)
+                attr, channel = byType[lightType]
+
+        column = model.load(attr, rows) if rows else None
+        if column is not None and column.width > 1 and channel is None:
+            raise ValueError('%s holds %d values, query one channel of it (colorR, translateX...)' % (
+                snapshot.attr, column.width))
+        channel = channel or 0
+        if column is None:
+            values = np.full(len(model), np.nan) if np is not None else [None] * len(model)
+        elif not column.kind:
+            values = [None] * len(model)
+            for row in rows:
+                values[row] = column.data[row]
+        elif np is not None:
+            values = np.full(len(model), np.nan)
+            if rows:
+                index = np.asarray(rows)
+                values[index] = np.frombuffer(column.data, dtype=float).reshape(-1, column.width)[index, channel]
+        else:
+            values = [None] * len(model)
+            for row in rows:
+                values[row] = column.data[row * column.width + channel]
+        snapshot.segments[rig] = [attr, column, len(model), values, column.version if column is not None else 0]
+        return True
@@ -0,0 +1,129 @@
+'''
+Registry of the light rigs in the scene.
+
+Every rig group is connected through its message attribute to the multi
+attribute 'rigs' of a network node, so finding all the rigs is one
+listConnections call per registry regardless of the scene size, and renaming a
+group keeps it registered. Rig groups also carry their rig name, which stays
+right when the group is renamed.
+
+Registries are found by type and attribute, not by name: referenced files bring
+theirs ('ns:lightRigRegistry') and imported ones are renamed ('lightRigRegistry1'),
+the rigs of the scene are the union of all of them. New rigs go to the first
+registry of the scene itself, outside of any namespace.
+
+Scenes without a registry of their own get a one-time scan that registers the
+groups named '<name>_lgtRig', in every namespace.
+'''
+from maya import cmds as cmd
+
+REGISTRY = 'lightRigRegistry'
+SUFFIX = '_lgtRig'
+NAME_ATTR = 'lightRigName'
+
+
+def rigGroupName(name):
+    return name + SUFFIX
+
+
+def rigName(rig):
+    '''
+    Rig name of a group, its name tag when it has one, otherwise from the group name 'inner_house_lgtRig' -> 'inner_house'
+    '''
+    plug = '%s.%s' % (rig, NAME_ATTR)
+    if cmd.objExists(plug):
+        name = cmd.getAttr(plug)
+        if name:
+            return name
+    return rig[:-len(SUFFIX)] if rig.endswith(SUFFIX) else rig
+
+
+def registries():
+    '''
+    Every registry node of the scene, referenced and imported ones included
+    :return: list
+    '''
+    return [x for x in cmd.ls(type='network') or [] if cmd.attributeQuery('rigs', node=x, exists=True)]
+
+
+def registry(create=True):
+    '''
+    Registry node new rigs are connected to, the first one outside of a namespace, created if needed
+    :param create: bool, returns None instead of creating it
+    :return: string
+    '''
+    for node in registries():
+        if ':' not in node:
+            return node
+    if not create:
+        return None
+    node = cmd.createNode('network', n=REGISTRY)
+    cmd.addAttr(node, ln='rigs', at='message', multi=True)
+    return node
+
+
+def register(rig, name=None):
+    '''
+    Tags a rig group with its name and connects it to the registry
+    :param rig: string, rig group
+    :param name: string, rig name, taken from the group name if not given
+    '''
+    node = registry()
+    name = name or rigName(rig)
+    if not cmd.objExists('%s.%s' % (rig, NAME_ATTR)):
+        cmd.addAttr(rig, ln=NAME_ATTR, dt='string')
+    cmd.setAttr('%s.%s' % (rig, NAME_ATTR), name, type='string')
+    cmd.connectAttr('%s.message' % rig, '%s.rigs' % node, nextAvailable=True)
+
+
+def unregister(rig):
+    '''
+    Disconnects a rig group from the registry and removes its name tag
+    :param rig: string, rig group
+    '''
+    if cmd.objExists('%s.%s' % (rig, NAME_ATTR)):
+        cmd.deleteAttr('%s.%s' % (rig, NAME_ATTR))
+    nodes = registries()
+    plugs = cmd.listConnections('%s.message' % rig, d=True, s=False, p=True) or []
+    for plug in plugs:
+        node, _, attr = plug.partition('.')
+        if node in nodes and attr.startswith('rigs['):
+            cmd.disconnectAttr('%s.message' % rig, plug)
+
+
+def isRig(node):
+    '''
+    True if the node is a registered rig group
+    '''
+    return cmd.objExists('%s.%s' % (node, NAME_ATTR))
+
+
+def rigs():
+    '''
+    Registered rig groups of every registry, the first call on a scene without a registry
+    of its own migrates legacy rigs
+    :return: list
+    '''
+    if not registry(create=False):
+        migrate()
+    found = []
+    for node in registries():
+        for rig in cmd.listConnections('%s.rigs' % node, s=True, d=False) or []:
+            if rig not in found:
+                found.append(rig)
+    return found
+
+
+def migrate():
+    '''
+    Registers the groups named '<name>_lgtRig' made before the registry existed, in every namespace.
+    Scans every transform, it only runs when the scene has no registry of its own yet.
+    :return: list, the rig groups registered
+    '''
+    registry()
+    legacy = []
+    for rig in cmd.ls('*' + SUFFIX, type='transform', recursive=True) or []:
+        if rig not in legacy and not isRig(rig):
+            register(rig)
+            legacy.append(rig)
+    return legacy
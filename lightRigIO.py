@@ -0,0 +1,226 @@
+'''
+Export and import of light rigs, to share them between shots.
+
+Format (version 1): JSON lines, gzip compressed when the file name ends in
+'.gz'. The first line is the header:
+    {"format": "lightRig", "version": 1, "name": "inner_house", "lightType": "pointLight",
+     "count": 3, "columns": ["type", "translate", "rotate", "scale", "intensity", ...],
+     "userAttrs": {"flicker": "double"}, "matrix": [1, 0, 0, 0, ..., 1],
+     "aim": {"on": true, "translate": [0, 5, 0], "mode": "bake"}}
+and every following line is one light, a list of values in the order of "columns"
+(null when the light has no such attribute). "userAttrs" are the columns added
+to the lights by hand with their attribute type, they are added again on import.
+"matrix" is the transform of the rig group. "mode" of "aim" is missing in files
+saved before the aim modes, they were 'constraint'; "userAttrs" and "matrix"
+are missing in files saved before them.
+
+Both ways are streamed: export writes each light as it is read, import reads and
+creates the lights in chunks, each chunk is a single MEL batch with the
+attribute values in it, under a '<name>_lgtRig' group registered as a rig.
+'''
+import gzip
+import io
+import json
+from collections import OrderedDict
+from itertools import islice
+
+from maya import cmds as cmd
+
+import lightCore
+import lightNodes
+import lightRegistry
+import lightTransaction
+from lightSchema import schema
+
+FORMAT = 'lightRig'
+VERSION = 1
+TRANSFORM_COLUMNS = ['translate', 'rotate', 'scale']
+#Attributes the RigWidget edits, exported when the lights have them
+EXPORT_ATTRS = ['intensity', 'color', 'coneAngle', 'penumbraAngle', 'dropoff', 'aiExposure', 'aiSamples', 'aiRadius']
+#Types of the user attributes carried by the files, anything else is not exported
+USER_ATTR_TYPES = ['double', 'float', 'long', 'short', 'byte', 'bool']
+CHUNK_SIZE = 500
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'), encoding='utf-8')
+    return io.open(path, mode, encoding='utf-8')
+
+
+def exportRig(rig, path, attrs=None):
+    '''
+    Writes a rig to a file, light by light
+    :param rig: string, rig group
+    :param path: string, '.gz' compresses it
+    :param attrs: list, light attributes to save, EXPORT_ATTRS by default, the ones edited in a RigWidget
+        with their custom attributes usually
+    :return: int, number of lights written
+    '''
+    name = lightRegistry.rigName(rig)
+    attrs = [x for x in OrderedDict.fromkeys(attrs or EXPORT_ATTRS) if x not in TRANSFORM_COLUMNS]
+    model = lightCore.rigInfo(rig)
+    shapes, transforms = model.keys(), model.values()
+    types = [model.lightType(row) for row in range(len(model))]
+    userAttrs = _userAttrs(attrs, shapes, types)
+    attrs = [x for x in attrs if x in userAttrs or any(cmd.attributeQuery(x, type=t, exists=True) for t in set(types))]
+
+    locator = lightCore.aimLocator(name)
+    aim = {'on': False, 'translate': None}
+    if cmd.objExists(locator):
+        aim = {'on': True, 'translate': lightNodes.plainValue(cmd.getAttr('%s.translate' % locator)), 'mode': lightCore.aimMode(name)}
+
+    header = {'format': FORMAT, 'version': VERSION, 'name': name, 'count': len(shapes),
+              'lightType': types[0] if len(set(types)) == 1 else '',
+              'columns': ['type'] + TRANSFORM_COLUMNS + attrs, 'userAttrs': userAttrs,
+              'matrix': cmd.xform(rig, q=True, m=True), 'aim': aim}
+    with _open(path, 'w') as f:
+        f.write(u'%s\n' % json.dumps(header, sort_keys=True))
+        for transform, shape, lightType in zip(transforms, shapes, types):
+            row = [lightType]
+            row.extend(lightNodes.plainValue(cmd.getAttr('%s.%s' % (transform, x))) for x in TRANSFORM_COLUMNS)
+            for attr in attrs:
+                exists = schema.exists(lightType, attr, shape)
+                row.append(lightNodes.plainValue(cmd.getAttr('%s.%s' % (shape, attr))) if exists else None)
+            f.write(u'%s\n' % json.dumps(row, separators=(',', ':')))
+    return len(shapes)
+
+
+def _userAttrs(attrs, shapes, types):
+    '''
+    Attributes the light types do not have, added to some of the lights by hand
+    :return: dict, Key: attribute, Value: attribute type, only the types in USER_ATTR_TYPES
+    '''
+    userAttrs = {}
+    lightTypes = set(types)
+    for attr in attrs:
+        if any(cmd.attributeQuery(attr, type=x, exists=True) for x in lightTypes):
+            continue
+        shape = next((x for x in shapes if cmd.objExists('%s.%s' % (x, attr))), None)
+        if shape is None:
+            continue
+        attrType = cmd.attributeQuery(attr, node=shape, attributeType=True)
+        if attrType in USER_ATTR_TYPES:
+            userAttrs[attr] = attrType
+        else:
+            cmd.warning('%s is a %s attribute, it is not exported' % (attr, attrType))
+    return userAttrs
+
+
+def _checkHeader(path, header):
+    #Names, attributes and types of the file end up in MEL, anything but plain identifiers is refused
+    if header.get('format') != FORMAT:
+        raise ValueError('%s is not a light rig file' % path)
+    if header.get('version', 0) > VERSION:
+        raise ValueError('%s was saved by a newer version (%s)' % (path, header['version']))
+    if not lightNodes.isIdentifier(header.get('name')):
+        raise ValueError('%s has an invalid rig name %r' % (path, header.get('name')))
+    columns = header.get('columns')
+    if not isinstance(columns, list) or 'type' not in columns:
+        raise ValueError('%s has no light columns' % path)
+    for column in columns:
+        if not lightNodes.isIdentifier(column):
+            raise ValueError('%s has an invalid attribute %r' % (path, column))
+    if header.get('lightType') and header['lightType'] not in lightCore.LIGHT_TYPES:
+        raise ValueError('%s has an unknown light type %r' % (path, header['lightType']))
+    for attr, attrType in (header.get('userAttrs') or {}).items():
+        if attr not in columns or attrType not in USER_ATTR_TYPES:
+            raise ValueError('%s has an invalid user attribute %r' % (path, attr))
+    matrix = header.get('matrix')
+    if matrix is not None and (not isinstance(matrix, list) or len(matrix) != 16 or
+                               not all(isinstance(x, (int, float)) for x in matrix)):
+        raise ValueError('%s has an invalid rig matrix' % path)
+
+
+def readRig(path):
+    '''
+    Opens a rig file
+    :return: (header, lights), lights is a generator of {column: value} dicts, one per light
+    :raises ValueError: the header is not one this version reads, or a light has a type that is not in
+        lightCore.LIGHT_TYPES when it is read
+    '''
+    f = _open(path, 'r')
+    try:
+        header = json.loads(f.readline())
+        _checkHeader(path, header)
+    except ValueError:
+        f.close()
+        raise
+
+    def lights():
+        with f:
+            for line in f:
+                if line.strip():
+                    light = dict(zip(header['columns'], json.loads(line)))
+                    if light.get('type') not in lightCore.LIGHT_TYPES:
+                        raise ValueError('%s has an unknown light type %r' % (path, light.get('type')))
+                    yield light
+    return header, lights()
+
+
+def _setUserAttrs(transaction, userAttrs, shapes, values):
+    '''
+    Adds the user attributes to the lights that had them and queues their values
+    :param userAttrs: dict, Key: attribute, Value: attribute type
+    :param values: list of dicts, the user attribute values of each shape, None where it had none
+    '''
+    for attr, attrType in sorted(userAttrs.items()):
+        having = [(shape, light[attr]) for shape, light in zip(shapes, values) if light[attr] is not None]
+        if not having:
+            continue
+        cmd.addAttr([x for x, _ in having], ln=attr, at=attrType, keyable=True)
+        for shape, value in having:
+            transaction.setAttr('%s.%s' % (shape, attr), value)
+
+
+def importRig(path, name=None, chunkSize=CHUNK_SIZE):
+    '''
+    Rebuilds a rig from a file under '<name>_lgtRig'
+    :param path: string
+    :param name: string, rig name, the saved one by default
+    :param chunkSize: int, lights read and created per batch
+    :return: string, rig group, None if the name is in use
+    :raises ValueError: the file is not a rig file this version reads or the name is not a Maya identifier,
+        before anything is created, or a light of the file has an unknown type, the import is undone
+    '''
+    header, lights = readRig(path)
+    name = name or header['name']
+    if not lightNodes.isIdentifier(name):
+        lights.close()
+        raise ValueError('Invalid rig name %r' % (name,))
+    rig = lightRegistry.rigGroupName(name)
+    if cmd.objExists(rig):
+        cmd.warning('Name already exists')
+        lights.close()
+        return None
+
+    userAttrs = header.get('userAttrs') or {}
+    #The file is checked by readRig before anything is created, one undo chunk from here
+    with lightTransaction.transaction('lightRigger importRig') as transaction:
+        rig = cmd.group(em=True, n=rig)
+        if header.get('matrix'):
+            cmd.xform(rig, m=header['matrix'])
+        transforms = []
+        start = 0
+        while True:
+            chunk = list(islice(lights, chunkSize))
+            if not chunk:
+                break
+            #Lights of a chunk are created per type, each type in one batch
+            byType = {}
+            for light in chunk:
+                byType.setdefault(light.pop('type'), []).append(light)
+            for lightType, values in byType.items():
+                #User attributes do not exist on the new lights, they are added and set after the batch
+                extra = [dict((x, light.pop(x, None)) for x in userAttrs) for light in values]
+                id = lightNodes.createLights(lightType, len(values), name + '%d', start, values, rig)
+                _setUserAttrs(transaction, userAttrs, list(id.keys()), extra)
+                transforms.extend(id.values())
+                start += len(values)
+        lightRegistry.register(rig, name)
+
+        aim = header.get('aim') or {}
+        if aim.get('on') and transforms:
+            lightCore.setAim(name, dict(zip(transforms, transforms)), True, aim.get('translate'),
+                             aim.get('mode', 'constraint'))
+    return rig
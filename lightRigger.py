@@ -1,10 +1,25 @@
 from Qt import QtWidgets, QtCore, QtGui
 from maya import cmds as cmd
-from maya import OpenMayaUI as omui
-from shiboken2 import wrapInstance
+from collections import OrderedDict
+
+import lightBake
+import lightCore
+import lightEvents
+import lightGradient
+import lightModel
+import lightPlacement
+import lightProfile
+import lightQuery
+import lightRegistry
+import lightRigIO
+import lightState
+import lightTransaction
+from lightSchema import schema
 
 
 def getMayaMainWindow():
+    from maya import OpenMayaUI as omui
+    from shiboken2 import wrapInstance
     win = omui.MQtUtil_mainWindow()
     ptr = wrapInstance(long(win), QtWidgets.QMainWindow)
     return ptr
@@ -12,6 +27,8 @@ def getMayaMainWindow():
 
 def getDock(name='LightRiggerDock'):
     deleteDock(name)
+    from maya import OpenMayaUI as omui
+    from shiboken2 import wrapInstance
     ctrl = cmd.workspaceControl(name, dockToMainWindow=('right', 1), label='Light Rigger')
     qtCtrl = omui.MQtUtil_findControl(ctrl)
     ptr = wrapInstance(long(qtCtrl), QtWidgets.QWidget)
@@ -23,10 +40,16 @@ def deleteDock(name='LightRiggerDock'):
 
 
 class LightRigger(QtWidgets.QWidget):
-    lightTypes = ['pointLight', 'spotLight', 'directionalLight', 'areaLight', 'volumeLight']
+    lightTypes = lightCore.LIGHT_TYPES
     distanceLocators = ['lightRigLocator_A', 'lightRigLocator_B']
+    #Extra offset matrix (16 values) of 'Stick to Selected' lights in the space of their object
+    stickOffset = None
 
-    def __init__(self, dock=True):
+    def __init__(self, dock=True, watcher=None):
+        '''
+        :param dock: bool, docks the tool instead of opening a window
+        :param watcher: lightEvents.SceneWatcher, defaults to watching the Maya scene
+        '''
         if dock:
             parent = getDock()
         else:
@@ -43,6 +66,7 @@ class LightRigger(QtWidgets.QWidget):
 
         self.buildUI()
         self.populate()
+        self.watchScene(watcher or lightEvents.MayaSceneWatcher())
         self.parent().layout().addWidget(self)
         if not dock:
             parent.show()
@@ -83,9 +107,11 @@ class LightRigger(QtWidgets.QWidget):
         placementLabel.setText('Placement')
         mainLayout.addWidget(placementLabel, 2, 0)
         self.placement = QtWidgets.QComboBox()
-        self.placement.addItems(['Stick to Selected', 'Distance'])
-        self.placement.currentIndexChanged.connect(self.position)
-        self.placement.setToolTip('Two locators are created, position them to get the desired distance')
+        self.placement.addItems(['Stick to Selected', 'Distance', 'Ring', 'Grid', 'Sphere', 'Dome', 'Curve'])
+        self.placement.currentIndexChanged.connect(lambda: self.position())
+        self.placement.setToolTip('Distance, Ring, Grid, Sphere and Dome create two locators, position them to get the desired distance\n'
+                                  'Ring, Sphere, Dome: A is the center, B is on the edge. Grid: A and B are opposite corners\n'
+                                  'Curve: select a curve, the lights are evenly spaced along it')
         mainLayout.addWidget(self.placement, 2, 1 )
 
         #LightType
@@ -99,139 +125,260 @@ class LightRigger(QtWidgets.QWidget):
 
         #Create Rig Button
         createBtn = QtWidgets.QPushButton('Create Rig')
-        createBtn.clicked.connect(self.createRig)
+        createBtn.clicked.connect(lambda: self.createRig())
         mainLayout.addWidget(createBtn, 3, 0, 1, 2)
 
         #Create Rig from existing Lights
         createExistingBtn = QtWidgets.QPushButton('Create rig from selection')
-        createExistingBtn.clicked.connect(self.createRigFromSelected)
+        createExistingBtn.clicked.connect(lambda: self.createRigFromSelected())
         mainLayout.addWidget(createExistingBtn, 3, 2, 1, 2)
 
-        #CreateRigSpace
-        rigSpace = QtWidgets.QWidget()
-        rigSpace.setSizePolicy(QtWidgets.QSizePolicy.Maximum, QtWidgets.QSizePolicy.Maximum)
-        self.scrollLayout = QtWidgets.QVBoxLayout(rigSpace)
-        rigArea = QtWidgets.QScrollArea()
-        rigArea.setWidgetResizable(True)
-        rigArea.setWidget(rigSpace)
-        mainLayout.addWidget(rigArea, 4, 0, 1, 4)
+        #Progress of the rig being created, createRig builds it a chunk per event loop tick
+        self.builder = None
+        self.buildBar = QtWidgets.QWidget()
+        buildLayout = QtWidgets.QHBoxLayout(self.buildBar)
+        buildLayout.setContentsMargins(0, 0, 0, 0)
+        self.buildProgress = QtWidgets.QProgressBar()
+        buildLayout.addWidget(self.buildProgress)
+        cancelBtn = QtWidgets.QPushButton('Cancel')
+        cancelBtn.setToolTip('Stops creating the rig and deletes the lights created so far')
+        cancelBtn.clicked.connect(lambda: self.cancelBuild())
+        buildLayout.addWidget(cancelBtn)
+        self.buildBar.hide()
+        mainLayout.addWidget(self.buildBar, 4, 0, 1, 4)
+
+        #Filter, shows only the rigs with lights matching a query, see lightQuery
+        self.queryIndex = lightQuery.LightIndex()
+        self.filterMatches = None
+        self.filter = QtWidgets.QLineEdit()
+        self.filter.setPlaceholderText('Filter: intensity > 50 and type == spotLight')
+        self.filter.setToolTip('Fields are attributes, one channel of colors or vectors (colorR, translateY), type, rig\n'
+                               'and name, joined by and, or, not and parentheses. Return runs the filter')
+        self.filter.returnPressed.connect(lambda: self.filterRigs())
+        mainLayout.addWidget(self.filter, 5, 0, 1, 2)
+        self.filterCount = QtWidgets.QLabel()
+        mainLayout.addWidget(self.filterCount, 5, 2)
+        selectBtn = QtWidgets.QPushButton('Select')
+        selectBtn.setToolTip('Selects the lights matching the filter')
+        selectBtn.clicked.connect(lambda: self.selectMatches())
+        mainLayout.addWidget(selectBtn, 5, 3)
+
+        #CreateRigSpace, a list of the rigs, their RigWidget only exists while the rig is expanded
+        #lightIndex: rig group of each light node
+        self.lightIndex = {}
+        self.rigModel = RigListModel(self)
+        self.rigDelegate = RigDelegate(self)
+        self.rigView = QtWidgets.QListView()
+        self.rigView.setModel(self.rigModel)
+        self.rigView.setItemDelegate(self.rigDelegate)
+        self.rigView.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.rigView.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.rigView.clicked.connect(self.toggleRig)
+        self.rigView.selectionModel().selectionChanged.connect(lambda *args: self.selectionChanged())
+        mainLayout.addWidget(self.rigView, 6, 0, 1, 4)
+
+        #Edits every rig selected in the list at once, shown with two or more rigs selected
+        self.batchBox = QtWidgets.QGroupBox()
+        self.batchBox.setLayout(QtWidgets.QVBoxLayout())
+        self.batchBox.hide()
+        self.batchWidget = None
+        mainLayout.addWidget(self.batchBox, 8, 0, 1, 4)
 
         #Refresh Button
         refreshBtn = QtWidgets.QPushButton('Refresh')
-        refreshBtn.clicked.connect(self.populate)
-        mainLayout.addWidget(refreshBtn)
-
-
+        refreshBtn.clicked.connect(lambda: self.populate())
+        mainLayout.addWidget(refreshBtn, 7, 0)
+
+        #Stats Button, Maya calls per UI action
+        statsBtn = QtWidgets.QPushButton('Stats')
+        statsBtn.setToolTip('Records the Maya calls made by each action of the tool')
+        statsBtn.clicked.connect(self.showStats)
+        mainLayout.addWidget(statsBtn, 7, 1)
+
+        #Export/Import Buttons, rigs are saved to files to be shared between shots
+        exportBtn = QtWidgets.QPushButton('Export Rig')
+        exportBtn.setToolTip('Saves the rigs selected in the list, a .gz file name compresses them')
+        exportBtn.clicked.connect(lambda: self.exportRigs())
+        mainLayout.addWidget(exportBtn, 7, 2)
+        importBtn = QtWidgets.QPushButton('Import Rig')
+        importBtn.setToolTip('Loads a rig file, with the Rig Name if given or the saved name otherwise')
+        importBtn.clicked.connect(lambda: self.importRig())
+        mainLayout.addWidget(importBtn, 7, 3)
+
+
+    def showStats(self):
+        if getattr(self, 'statsPanel', None) is None:
+            self.statsPanel = ProfilePanel(self)
+        self.statsPanel.show()
+        self.statsPanel.raise_()
+
+    def watchScene(self, watcher):
+        '''
+        Keeps the rig list in sync with the scene, the events of one event loop tick
+        are batched and only the rigs they touch are refreshed
+        :param watcher: lightEvents.SceneWatcher
+        '''
+        self.watcher = watcher
+        self.eventBatcher = lightEvents.EventBatcher(self.refreshRigs, lambda func: QtCore.QTimer.singleShot(0, func))
+        watcher.addListener(self.eventBatcher)
+        watcher.start()
+        #Maya callbacks must not outlive the widget
+        self.destroyed.connect(lambda *args: watcher.stop())
+
+    @lightProfile.profiled('placement change')
     def position(self):
         '''
         Sets the parameters to position each light of the rig,
         Distance: Creates two position Locators and measures the distance between them,
             the lights are positioned at a stepped distance aiming the locator 'B'
+        Ring, Grid, Sphere, Dome: Same locators, they set the center and size of the layout
         Stick to Selected: Checks the objects selected and place the lights close to the objects
+        Curve: Spaces the lights along the selected curve
         '''
 
         #Creates locators and set the Z position of 'B' 5 units
-        if self.placement.currentText() == 'Distance':
+        if self.placement.currentText() in lightPlacement.LAYOUTS:
             cmd.confirmDialog(t='lightRiggerDistance', m='Two locators were created, position them to get the desired distance', b='OK')
             if not cmd.objExists(self.distanceLocators[0]):
                 locA = cmd.spaceLocator(p=[0, 0, 0], n=self.distanceLocators[0])
             if not cmd.objExists(self.distanceLocators[1]):
-                locB = cmd.spaceLocator(p=[0, 0, 0], n=self.distanceLocators[1])
-                cmd.setAttr('%s.translateZ' % locB[0], 5)
+                with lightTransaction.transaction('lightRigger locators') as transaction:
+                    locB = cmd.spaceLocator(p=[0, 0, 0], n=self.distanceLocators[1])
+                    transaction.setAttr('%s.translateZ' % locB[0], 5)
             cmd.select([x for x in self.distanceLocators])
 
-        #Deletes the locators if changed to 'Stick to Selected'
+        #Deletes the locators if changed to 'Stick to Selected' or 'Curve'
         else:
             if cmd.objExists(self.distanceLocators[0]) and cmd.objExists(self.distanceLocators[1]):
                 cmd.delete(self.distanceLocators[0], self.distanceLocators[1])
 
 
+    @lightProfile.profiled('createRig')
     def createRig(self):
         '''
-        Creates N number of lights with the rig name using the placement method
-        Creates a widget to control the lights in the UI
+        Creates N number of lights with the rig name using the placement method, a chunk at a time
+        Creates a widget to control the lights in the UI with the first chunk
         '''
+        if self.builder is not None:
+            cmd.warning('%s is still being created' % self.builder.name)
+            return
 
         lightType = self.lightType.currentText()
         nLights = self.nLights.text()
         rigName = self.name.text()
-        placement = True if self.placement.currentText() == 'Stick to Selected' else False
+        placementMode = self.placement.currentText()
+        placement = True if placementMode == 'Stick to Selected' else False
         if not rigName:
             cmd.warning('No name given')
             return
-        elif cmd.objExists('%s_lgtRig' % rigName):
+        elif cmd.objExists(lightRegistry.rigGroupName(rigName)):
             cmd.warning('Name already exists')
             return
 
         #If the placement method is 'Stick to Selected', grabs the selected objects and returns and error if not the same as N of lights
         selectedObjs = []
+        curvePoints = None
         if placement:
             selectedObjs = cmd.ls(sl=True, type='transform')
             if int(nLights) > len(selectedObjs):
                 cmd.warning('Not enough objects selected')
                 return
-        #Else, it will be selected to 'Distance', looks for the locators, return an error if there are none
+        #'Curve' samples the selected curve once, before the lights change the selection
+        elif placementMode == 'Curve':
+            selected = cmd.ls(sl=True)
+            curves = selected and (cmd.ls(selected, type='nurbsCurve') or cmd.listRelatives(selected, type='nurbsCurve'))
+            if not curves:
+                cmd.warning('No curve selected')
+                return
+            curvePoints = lightPlacement.sampleCurve(curves[0])
+        #Else, it will be selected to a locator layout, looks for the locators, return an error if there are none
         else:
             if not cmd.objExists(self.distanceLocators[0]) or not cmd.objExists(self.distanceLocators[1]):
                 cmd.warning('Locators no longer exists')
                 return
 
-        attrs = []
-        for i in ['translate', 'rotate']:
-            for x in ['X', 'Y', 'Z']:
-                attrs.append(i+x)
-
-        #Creates N of lights, id: shape and transform nodes of each ligth and passes it down to the widget. idn: id number
-        id = {}
-        idn = 0
-        def lightNode(shadingNode, lightType, name):
-            if shadingNode:
-                node = eval("cmd.shadingNode('%s', asLight=True)" % lightType)
-                node = cmd.listRelatives(cmd.rename(node, name), type=['areaLight', 'volumeLight'])[0]
-            else:
-                node = eval("cmd.%s(n='%s')" % (lightType, name))
-            return node
+        #Locator layouts take their size from the locators
+        start = end = None
+        if placementMode in lightPlacement.LAYOUTS:
+            start = [x for x in cmd.getAttr('%s.translate' % self.distanceLocators[0])[0]]
+            end = [x for x in cmd.getAttr('%s.translate' % self.distanceLocators[1])[0]]
+
+        #Creates the lights a chunk at a time placed by the placement engine, the rig is shown after the first one
+        #id: shape and transform nodes of each ligth, the model grows with every chunk
+        try:
+            builder = lightCore.RigBuilder(rigName, lightType, int(nLights), placementMode, start, end,
+                                           selectedObjs, curvePoints, self.stickOffset)
+        except ValueError as error:
+            cmd.warning(str(error))
+            return
+        self.buildRig(builder)
 
-        shadingNode = True if lightType == 'areaLight' or lightType == 'volumeLight' else False
-        for i in range(int(nLights)):
-            name = rigName+str(idn)
-            node = lightNode(shadingNode, lightType, name)
-            id[node] = name
-            idn += 1
+    def buildRig(self, builder):
+        '''
+        Runs a lightCore.RigBuilder from the event loop, one chunk per tick so the UI keeps responding
+        '''
+        self.builder = builder
+        self.buildProgress.setRange(0, builder.count)
+        self.buildProgress.setValue(0)
+        self.buildProgress.setFormat('%s %%v/%%m' % builder.name)
+        self.buildBar.show()
+        QtCore.QTimer.singleShot(0, self.buildStep)
+
+    @lightProfile.profiled('createRig chunk')
+    def buildStep(self):
+        builder = self.builder
+        if builder is None:
+            return
+        try:
+            lights = builder.step()
+        except Exception as error:
+            self.cancelBuild()
+            cmd.warning('Could not create %s: %s' % (builder.name, error))
+            return
 
-        #Sets the position of each light depending the placement method
-        if placement:
-            lightNo = 0
-            for light in id.values():
-                cmd.parent(light,selectedObjs[lightNo])
-                lightNo += 1
-                for attr in attrs:
-                    val = 0 if not attr.endswith('Z') else -.5
-                    cmd.setAttr('%s.%s' % (light, attr), val)
-
-                cmd.parent(light, w=True)
+        if builder.rig is not None and self.rigModel.item(builder.rig) is None:
+            #Creates the widget with the first chunk, the model it edits gets the next ones
+            self.addRig(builder.rig, builder.name, builder.model)
+            self.expandRig(builder.rig)
+        elif lights:
+            self.growRig(builder.rig, lights)
+        self.buildProgress.setValue(builder.created)
+        if builder.done:
+            self.builder = None
+            self.buildBar.hide()
         else:
-            locAPos = [x for x in cmd.getAttr('%s.translate' % self.distanceLocators[0])[0]]
-            locBPos = [x for x in cmd.getAttr('%s.translate' % self.distanceLocators[1])[0]]
-            distanceTool = cmd.distanceDimension(sp=locAPos, ep=locBPos)
-            distLocA, distLocB = cmd.listConnections(distanceTool)
-            distance = cmd.getAttr('%s.distance' % distanceTool)
-            distanceGroup = cmd.group(id.values(), n='lightRiggerDistGroup')
-            x,y, z = locAPos
-            cmd.setAttr('%s.translate' % distanceGroup, x, y, z)
-            cmd.aimConstraint(self.distanceLocators[1], distanceGroup)
-            inicial = 0
-            for light in id.values():
-                cmd.setAttr('%s.translateX' % light, inicial)
-                inicial += distance
-            cmd.parent(id.values(), w=True)
-            cmd.delete(distanceGroup, distanceTool)
-
-        #Enclose the lights in a group and creates the widget
-        cmd.group(id.keys(), n='%s_lgtRig' % rigName)
-        rigWidget = RigWidget(rigName, id)
-        self.scrollLayout.addWidget(rigWidget)
+            QtCore.QTimer.singleShot(0, self.buildStep)
+
+    def growRig(self, rig, lights):
+        '''
+        Indexes lights added to the model of a rig and shows them in its widgets
+        :param lights: list, light shapes
+        '''
+        item = self.rigModel.item(rig)
+        for shape in lights:
+            self.lightIndex[shape] = rig
+            self.lightIndex[item.info[shape]] = rig
+        if item.widget is not None:
+            item.widget.lightsByType = lightCore.lightsByType(item.info)
+        self.rigModel.updateItem(rig)
+        #The merged model of the batch editor does not have the new lights
+        if self.batchWidget is not None and item in self.batchWidget.items:
+            self.selectionChanged()
+
+    def cancelBuild(self):
+        '''
+        Stops the rig being created, it is deleted with the lights created so far
+        '''
+        builder, self.builder = self.builder, None
+        self.buildBar.hide()
+        if builder is None:
+            return
+        rig = builder.rig
+        builder.cancel()
+        if rig is not None and self.rigModel.item(rig) is not None:
+            self.removeRig(rig)
 
+    @lightProfile.profiled('createRigFromSelected')
     def createRigFromSelected(self):
         '''
         Takes the rig name and enclosures selected lights in a group, creates a widget to control within the UI
@@ -240,21 +387,56 @@ class LightRigger(QtWidgets.QWidget):
         if not rigName:
             cmd.warning('No name given')
             return
-        elif cmd.objExists('%s_lgtRig' % rigName):
+        elif cmd.objExists(lightRegistry.rigGroupName(rigName)):
             cmd.warning('Name already exists')
             return
 
-        id = {}
-        selectedLights = cmd.ls(sl=True)
-        lightShapes = cmd.listRelatives(selectedLights, type=self.lightTypes)
-        lights = cmd.listRelatives(lightShapes, p=True)
-        for i in lights:
-            id[lightShapes[lights.index(i)]] = i
+        try:
+            rig, id = lightCore.rigFromLights(rigName, cmd.ls(sl=True))
+        except ValueError as error:
+            cmd.warning(str(error))
+            return
+        self.addRig(rig, rigName, id)
+        self.expandRig(rig)
 
-        cmd.parent(id.values(), w=True)
-        cmd.group(id.keys(), n='%s_lgtRig' % rigName)
-        widget = RigWidget(rigName, id)
-        self.scrollLayout.addWidget(widget)
+    @lightProfile.profiled('export')
+    def exportRigs(self):
+        '''
+        Writes every rig selected in the list to a file, several rigs go to a folder as '<name>.jsonl.gz'
+        '''
+        rigs = [self.rigModel.items[index.row()].rig for index in self.rigView.selectionModel().selectedRows()]
+        if not rigs:
+            cmd.warning('No rig selected')
+            return
+        if len(rigs) == 1:
+            path = QtWidgets.QFileDialog.getSaveFileName(self, 'Export Rig', lightRegistry.rigName(rigs[0]) + '.jsonl.gz',
+                                                         'Light Rigs (*.jsonl *.jsonl.gz)')[0]
+            paths = [path] if path else []
+        else:
+            folder = QtWidgets.QFileDialog.getExistingDirectory(self, 'Export Rigs')
+            paths = ['%s/%s.jsonl.gz' % (folder, lightRegistry.rigName(x)) for x in rigs] if folder else []
+        for rig, path in zip(rigs, paths):
+            #The attributes edited in an expanded rig, custom ones too, are saved with the usual ones
+            widget = self.rigModel.item(rig).widget
+            attrs = lightRigIO.EXPORT_ATTRS + (widget.lightAttrs() if widget is not None else [])
+            lightRigIO.exportRig(rig, path, attrs)
+
+    @lightProfile.profiled('import')
+    def importRig(self):
+        '''
+        Rebuilds a rig from a file, named after the Rig Name field if given
+        '''
+        path = QtWidgets.QFileDialog.getOpenFileName(self, 'Import Rig', '', 'Light Rigs (*.jsonl *.jsonl.gz)')[0]
+        if not path:
+            return
+        try:
+            rig = lightRigIO.importRig(path, self.name.text() or None)
+        except ValueError as error:
+            cmd.warning(str(error))
+            return
+        if rig and self.rigModel.item(rig) is None:
+            self.addRig(rig, lightRegistry.rigName(rig), self.rigInfo(rig))
+        self.expandRig(rig)
 
     def nLightsSliderMod(self, value):
         #Slider line edit Combo
@@ -268,26 +450,378 @@ class LightRigger(QtWidgets.QWidget):
         # Slider line edit Combo
         self.nLights.setText(str(value))
 
+    def isRig(self, name):
+        return self.rigModel.item(name) is not None or lightRegistry.isRig(name)
+
+    def rigInfo(self, rig):
+        '''
+        Shape and transform nodes of the lights of a rig
+        :param rig: string, rig group
+        :return: lightModel.RigModel, reads like a dict Key: light shape, Value: light transform
+        '''
+        return lightCore.rigInfo(rig)
+
+    def addRig(self, rig, name, info, row=-1):
+        '''
+        Adds a rig to the rig list and indexes its lights, its widget is built when expanded
+        :param rig: string, rig group
+        :param name: string, rig name
+        :param info: lightModel.RigModel
+        :param row: int, list position, appended by default
+        '''
+        for shape, transform in info.items():
+            self.lightIndex[shape] = rig
+            self.lightIndex[transform] = rig
+        item = RigItem(rig, name, info)
+        self.queryIndex.setRig(rig, item.state.model)
+        self.rigModel.addItem(item, row)
+
+    def removeRig(self, rig):
+        '''
+        Takes a rig out of the rig list, its widget is released by the view
+        :return: int, list position the rig had
+        '''
+        item = self.rigModel.item(rig)
+        for shape, transform in item.info.items():
+            self.lightIndex.pop(shape, None)
+            self.lightIndex.pop(transform, None)
+        self.queryIndex.removeRig(rig)
+        return self.rigModel.removeItem(rig)
+
+    def expandRig(self, rig, expanded=True):
+        '''
+        Shows or hides the RigWidget of a rig, the widget is created when shown and deleted when hidden
+        '''
+        item = self.rigModel.item(rig)
+        if item is None or item.expanded == expanded:
+            return
+        index = self.rigModel.index(self.rigModel.row(rig))
+        item.expanded = expanded
+        if expanded:
+            self.rigView.openPersistentEditor(index)
+        else:
+            self.rigView.closePersistentEditor(index)
+        self.rigDelegate.sizeHintChanged.emit(index)
+
+    @lightProfile.profiled('select rigs')
+    def selectionChanged(self):
+        '''
+        Rebuilds the MultiRigWidget of the rigs selected in the list
+        '''
+        if self.batchWidget is not None:
+            self.batchWidget.endEdit()
+            self.batchWidget.deleteLater()
+            self.batchWidget = None
+        items = [self.rigModel.items[index.row()] for index in self.rigView.selectionModel().selectedRows()]
+        if len(items) < 2:
+            self.batchBox.hide()
+            return
+        self.batchWidget = MultiRigWidget(items, self.batchBox)
+        self.batchBox.layout().addWidget(self.batchWidget)
+        self.batchBox.setTitle('Selected rigs (%d)' % len(items))
+        self.batchBox.show()
+
+    @lightProfile.profiled('expand rig')
+    def toggleRig(self, index):
+        #Modifier clicks only change the selection
+        if QtWidgets.QApplication.keyboardModifiers() != QtCore.Qt.NoModifier:
+            return
+        item = self.rigModel.items[index.row()]
+        self.expandRig(item.rig, not item.expanded)
+
+    @lightProfile.profiled('populate')
     def populate(self):
         '''
-        Looks for existing rigs, gets the shape and the transform node and creates the widgets
-        '''
-        for i in reversed(range(self.scrollLayout.count())):
-            widget = self.scrollLayout.takeAt(i).widget()
-            widget.deleteLater()
-            widget.setParent(None)
-
-        rigs = [x for x in cmd.ls(type='transform') if '_lgtRig' in x]
-        if len(rigs) != 0:
-            for rig in rigs:
-                lights = cmd.listRelatives(rigs[rigs.index(rig)])
-                if lights:
-                    lightShapes = cmd.listRelatives(lights, type=self.lightTypes)
-                    id = {}
-                    for light in lights:
-                        id[lightShapes[lights.index(light)]] = light
-                    rigWidget = RigWidget(rig.split('_')[:-1][0], id)
-                    self.scrollLayout.addWidget(rigWidget)
+        Looks for existing rigs, gets the shape and the transform node and lists them
+        '''
+        self.rigModel.clear()
+        self.lightIndex = {}
+        self.queryIndex.clear()
+
+        for rig in lightRegistry.rigs():
+            id = self.rigInfo(rig)
+            if id:
+                self.addRig(rig, lightRegistry.rigName(rig), id)
+        self.filterRigs()
+        #Resetting the model drops the selection without signaling it
+        self.selectionChanged()
+
+    def rigOf(self, name):
+        '''
+        Rig group a node belongs to, a rig itself, one of its lights or a light shape
+        :return: string or None
+        '''
+        if self.rigModel.item(name) is not None:
+            return name
+        if name in self.lightIndex:
+            return self.lightIndex[name]
+        if not cmd.objExists(name):
+            return None
+        if self.isRig(name):
+            return name
+        for _ in range(2):
+            parent = cmd.listRelatives(name, p=True)
+            if not parent:
+                return None
+            name = parent[0]
+            if self.isRig(name):
+                return name
+        return None
+
+    @lightProfile.profiled('scene events')
+    def refreshRigs(self, events):
+        '''
+        Adds, removes or updates only the rigs affected by a batch of scene events
+        :param events: list of (kind, name, oldName) from lightEvents
+        '''
+        names = set()
+        for kind, name, oldName in events:
+            names.add(name)
+            if oldName:
+                names.add(oldName)
+
+        affected = set()
+        for name in names:
+            rig = self.rigOf(name)
+            if rig:
+                affected.add(rig)
+
+        for rig in affected:
+            #The rig being created follows its builder
+            if self.builder is not None and rig == self.builder.rig:
+                continue
+            id = self.rigInfo(rig) if cmd.objExists(rig) else {}
+            item = self.rigModel.item(rig)
+            if item is not None and item.info == id:
+                continue
+            expanded = item is not None and item.expanded
+            row = self.removeRig(rig) if item is not None else -1
+            if id:
+                self.addRig(rig, lightRegistry.rigName(rig), id, row)
+                if expanded:
+                    self.expandRig(rig)
+
+        #The batch editor must not keep writing to rigs that changed
+        if self.batchWidget is not None and any(self.rigModel.item(x.rig) is not x for x in self.batchWidget.items):
+            self.selectionChanged()
+        if affected and self.filterMatches is not None:
+            self.filterRigs()
+
+    @lightProfile.profiled('filter rigs')
+    def filterRigs(self):
+        '''
+        Hides the rigs without lights matching the filter, all of them are shown when it is empty.
+        The query runs on the index of the rig models, only the rigs edited since the last one are read again
+        '''
+        text = self.filter.text().strip()
+        matches = None
+        if text:
+            try:
+                matches = self.queryIndex.query(text)
+            except ValueError as e:
+                cmd.warning(str(e))
+                return
+        self.filterMatches = matches
+        for row, item in enumerate(self.rigModel.items):
+            self.rigView.setRowHidden(row, matches is not None and item.rig not in matches)
+        if matches is None:
+            self.filterCount.setText('')
+        else:
+            self.filterCount.setText('%d lights in %d rigs' % (sum(len(x) for x in matches.values()), len(matches)))
+
+    def selectMatches(self):
+        '''
+        Selects the light transforms matching the filter
+        '''
+        self.filterRigs()
+        if not self.filterMatches:
+            cmd.select(clear=True)
+            return
+        nodes = []
+        for rig, shapes in self.filterMatches.items():
+            model = self.queryIndex.models[rig]
+            nodes.extend(model.get(x) or x for x in shapes)
+        cmd.select(nodes, replace=True)
+
+
+class RigItem(object):
+    '''
+    Rig of the rig list, widget is its RigWidget while it is expanded,
+    state mirrors its attribute values and outlives the widget
+    '''
+    __slots__ = ('rig', 'name', 'info', 'expanded', 'widget', 'state')
+
+    def __init__(self, rig, name, info):
+        self.rig = rig
+        self.name = name
+        self.info = info
+        self.expanded = False
+        self.widget = None
+        #The mirror caches its values in the columns of the rig model
+        self.state = lightState.RigState(name, info if isinstance(info, lightModel.RigModel) else None)
+
+
+class RigListModel(QtCore.QAbstractListModel):
+    '''
+    List of the RigItems of the scene
+    '''
+
+    def __init__(self, parent=None):
+        super(RigListModel, self).__init__(parent)
+        self.items = []
+        self.byRig = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.items[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return '%s  (%d lights)' % (item.name, len(item.info))
+        if role == QtCore.Qt.ToolTipRole:
+            return item.rig
+        return None
+
+    def flags(self, index):
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def item(self, rig):
+        return self.byRig.get(rig)
+
+    def row(self, rig):
+        return self.items.index(self.byRig[rig])
+
+    def addItem(self, item, row=-1):
+        row = len(self.items) if row < 0 else row
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.items.insert(row, item)
+        self.byRig[item.rig] = item
+        self.endInsertRows()
+
+    def updateItem(self, rig):
+        index = self.index(self.row(rig))
+        self.dataChanged.emit(index, index)
+
+    def removeItem(self, rig):
+        row = self.row(rig)
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.items[row]
+        del self.byRig[rig]
+        self.endRemoveRows()
+        return row
+
+    def clear(self):
+        self.beginResetModel()
+        self.items = []
+        self.byRig = {}
+        self.endResetModel()
+
+
+class RigDelegate(QtWidgets.QStyledItemDelegate):
+    '''
+    Paints every rig as a header line, expanded rigs get their RigWidget under it
+    as a persistent editor. Collapsed rigs have no widget at all.
+    '''
+    headerHeight = 22
+
+    def paint(self, painter, option, index):
+        item = index.model().items[index.row()]
+        header = QtWidgets.QStyleOptionViewItem(option)
+        self.initStyleOption(header, index)
+        header.rect = QtCore.QRect(option.rect.x(), option.rect.y(), option.rect.width(), self.headerHeight)
+        header.text = ('- ' if item.expanded else '+ ') + header.text
+        style = header.widget.style() if header.widget else QtWidgets.QApplication.style()
+        style.drawControl(QtWidgets.QStyle.CE_ItemViewItem, header, painter, header.widget)
+
+    def sizeHint(self, option, index):
+        item = index.model().items[index.row()]
+        height = self.headerHeight
+        if item.widget is not None:
+            height += item.widget.sizeHint().height()
+        return QtCore.QSize(option.rect.width(), height)
+
+    def createEditor(self, parent, option, index):
+        #Nothing is queried here, the model already has the light types fromRig read with the rig
+        item = index.model().items[index.row()]
+        item.widget = RigWidget(item.name, item.info, parent, item.state)
+        item.widget.rigItem = item
+        return item.widget
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect.adjusted(0, self.headerHeight, 0, 0))
+
+    def setEditorData(self, editor, index):
+        pass
+
+    def setModelData(self, editor, model, index):
+        pass
+
+    def destroyEditor(self, editor, index):
+        #Writes what a slider drag left pending and closes its undo chunk before the widget goes away
+        editor.endEdit()
+        editor.rigItem.widget = None
+        super(RigDelegate, self).destroyEditor(editor, index)
+
+class UpdateScheduler(QtCore.QObject):
+    '''
+    Coalesces rapid updates, only the latest value of each key is written and at most
+    rate times per second. The first update is written right away, the ones arriving
+    before the next tick replace each other and the last one is written on the tick or on flush.
+    '''
+
+    def __init__(self, callback, rate=30, parent=None):
+        '''
+        :param callback: function called with the arguments given to push
+        :param rate: int, maximum flushes per second
+        '''
+        super(UpdateScheduler, self).__init__(parent)
+        self.callback = callback
+        self.pending = OrderedDict()
+        self.written = 0
+        self.dropped = 0
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+        self.setRate(rate)
+
+    def setRate(self, rate):
+        self.rate = rate
+        self.timer.setInterval(int(1000.0 / rate) if rate > 0 else 0)
+
+    def push(self, key, *args):
+        '''
+        Queues an update, replacing the pending one of the same key
+        :param key: hashable, updates with the same key are merged
+        :param args: arguments for the callback
+        '''
+        if key in self.pending:
+            self.dropped += 1
+        self.pending[key] = args
+        if not self.timer.isActive():
+            self.tick()
+
+    def tick(self):
+        #Writes what is pending and waits one interval before writing again
+        if self.pending:
+            self.flush()
+            self.timer.start()
+
+    def flush(self):
+        '''
+        Writes every pending update now, used when the user releases the slider
+        '''
+        pending, self.pending = self.pending, OrderedDict()
+        for args in pending.values():
+            self.callback(*args)
+            self.written += 1
+
+    def report(self):
+        total = self.written + self.dropped
+        ratio = 100.0 * self.dropped / total if total else 0.0
+        return '%d writes, %d dropped (%.1f%%) at %s Hz' % (self.written, self.dropped, ratio, self.rate)
+
 
 class RigWidget(QtWidgets.QWidget):
     '''
@@ -297,10 +831,18 @@ class RigWidget(QtWidgets.QWidget):
         2nd contains the controllers to manipulate the lights
 
     '''
-
-
-    def __init__(self, name, info):
-        super(RigWidget, self).__init__()
+    #Maximum attribute writes per second while dragging a slider
+    updateRate = 30
+
+    def __init__(self, name, info, parent=None, state=None):
+        super(RigWidget, self).__init__(parent)
+        #Attribute values are read from and written through the mirror of the rig
+        self.state = state or lightState.RigState(name, info if isinstance(info, lightModel.RigModel) else None)
+        #UI action the scheduled writes belong to, for the profiler
+        self.editing = None
+        #Transaction of a slider drag, the writes of every tick join its undo chunk
+        self.edit = None
+        self.scheduler = UpdateScheduler(self.setAttr, self.updateRate, self)
         self.attrsOp = ['Select Attribute', 'intensity', 'color', 'aim', 'aiExposure', 'aiSamples', 'aiRadius', 'Custom']
         self.columnCount = 0
         self.attrs = {}
@@ -310,7 +852,8 @@ class RigWidget(QtWidgets.QWidget):
         self.usedAttrs = []
         self.buildUI()
         self.tableWidth = 135
-        self.aimLoc = False
+        #Locator positions of the rigs whose aim was turned off
+        self.aimLocs = {}
 
     def buildUI(self):
         '''
@@ -327,11 +870,20 @@ class RigWidget(QtWidgets.QWidget):
         self.table.setMinimumSize(125 ,84)
         self.table.setMaximumSize(130, 85)
         rigName = QtWidgets.QLabel(self.name)
-        rigLayout.addWidget(rigName)
-        lightTypes = set(cmd.objectType(x) for x in self.info.keys())
+        bakeBtn = QtWidgets.QPushButton('Bake')
+        bakeBtn.setToolTip('Keys constant, ramp or noise values on the lights over a frame range')
+        bakeBtn.setMaximumSize(60, 20)
+        bakeBtn.clicked.connect(lambda: self.bake())
+        headerLayout = QtWidgets.QHBoxLayout()
+        headerLayout.addWidget(rigName)
+        headerLayout.addWidget(bakeBtn)
+        rigLayout.addLayout(headerLayout)
+
+        #Groups the lights by node type, attribute schemas are looked up once per type
+        self.lightsByType = lightCore.lightsByType(self.info)
 
         #Adds 3 more attributes if there is any spotlight within the rig
-        if 'spotLight' in lightTypes:
+        if 'spotLight' in self.lightsByType:
             self.attrsOp = self.attrsOp[:3] + ['coneAngle', 'penumbraAngle', 'dropoff'] + self.attrsOp[3:]
         self.addAttr()
         rigLayout.addWidget(self.table)
@@ -366,6 +918,7 @@ class RigWidget(QtWidgets.QWidget):
             if len(previousValue) == 1 and previousValue[0] != '':
                 self.attrs['attr_at_' + str(i)].insertItem(self.attrsOp.index(previousValue[0]), previousValue[0])
 
+    @lightProfile.profiled('add attribute column')
     def addModule(self, columnCount):
         '''
         Creates the controllers to manipulate the lights that posses given attribute.
@@ -380,15 +933,37 @@ class RigWidget(QtWidgets.QWidget):
         attr = self.attrs[attrPos].currentText()
         self.table.removeCellWidget(1, columnCount)
         if attr == 'color':
+            inWidget = QtWidgets.QWidget()
+            widgetLayout = QtWidgets.QHBoxLayout(inWidget)
             self.widgets[widget] = QtWidgets.QPushButton()
             self.setButtonColor(widget)
             self.widgets[widget].clicked.connect(lambda: self.setColor(widget))
-            self.table.setCellWidget(1, columnCount, self.widgets[widget])
+            widgetLayout.addWidget(self.widgets[widget])
+            self.widgets[subWidget] = QtWidgets.QPushButton('Ramp')
+            self.widgets[subWidget].setMaximumSize(40, 40)
+            self.widgets[subWidget].setToolTip('Color gradient across the lights')
+            self.widgets[subWidget].clicked.connect(lambda: self.setGradient(widget))
+            widgetLayout.addWidget(self.widgets[subWidget])
+            self.table.setCellWidget(1, columnCount, inWidget)
 
         elif attr == 'aim':
+            inWidget = QtWidgets.QWidget()
+            widgetLayout = QtWidgets.QHBoxLayout(inWidget)
+            self.widgets[subWidget] = QtWidgets.QComboBox()
+            self.widgets[subWidget].addItems(lightCore.AIM_MODES)
+            self.widgets[subWidget].setMaximumSize(50, 40)
+            self.widgets[subWidget].setToolTip('bake: rotations computed once, constraint: one aimConstraint per light')
+            widgetLayout.addWidget(self.widgets[subWidget])
             self.widgets[widget] = QtWidgets.QPushButton('On/Off')
-            self.widgets[widget].clicked.connect(self.aim)
-            self.table.setCellWidget(1, columnCount, self.widgets[widget])
+            self.widgets[widget].setMaximumSize(40, 40)
+            self.widgets[widget].clicked.connect(lambda: self.aim(self.widgets[subWidget].currentText()))
+            widgetLayout.addWidget(self.widgets[widget])
+            updateBtn = QtWidgets.QPushButton('Re')
+            updateBtn.setMaximumSize(25, 40)
+            updateBtn.setToolTip('Aims the baked lights at the moved locator')
+            updateBtn.clicked.connect(lambda: self.updateAim())
+            widgetLayout.addWidget(updateBtn)
+            self.table.setCellWidget(1, columnCount, inWidget)
 
         elif attr == 'Select Attribute' or attr == 'Custom':
             if attr == 'Select Attribute': pass
@@ -405,6 +980,7 @@ class RigWidget(QtWidgets.QWidget):
                 widgetLayout.addWidget(subWidget)
                 self.table.setCellWidget(1,columnCount, inWidget)
         else:
+            self.revalidate([attr])
             initialValue = self.getAttr(attr)
             inWidget = QtWidgets.QWidget()
             widgetLayout = QtWidgets.QHBoxLayout(inWidget)
@@ -413,20 +989,25 @@ class RigWidget(QtWidgets.QWidget):
             self.widgets[widget].setText(str(initialValue))
             max = 999.00
             maxSld = 5
-            for i in self.info.keys():
-                if cmd.attributeQuery(attr, node=i, exists=True, mxe=True):
-                    max = int(cmd.attributeQuery(attr, node=i, max=True)[0])
+            for lightType, lights in self.lightsByType.items():
+                lights = schema.nodesWith(lightType, attr, lights)
+                info = schema.info(lightType, attr, lights[0]) if lights else None
+                if info is not None and info.max is not None:
+                    max = int(info.max)
                     maxSld = max
                     break
             validator = QtGui.QIntValidator(1.00, max, self)
             self.widgets[widget].setValidator(validator)
             self.widgets[widget].textChanged.connect(lambda value: self.sliderCombo(value, subWidget, attr))
+            self.widgets[widget].editingFinished.connect(self.scheduler.flush)
             widgetLayout.addWidget(self.widgets[widget])
 
             self.widgets[subWidget] = QtWidgets.QSlider(QtCore.Qt.Horizontal)
             self.widgets[subWidget].setValue(initialValue)
             self.widgets[subWidget].setMaximum(maxSld)
             self.widgets[subWidget].valueChanged.connect(lambda value: self.sliderCombo(value, widget, attr, False))
+            self.widgets[subWidget].sliderPressed.connect(lambda: self.startEdit('slider drag on %s' % attr, attr))
+            self.widgets[subWidget].sliderReleased.connect(self.endEdit)
             widgetLayout.addWidget(self.widgets[subWidget])
             self.table.setCellWidget(1, columnCount, inWidget)
 
@@ -443,50 +1024,102 @@ class RigWidget(QtWidgets.QWidget):
             self.columnCount += 1
             self.addAttr()
 
+    def lightAttrs(self):
+        '''
+        Light attributes of the columns of the table, custom ones included
+        :return: list
+        '''
+        return [x for x in self.usedAttrs if x and x not in ('Select Attribute', 'Custom', 'aim')]
+
+    def lightsWithAttr(self, attr):
+        '''
+        Lights of the rig that have the attribute, checked once per light type unless it was added by hand
+        :param attr: string
+        :return: list
+        '''
+        return lightCore.lightsWithAttr(self.lightsByType, attr)
+
+    def rigs(self):
+        '''
+        Rigs edited by the widget
+        :return: list of (name, info, state)
+        '''
+        return [(self.name, self.info, self.state)]
+
+    def revalidate(self, attrs):
+        for name, info, state in self.rigs():
+            state.revalidate(attrs)
+
+    def writeAttr(self, attr, value, lights):
+        '''
+        Writes a value to the lights through the mirror of the rig each one belongs to,
+        every rig in one transaction, a light shared by several rigs is written once
+        :param lights: list, light nodes
+        '''
+        lights = set(lights)
+        with lightTransaction.transaction('lightRigger %s' % attr) as transaction:
+            for name, info, state in self.rigs():
+                state.write(attr, value, [x for x in info if x in lights])
+                lights.difference_update(info)
+            #Applied now, also while the transaction of a slider drag is open
+            transaction.flush()
+
     def getAttr(self, attribute):
         '''
-        Gets the attribute value from the first light that has the attribute
+        Gets the attribute value of the first light that has the attribute, from the mirror
         returns an warning if no light has the attribute
         :param attribute: string
-        :return: float
+        :return: float, tuple for compound attributes
         '''
         value = 0.0
-        for i in self.info.keys():
-                if cmd.attributeQuery(attribute, node=i, exists=True):
-                    value = cmd.getAttr('%s.%s' % (i, attribute))
-                    break
-                else:
-                    continue
-        else:
-            if attribute != '':
-                cmd.warning('No Lights appear to have ' + attribute)
+        lights = self.lightsWithAttr(attribute)
+        if lights:
+            value = self.state.value(attribute, lights)
+        elif attribute != '':
+            cmd.warning('No Lights appear to have ' + attribute)
 
         return value
 
 
     def setAttr(self, attr, value):
         '''
-        Sets the value to each light
+        Sets the value to each light, lights already holding it are not written
         :param attr: string
         :param value: string/int
         '''
-        for i in self.info.keys():
-            if cmd.attributeQuery(attr, node=i, exists=True):
-                cmd.setAttr('%s.%s' % (i, attr), int(value))
-            else:
-                continue
+        with lightProfile.profiler.action(self.editing or 'set %s' % attr):
+            self.writeAttr(attr, int(value), self.lightsWithAttr(attr))
 
+    def startEdit(self, action, attr):
+        '''
+        Starts a continuous edit, the attribute is read again from the scene first.
+        Its writes until endEdit are one undo chunk.
+        :param action: string, profiler action of the writes until endEdit
+        '''
+        if self.edit is not None:
+            self.endEdit()
+        self.editing = action
+        self.revalidate([attr])
+        self.edit = lightTransaction.transaction('lightRigger %s' % attr)
+        self.edit.__enter__()
+
+    def endEdit(self):
+        #Writes what the edit left pending and closes its undo chunk
+        edit, self.edit = self.edit, None
+        try:
+            self.scheduler.flush()
+        finally:
+            self.editing = None
+            if edit is not None:
+                edit.__exit__(None, None, None)
+
+    @lightProfile.profiled('add custom attribute')
     def addCustom(self, attribute, attr):
         '''
         Gets user input and adds a new attribute to the list, if any of the lights of the rig has it
         Returns a warning if none of the light has the new attribute
         '''
-        for i in self.info.keys():
-                if cmd.attributeQuery(attribute, node=i, exists=True):
-                    break
-                else:
-                    continue
-        else:
+        if not self.lightsWithAttr(attribute):
             cmd.warning('%s does not exist on any light' % attribute)
             return
         self.attrsOp.append(attribute)
@@ -498,49 +1131,143 @@ class RigWidget(QtWidgets.QWidget):
 
 
 
-    def aim(self):
+    @lightProfile.profiled('aim')
+    def aim(self, mode=None):
         '''
-        Creates a locator and creates constrains for the light to aim for it.
-        Deletes the locator and teh constrains if it exists
+        Creates a locator and makes the lights aim for it, baked or with constraints.
+        Deletes the locator and puts the lights back if it exists
+        With several rigs aim is turned on for all of them if any is off, otherwise off for all
+        :param mode: string, one of lightCore.AIM_MODES
         '''
-        locatorName = self.name + '_aimLoc'
-        if not cmd.objExists(locatorName):
-            cmd.spaceLocator(n=locatorName)
-            if self.aimLoc:
-                x,y,z = list(self.aimLoc[0])
-                cmd.setAttr('%s.translate' % locatorName, x, y, z)
-            for i in self.info.values():
-                cmd.aimConstraint(locatorName, i, mo=False, o=[0, 270, 0])
-        else:
-            constrains = cmd.listRelatives(self.info.values(), type='aimConstraint')
-            cmd.delete(constrains)
-            self.aimLoc = cmd.getAttr('%s.translate' % locatorName)
-            cmd.delete(locatorName)
+        rigs = [(name, info) for name, info, state in self.rigs()]
+        turnOn = not all(lightCore.hasAim(name) for name, info in rigs)
+        with lightTransaction.transaction('lightRigger aim'):
+            for name, info in rigs:
+                if turnOn:
+                    position = self.aimLocs.get(name)
+                    lightCore.setAim(name, info, True, list(position[0]) if position else None, mode)
+                else:
+                    self.aimLocs[name] = lightCore.setAim(name, info, False)
+
+    @lightProfile.profiled('aim update')
+    def updateAim(self):
+        '''
+        Aims the lights of the rigs with a baked aim at the current position of their locator
+        '''
+        with lightTransaction.transaction('lightRigger aim'):
+            for name, info, state in self.rigs():
+                lightCore.updateAim(name, info)
 
 
 
-    def setButtonColor(self, widget, color=None):
+    @lightProfile.profiled('bake')
+    def bake(self):
+        '''
+        Asks for a frame range and a value source and bakes the keys on every light with the attributes
+        '''
+        start = cmd.playbackOptions(q=True, min=True)
+        end = cmd.playbackOptions(q=True, max=True)
+        dialog = BakeDialog(start, end, self)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        attrs, start, end, source, offset = dialog.spec()
+        with lightTransaction.transaction('lightRigger bake'):
+            for attr in attrs:
+                lights = self.lightsWithAttr(attr)
+                if not lights:
+                    cmd.warning('No Lights appear to have ' + attr)
+                    continue
+                #Colors are scaled from the mirrored ones, every light keeps its hue
+                bases = {attr: self.mirrored(attr, lights)} if attr in lightBake.CHANNELS else None
+                lightBake.bake(lights, [attr], start, end, source, offset, bases=bases)
+        self.revalidate(attrs)
+
+    def setButtonColor(self, widget, color=None, colors=None):
         '''
         Gets color from set color UI, assigns it to the UI button
+        A gradient swatch is shown when the lights have different colors
         :param widget: string
         :param color: list
+        :param colors: list of colors along the rig, shown as a gradient
         '''
-        if not color:
-            color = self.getAttr('color')[0]
+        if color is None and colors is None:
+            colors = self.sampleColors()
+            if not colors:
+                color = self.getAttr('color')
+        if colors is not None:
+            colors = [tuple(float(c) for c in x) for x in colors]
+            if len(set(colors)) == 1:
+                color = colors[0]
+
+        if color is not None:
+            assert len(color) == 3, 'Color Error'
+            r, g, b = [min(c, 1.0) * 255 for c in color]
+            self.widgets[widget].setStyleSheet('background-color: rgba(%s, %s, %s, 1.0)' % (r, g, b))
+            return
+        stops = ', '.join('stop:%g rgb(%d, %d, %d)' % ((float(i) / max(len(colors) - 1, 1),) +
+                                                      tuple(min(c, 1.0) * 255 for c in x))
+                          for i, x in enumerate(colors))
+        self.widgets[widget].setStyleSheet('background: qlineargradient(x1:0, y1:0, x2:1, y2:0, %s)' % stops)
 
-        assert len(color) == 3, 'Color Error'
-        r, g, b = [c * 255 for c in color]
-        self.widgets[widget].setStyleSheet('background-color: rgba(%s, %s, %s, 1.0)' % (r, g, b))
+    def sampleColors(self, count=8):
+        '''
+        Mirrored colors of count lights spread along the rig, for the swatch
+        :return: list of (r, g, b)
+        '''
+        lights = self.lightsWithAttr('color')
+        return self.mirrored('color', lights[::max(1, len(lights) // count)][:count])
 
+    def mirrored(self, attr, lights):
+        '''
+        Mirrored values of the lights, each read from the mirror of the rig it belongs to
+        so no rig is handed the lights of another
+        :param lights: list, light nodes
+        :return: list, one value per light
+        '''
+        values = {}
+        for name, info, state in self.rigs():
+            mine = [x for x in lights if x in info and x not in values]
+            if mine:
+                values.update(zip(mine, state.get(attr, mine)))
+        return [values[x] for x in lights]
+
+    @lightProfile.profiled('color gradient')
+    def setGradient(self, widget):
+        '''
+        Asks for a gradient and colors every light from its position, all the rigs in one pass and one batch
+        '''
+        dialog = GradientDialog(self)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        self.revalidate(['color', 'translate'])
+        lights = set(self.lightsWithAttr('color'))
+        if not lights:
+            cmd.warning('No Lights appear to have color')
+            return
+        parts = []
+        for name, info, state in self.rigs():
+            mine = [x for x in info if x in lights]
+            lights.difference_update(mine)
+            parts.append((state, mine))
+        positions = [p for state, mine in parts for p in state.get('translate', mine)]
+        colors = lightGradient.colors(dialog.gradient(), positions)
+        with lightTransaction.transaction('lightRigger color'):
+            first = 0
+            for state, mine in parts:
+                state.writeEach('color', colors[first:first + len(mine)], mine)
+                first += len(mine)
+        self.setButtonColor(widget, colors=self.sampleColors())
+
+    @lightProfile.profiled('set color')
     def setColor(self, widget):
         '''Sets the color of all the lights in the rig'''
-        lightColor = self.getAttr( 'color')[0]
+        self.revalidate(['color'])
+        lightColor = self.getAttr( 'color')
         color = cmd.colorEditor(rgbValue=lightColor)
         r, g, b, a = [float(c) for c in color.split()]
         color = (r, g, b)
 
-        for i in self.info.keys():
-            cmd.setAttr('%s.color' % i, r, g, b)
+        self.writeAttr('color', color, list(self.info.keys()))
         self.setButtonColor(widget, color)
 
     def sliderCombo(self, value, widget, attr, way=True):
@@ -549,7 +1276,236 @@ class RigWidget(QtWidgets.QWidget):
             value = 0 if not value else value
             if int(value) > self.widgets[widget].maximum():
                 self.widgets[widget].setMaximum(int(value))
-            self.setAttr(attr, value)
+            #Intermediate values of a drag are merged, only the latest one is written
+            self.scheduler.push(attr, attr, value)
             self.widgets[widget].setValue(int(value))
         else:
             self.widgets[widget].setText(str(value))
+
+
+class MultiRigWidget(RigWidget):
+    '''
+    RigWidget editing every light of several rigs at once. Lights are merged and grouped
+    by node type once, each change is written in one pass through the mirror of each rig.
+    '''
+
+    def __init__(self, items, parent=None):
+        '''
+        :param items: list of RigItem
+        '''
+        self.items = items
+        info = lightModel.RigModel.merge([item.info for item in items], '%d rigs' % len(items))
+        super(MultiRigWidget, self).__init__(info.name, info, parent, items[0].state)
+
+    def rigs(self):
+        return [(item.name, item.info, item.state) for item in self.items]
+
+    def getAttr(self, attribute):
+        '''
+        Value of the first light with the attribute, from the mirror of the rig it belongs to
+        '''
+        lights = self.lightsWithAttr(attribute)
+        for item in self.items:
+            if lights and lights[0] in item.info:
+                return item.state.value(attribute, lights[:1])
+        return super(MultiRigWidget, self).getAttr(attribute)
+
+
+class BakeDialog(QtWidgets.QDialog):
+    '''
+    Attributes, frame range and value source of a bake.
+    Value and Amount are the base and amplitude of the noise, the start and end values
+    of the ramp, Value is the constant
+    '''
+    sources = ['noise', 'ramp', 'constant']
+
+    def __init__(self, start, end, parent=None):
+        super(BakeDialog, self).__init__(parent)
+        self.setWindowTitle('Bake')
+        layout = QtWidgets.QFormLayout(self)
+
+        self.attrs = QtWidgets.QLineEdit('intensity')
+        self.attrs.setToolTip('Attributes separated by spaces, color keys the three channels scaling the color of each light')
+        layout.addRow('Attributes', self.attrs)
+        self.start = self.spinBox(start, -100000, 100000)
+        layout.addRow('Start', self.start)
+        self.end = self.spinBox(end, -100000, 100000)
+        layout.addRow('End', self.end)
+        self.source = QtWidgets.QComboBox()
+        self.source.addItems(self.sources)
+        layout.addRow('Source', self.source)
+        self.value = self.spinBox(1.0, -1000, 1000)
+        layout.addRow('Value', self.value)
+        self.amount = self.spinBox(0.5, -1000, 1000)
+        layout.addRow('Amount', self.amount)
+        self.frequency = self.spinBox(0.25, 0.001, 10)
+        layout.addRow('Frequency', self.frequency)
+        self.seed = QtWidgets.QSpinBox()
+        self.seed.setMaximum(100000)
+        layout.addRow('Seed', self.seed)
+        self.offset = self.spinBox(0.0, -1000, 1000)
+        self.offset.setToolTip('Frames the values are shifted for each light')
+        layout.addRow('Offset per light', self.offset)
+
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def spinBox(self, value, minimum, maximum):
+        spinBox = QtWidgets.QDoubleSpinBox()
+        spinBox.setDecimals(3)
+        spinBox.setRange(minimum, maximum)
+        spinBox.setValue(value)
+        return spinBox
+
+    def spec(self):
+        '''
+        :return: attributes, start, end, lightBake source dict, offset per light
+        '''
+        start, end = self.start.value(), self.end.value()
+        sourceType = self.source.currentText()
+        if sourceType == 'noise':
+            source = {'type': 'noise', 'base': self.value.value(), 'amplitude': self.amount.value(),
+                      'frequency': self.frequency.value(), 'seed': self.seed.value()}
+        elif sourceType == 'ramp':
+            source = {'type': 'ramp', 'startFrame': start, 'endFrame': end,
+                      'startValue': self.value.value(), 'endValue': self.amount.value()}
+        else:
+            source = {'type': 'constant', 'value': self.value.value()}
+        return self.attrs.text().split(), start, end, source, self.offset.value()
+
+
+class GradientDialog(QtWidgets.QDialog):
+    '''
+    Gradient of colors across the lights, see lightGradient.
+    Start and End are colors 'r g b' for a ramp and temperatures for kelvin
+    '''
+
+    def __init__(self, parent=None):
+        super(GradientDialog, self).__init__(parent)
+        self.setWindowTitle('Color Gradient')
+        layout = QtWidgets.QFormLayout(self)
+
+        self.type = QtWidgets.QComboBox()
+        self.type.addItems(lightGradient.TYPES)
+        self.type.currentIndexChanged.connect(lambda index: self.typeChanged())
+        layout.addRow('Type', self.type)
+        self.shape = QtWidgets.QComboBox()
+        self.shape.addItems(lightGradient.SHAPES)
+        layout.addRow('Shape', self.shape)
+        self.axis = QtWidgets.QComboBox()
+        self.axis.addItems(['auto', 'x', 'y', 'z'])
+        layout.addRow('Axis', self.axis)
+        self.start = QtWidgets.QLineEdit('1 0.5 0.2')
+        layout.addRow('Start', self.start)
+        self.end = QtWidgets.QLineEdit('0.2 0.5 1')
+        layout.addRow('End', self.end)
+        self.jitter = QtWidgets.QDoubleSpinBox()
+        self.jitter.setRange(0.0, 1.0)
+        self.jitter.setSingleStep(0.05)
+        self.jitter.setToolTip('Random variation of each light, 0.1 is +-10%')
+        layout.addRow('Jitter', self.jitter)
+        self.seed = QtWidgets.QSpinBox()
+        self.seed.setMaximum(100000)
+        layout.addRow('Seed', self.seed)
+
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def typeChanged(self):
+        if self.type.currentText() == 'kelvin':
+            self.start.setText('2700')
+            self.end.setText('6500')
+        else:
+            self.start.setText('1 0.5 0.2')
+            self.end.setText('0.2 0.5 1')
+
+    def gradient(self):
+        '''
+        :return: dict, lightGradient gradient
+        '''
+        start = [float(x) for x in self.start.text().split()]
+        end = [float(x) for x in self.end.text().split()]
+        kelvin = self.type.currentText() == 'kelvin'
+        return {'type': self.type.currentText(), 'shape': self.shape.currentText(), 'axis': self.axis.currentText(),
+                'start': start[0] if kelvin else start, 'end': end[0] if kelvin else end,
+                'jitter': self.jitter.value(), 'seed': self.seed.value()}
+
+
+class ProfilePanel(QtWidgets.QWidget):
+    '''
+    Window with the Maya calls of each UI action recorded by lightProfile,
+    refreshed every second while it is shown
+    '''
+    columns = ['Action', 'Command', 'Calls', 'ms']
+
+    def __init__(self, parent=None):
+        super(ProfilePanel, self).__init__(parent)
+        self.setWindowFlags(QtCore.Qt.Window)
+        self.setWindowTitle('lightRigger Stats')
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.record = QtWidgets.QCheckBox('Record Maya calls')
+        self.record.setChecked(lightProfile.profiler.enabled)
+        self.record.toggled.connect(self.setRecording)
+        layout.addWidget(self.record)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QtWidgets.QHBoxLayout()
+        for label, slot in (('Refresh', self.refresh), ('Reset', self.reset), ('Dump JSON', self.dump)):
+            button = QtWidgets.QPushButton(label)
+            button.clicked.connect(lambda checked=False, slot=slot: slot())
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super(ProfilePanel, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super(ProfilePanel, self).hideEvent(event)
+
+    def setRecording(self, on):
+        if on:
+            lightProfile.profiler.enable()
+        else:
+            lightProfile.profiler.disable()
+
+    def refresh(self):
+        '''
+        Fills the table, every action first with its wall time, then its commands
+        '''
+        profiler = lightProfile.profiler
+        rows = profiler.rows()
+        ordered = []
+        for action, (runs, seconds) in sorted(profiler.actionTimes.items(), key=lambda x: -x[1][1]):
+            ordered.append((action, '(%d runs)' % runs, '', seconds))
+            ordered.extend(x for x in rows if x[0] == action)
+        ordered.extend(x for x in rows if x[0] not in profiler.actionTimes)
+        self.table.setRowCount(len(ordered))
+        for row, (action, command, calls, seconds) in enumerate(ordered):
+            for column, value in enumerate((action, command, str(calls), '%.2f' % (seconds * 1000.0))):
+                self.table.setItem(row, column, QtWidgets.QTableWidgetItem(value))
+
+    def reset(self):
+        lightProfile.profiler.reset()
+        self.refresh()
+
+    def dump(self):
+        path = QtWidgets.QFileDialog.getSaveFileName(self, 'Dump Stats', 'lightRiggerStats.json', 'JSON (*.json)')[0]
+        if path:
+            lightProfile.profiler.dump(path)
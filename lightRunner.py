@@ -0,0 +1,304 @@
+'''
+Applies a rig spec (see lightBatch) to many scene files with a pool of worker processes.
+
+Every worker process starts its backend once and then takes one scene at a time:
+opens it, applies the spec and saves it. Scenes are read from the list lazily
+into a bounded queue. A scene running longer than the timeout gets its worker
+killed and replaced, failed and timed out scenes are retried, and the run ends
+with a summary of every scene.
+
+    mayapy lightRunner.py rigs.json shots/*.ma --processes 4 --timeout 600 --retries 1
+
+Workers are pluggable: any picklable object with start(), run(scene, spec) returning
+a JSON friendly result and stop(). MayaWorker runs the scenes in mayapy,
+benchmarks/benchRunner.py drives the runner with a worker on the cmds stand-in.
+'''
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import traceback
+from collections import deque
+from timeit import default_timer
+
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+DONE = 'done'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+
+class MayaWorker(object):
+    '''
+    Opens each scene in mayapy, applies the spec and saves it over itself, or under
+    output % scene name if output is given. A scene with failed rigs is not saved.
+    '''
+
+    def __init__(self, output=None):
+        '''
+        :param output: string with one %s, the scene name without extension, 'lit/%s_lit.ma'
+        '''
+        self.output = output
+
+    def start(self):
+        import lightBatch
+        lightBatch.startMaya()
+
+    def run(self, scene, spec):
+        import os
+        import lightBatch
+        lightBatch.openScene(scene)
+        report = lightBatch.apply(spec)
+        if report['failed']:
+            raise RuntimeError('; '.join('%s: %s' % tuple(x) for x in report['failed']))
+        name = os.path.splitext(os.path.basename(scene))[0]
+        lightBatch.saveScene(self.output % name if self.output else None)
+        return report
+
+    def stop(self):
+        pass
+
+
+class SceneResult(object):
+    '''
+    Outcome of one scene
+    '''
+    __slots__ = ('scene', 'status', 'attempts', 'seconds', 'result', 'error')
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.status = None
+        self.attempts = 0
+        self.seconds = 0.0
+        self.result = None
+        self.error = None
+
+    def toDict(self):
+        return dict((x, getattr(self, x)) for x in self.__slots__)
+
+
+class Summary(object):
+    '''
+    Results of a run, in the order of the scenes
+    '''
+
+    def __init__(self, results, seconds):
+        self.results = results
+        self.seconds = seconds
+
+    def count(self, status):
+        return len([x for x in self.results if x.status == status])
+
+    @property
+    def ok(self):
+        return self.count(DONE) == len(self.results)
+
+    def report(self):
+        lines = ['%-8s %3s %9s  %s' % ('status', 'try', 'seconds', 'scene')]
+        for x in self.results:
+            lines.append('%-8s %3d %9.2f  %s%s' % (x.status, x.attempts, x.seconds, x.scene,
+                                                   '  (%s)' % x.error.strip().splitlines()[-1] if x.error else ''))
+        lines.append('%d scenes in %.1fs: %d done, %d failed, %d timed out' % (
+            len(self.results), self.seconds, self.count(DONE), self.count(FAILED), self.count(TIMEOUT)))
+        return '\n'.join(lines)
+
+    def toDict(self):
+        return {'seconds': self.seconds, 'scenes': [x.toDict() for x in self.results]}
+
+
+def _workerLoop(worker, inbox, outbox):
+    '''
+    Body of a worker process: one task from its inbox at a time, None stops it.
+    Results are tagged with the scene index and attempt of their task
+    '''
+    worker.start()
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+        index, attempt, scene, spec = task
+        try:
+            outbox.put((index, attempt, DONE, worker.run(scene, spec), None))
+        except Exception:
+            outbox.put((index, attempt, FAILED, None, traceback.format_exc()))
+    worker.stop()
+
+
+class _Slot(object):
+    '''
+    A worker process with its own inbox and outbox. Killing it can only corrupt its own
+    queues, which are dropped with it, and what it answered late is never read
+    '''
+
+    def __init__(self, worker):
+        self.inbox = multiprocessing.Queue()
+        self.outbox = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_workerLoop, args=(worker, self.inbox, self.outbox))
+        self.process.daemon = True
+        self.process.start()
+        self.task = None
+        self.started = None
+
+    def give(self, task):
+        self.task = task
+        self.started = default_timer()
+        self.inbox.put(task)
+
+    def result(self):
+        '''
+        Result of the running task, None if it has not answered yet
+        :return: (status, result, error) or None
+        '''
+        while True:
+            try:
+                index, attempt, status, result, error = self.outbox.get_nowait()
+            except Empty:
+                return None
+            #Only the task given last is waited for
+            if self.task is not None and (index, attempt) == self.task[:2]:
+                return status, result, error
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+
+    def close(self):
+        self.inbox.put(None)
+
+
+class Runner(object):
+    '''
+    Pool of worker processes applying a spec to scenes
+    '''
+
+    def __init__(self, worker, processes=None, timeout=600.0, retries=1, queueSize=None, log=None):
+        '''
+        :param worker: worker object, see the module docstring
+        :param processes: int, worker processes, the number of cpus by default
+        :param timeout: float, seconds a scene may run before its worker is killed
+        :param retries: int, extra attempts of a failed or timed out scene
+        :param queueSize: int, scenes read ahead of the workers, twice the processes by default
+        :param log: function called with a line of progress, nothing by default
+        '''
+        self.worker = worker
+        self.processes = processes or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.retries = retries
+        self.queueSize = queueSize or 2 * self.processes
+        self.log = log or (lambda line: None)
+
+    def run(self, scenes, spec):
+        '''
+        :param scenes: iterable of scene paths, read lazily
+        :param spec: dict, lightBatch spec
+        :return: Summary
+        '''
+        start = default_timer()
+        slots = [_Slot(self.worker) for _ in range(self.processes)]
+        sceneIter = iter(scenes)
+        exhausted = False
+        queue = deque()
+        sceneResults = []
+        pending = 0
+        try:
+            while True:
+                #Bounded read ahead, retries go first
+                while not exhausted and len(queue) < self.queueSize:
+                    try:
+                        scene = next(sceneIter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    sceneResults.append(SceneResult(scene))
+                    queue.append(len(sceneResults) - 1)
+                    pending += 1
+                if exhausted and not pending:
+                    break
+
+                for slot in slots:
+                    if slot.task is None and queue:
+                        index = queue.popleft()
+                        sceneResults[index].attempts += 1
+                        slot.give((index, sceneResults[index].attempts, sceneResults[index].scene, spec))
+
+                answered = False
+                for slot in slots:
+                    if slot.task is None:
+                        continue
+                    answer = slot.result()
+                    if answer is not None:
+                        index = slot.task[0]
+                        pending -= self.finish(sceneResults[index], answer[0], answer[1], answer[2],
+                                               default_timer() - slot.started, queue, index)
+                        slot.task = None
+                        answered = True
+                if not answered:
+                    time.sleep(0.02)
+
+                #Timed out or crashed workers are replaced
+                for i, slot in enumerate(slots):
+                    if slot.task is None:
+                        continue
+                    elapsed = default_timer() - slot.started
+                    if elapsed > self.timeout or not slot.process.is_alive():
+                        status = TIMEOUT if slot.process.is_alive() else FAILED
+                        slot.kill()
+                        index = slot.task[0]
+                        error = 'timed out after %.0fs' % self.timeout if status == TIMEOUT else 'worker died'
+                        pending -= self.finish(sceneResults[index], status, None, error, elapsed, queue, index)
+                        slots[i] = _Slot(self.worker)
+        finally:
+            for slot in slots:
+                if slot.task is None:
+                    slot.close()
+                else:
+                    slot.kill()
+            for slot in slots:
+                slot.process.join(5)
+        return Summary(sceneResults, default_timer() - start)
+
+    def finish(self, sceneResult, status, result, error, seconds, queue, index):
+        '''
+        Records an attempt, requeues the scene if it has retries left
+        :return: int, 1 if the scene is finished
+        '''
+        sceneResult.status = status
+        sceneResult.seconds += seconds
+        sceneResult.result = result
+        sceneResult.error = error
+        self.log('%s %s (attempt %d, %.2fs)' % (status, sceneResult.scene, sceneResult.attempts, seconds))
+        if status != DONE and sceneResult.attempts <= self.retries:
+            queue.appendleft(index)
+            return 0
+        return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('spec', help='JSON spec file, see lightBatch')
+    parser.add_argument('scenes', nargs='+', help='scene files')
+    parser.add_argument('--output', help="saves under this pattern instead of over the scenes, 'lit/%%s_lit.ma'")
+    parser.add_argument('--processes', type=int, help='worker processes, the number of cpus by default')
+    parser.add_argument('--timeout', type=float, default=600.0, help='seconds per scene')
+    parser.add_argument('--retries', type=int, default=1, help='extra attempts of a failed scene')
+    parser.add_argument('--json', help='also writes the summary to this file')
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    runner = Runner(MayaWorker(args.output), args.processes, args.timeout, args.retries,
+                    log=lambda line: sys.stdout.write(line + '\n'))
+    summary = runner.run(args.scenes, spec)
+    sys.stdout.write(summary.report() + '\n')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary.toDict(), f, indent=2)
+    return 0 if summary.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
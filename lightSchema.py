@@ -0,0 +1,112 @@
+'''
+Attribute schema cache shared by every RigWidget.
+
+Existence, type, limits and soft limits of an attribute the node type has are
+the same for every node of that type, so they are queried once per node type
+and reused by all the rigs instead of calling cmd.attributeQuery for each light
+on every edit. Attributes added to some nodes by hand (addAttr) are not on the
+type, whether a node has one is checked on the node every time.
+'''
+from maya import cmds as cmd
+
+
+class AttrInfo(object):
+    '''
+    Schema of one attribute on one node type, limits are None when not set
+    '''
+    __slots__ = ('exists', 'type', 'min', 'max', 'softMin', 'softMax')
+
+    def __init__(self, exists=False, type=None, min=None, max=None, softMin=None, softMax=None):
+        self.exists = exists
+        self.type = type
+        self.min = min
+        self.max = max
+        self.softMin = softMin
+        self.softMax = softMax
+
+    def __repr__(self):
+        return 'AttrInfo(exists=%r, type=%r, min=%r, max=%r, softMin=%r, softMax=%r)' % (
+            self.exists, self.type, self.min, self.max, self.softMin, self.softMax)
+
+
+class AttrSchema(object):
+    '''
+    Cache of AttrInfo keyed by node type and attribute name.
+    Entries of the attributes of a type are filled from the first node of the type that asks for them,
+    the attributes the type does not have are cached as None and looked up on each node.
+    '''
+
+    def __init__(self):
+        self._cache = {}
+
+    def _typeInfo(self, nodeType, attr, node):
+        #Cached AttrInfo of an attribute of the type, None if the type does not have it
+        attrs = self._cache.setdefault(nodeType, {})
+        try:
+            return attrs[attr]
+        except KeyError:
+            onType = bool(attr) and cmd.attributeQuery(attr, type=nodeType, exists=True)
+            info = attrs[attr] = self._query(attr, node) if onType else None
+            return info
+
+    def info(self, nodeType, attr, node):
+        '''
+        Returns the schema of attr on node
+        :param nodeType: string, node type of node
+        :param attr: string
+        :param node: string, a node of nodeType, the one asked about for attributes added by hand
+        :return: AttrInfo
+        '''
+        info = self._typeInfo(nodeType, attr, node)
+        if info is not None:
+            return info
+        return self._query(attr, node) if cmd.objExists('%s.%s' % (node, attr)) else AttrInfo()
+
+    def exists(self, nodeType, attr, node):
+        '''
+        True if node has attr, from the cache when its type has it
+        '''
+        return self._typeInfo(nodeType, attr, node) is not None or cmd.objExists('%s.%s' % (node, attr))
+
+    def nodesWith(self, nodeType, attr, nodes):
+        '''
+        Nodes of one type that have attr, all of them when the type has it, otherwise checked one by one
+        :param nodes: list of nodes of nodeType
+        :return: list
+        '''
+        if not nodes:
+            return []
+        if self._typeInfo(nodeType, attr, nodes[0]) is not None:
+            return list(nodes)
+        return [x for x in nodes if cmd.objExists('%s.%s' % (x, attr))]
+
+    def invalidate(self, attr=None, nodeType=None):
+        '''
+        Drops cached entries, all of them by default.
+        Attributes added by hand are not cached, only new node types (plugins loaded again) need it.
+        :param attr: string, only drops this attribute
+        :param nodeType: string, only drops this node type
+        '''
+        types = [nodeType] if nodeType else list(self._cache)
+        for t in types:
+            if attr is None:
+                self._cache.pop(t, None)
+            else:
+                self._cache.get(t, {}).pop(attr, None)
+
+    @staticmethod
+    def _query(attr, node):
+        if not attr or not cmd.attributeQuery(attr, node=node, exists=True):
+            return AttrInfo()
+
+        info = AttrInfo(True, cmd.attributeQuery(attr, node=node, attributeType=True))
+        limits = [('min', 'minExists', 'minimum'), ('max', 'maxExists', 'maximum'),
+                  ('softMin', 'softMinExists', 'softMin'), ('softMax', 'softMaxExists', 'softMax')]
+        for field, existsFlag, valueFlag in limits:
+            if cmd.attributeQuery(attr, node=node, **{existsFlag: True}):
+                setattr(info, field, cmd.attributeQuery(attr, node=node, **{valueFlag: True})[0])
+        return info
+
+
+#Shared by all the RigWidgets
+schema = AttrSchema()
@@ -0,0 +1,132 @@
+'''
+Write-behind mirror of the attribute values of a rig.
+
+RigState keeps the last known value of each light attribute the panel has
+touched, in the columns of the lightModel.RigModel of the rig. Reads come from
+the mirror, the scene is only queried the first time an attribute is used or
+when it is revalidated. Writes update the mirror and
+mark the lights whose value actually changes as dirty, flush writes only those,
+so lights already holding the value cost nothing.
+
+The mirror does not see edits made outside the panel, callers revalidate an
+attribute before an edit starts (a slider being pressed, a column being added).
+'''
+from collections import OrderedDict
+
+import lightModel
+import lightTransaction
+
+
+class RigState(object):
+    '''
+    Attribute values of the lights of one rig
+    '''
+
+    def __init__(self, name='', model=None):
+        '''
+        :param name: string, rig name, used for the undo chunk names
+        :param model: lightModel.RigModel the values are cached in, shared with the panel,
+            an empty one that takes the lights as they come by default
+        '''
+        self.name = name
+        self.model = model if model is not None else lightModel.RigModel(name)
+        #(row, attr) pairs changed in the mirror and not written yet
+        self.dirty = OrderedDict()
+        self.written = 0
+        self.skipped = 0
+
+    def load(self, attr, lights):
+        '''
+        Reads the attribute of the lights missing in the mirror
+        :return: list, rows of the lights in the model
+        '''
+        rows = self.model.rows(lights, add=True)
+        self.model.load(attr, rows)
+        return rows
+
+    def get(self, attr, lights):
+        '''
+        Mirrored values of the lights
+        :param attr: string
+        :param lights: list, light nodes that have the attribute
+        :return: list
+        '''
+        return self.model.read(attr, self.model.rows(lights, add=True))
+
+    def value(self, attr, lights, default=0.0):
+        '''
+        Mirrored value of the first light, default if there are no lights
+        '''
+        return self.get(attr, lights[:1])[0] if lights else default
+
+    def set(self, attr, value, lights):
+        '''
+        Changes the mirror, only the lights whose value differs are marked dirty
+        :return: int, number of lights marked
+        '''
+        return self._mark(attr, self.model.assign(attr, value, self.load(attr, lights)), len(lights))
+
+    def setEach(self, attr, values, lights):
+        '''
+        Like set with one value per light, values can be a NumPy array
+        '''
+        return self._mark(attr, self.model.assignEach(attr, values, self.load(attr, lights)), len(lights))
+
+    def _mark(self, attr, changed, count):
+        for row, value in changed:
+            self.dirty[(row, attr)] = value
+        self.skipped += count - len(changed)
+        return len(changed)
+
+    def flush(self):
+        '''
+        Writes the dirty values in one transaction, the mirror of their attributes is dropped if it fails.
+        Inside a running transaction the writes are applied with it, so is the mirror dropped if it fails.
+        '''
+        dirty, self.dirty = self.dirty, OrderedDict()
+        if not dirty:
+            return
+        attrs = set(attr for row, attr in dirty)
+        self.written += len(dirty)
+        with lightTransaction.transaction('lightRigger %s' % self.name) as transaction:
+            transaction.onRollback(lambda: self.dropped(attrs, len(dirty)))
+            for (row, attr), value in dirty.items():
+                plug = '%s.%s' % (self.model.node(row, attr), attr)
+                if isinstance(value, (list, tuple)):
+                    transaction.setAttr(plug, *value)
+                else:
+                    transaction.setAttr(plug, value)
+
+    def dropped(self, attrs, count):
+        #The transaction the writes were in was rolled back, the scene has the values again
+        self.written -= count
+        self.revalidate(attrs)
+
+    def write(self, attr, value, lights):
+        '''
+        set and flush together
+        '''
+        self.set(attr, value, lights)
+        self.flush()
+
+    def writeEach(self, attr, values, lights):
+        '''
+        setEach and flush together
+        '''
+        self.setEach(attr, values, lights)
+        self.flush()
+
+    def revalidate(self, attrs=None):
+        '''
+        Forgets mirrored values so the next read comes from the scene, pending writes are kept
+        :param attrs: list of attributes, all by default
+        '''
+        self.model.invalidate(attrs)
+        #Values still to be written stay in the mirror
+        for (row, attr), value in self.dirty.items():
+            self.model.assign(attr, value, [row])
+
+    def report(self):
+        total = self.written + self.skipped
+        ratio = 100.0 * self.skipped / total if total else 0.0
+        return '%d light writes, %d skipped as unchanged (%.1f%%)' % (self.written, self.skipped, ratio)
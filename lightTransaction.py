@@ -0,0 +1,165 @@
+'''
+Transactional attribute writes.
+
+setAttr calls made on a transaction are queued instead of applied, a plug written
+several times keeps only its last value. When the outermost transaction ends the
+queue is applied in a single MEL batch, and everything done inside it, queued
+writes and any other command, is one undo chunk. If something fails the
+transaction is rolled back: the chunk is undone when undo is on, otherwise the
+previous values of the written plugs are restored.
+
+    with lightTransaction.transaction('lightRigger intensity') as t:
+        for light in lights:
+            t.setAttr('%s.intensity' % light, 2)
+
+Transactions opened while another one is running join it, a failure in a joined
+one rolls the whole transaction back. Code keeping state about the writes (the
+mirrors of lightState) registers onRollback callbacks to drop it then, the writes
+of a joined transaction are only applied when the one it joined is.
+'''
+from collections import OrderedDict
+
+from maya import cmds as cmd
+from maya import mel
+
+import lightNodes
+
+#Running transactions, the outermost first
+_active = []
+
+
+def current():
+    '''
+    Running transaction, None outside of one
+    '''
+    return _active[0] if _active else None
+
+
+def transaction(name='lightRigger'):
+    '''
+    Transaction to use in a with statement, the running one if there is any
+    :param name: string, undo chunk name
+    :return: Transaction
+    '''
+    return current() or Transaction(name)
+
+
+def _script(writes):
+    return ''.join('setAttr "%s" %s;' % (plug, lightNodes.melValue(value)) for plug, value in writes.items())
+
+
+class Transaction(object):
+    '''
+    Queue of attribute writes applied together, see the module docstring
+    '''
+
+    def __init__(self, name='lightRigger'):
+        self.name = name
+        self.pending = OrderedDict()
+        self.previous = OrderedDict()
+        self.depth = 0
+        self.undoable = False
+        self.chunkName = name
+        #Called after a rollback
+        self.rollbackCallbacks = []
+        self.written = 0
+        self.merged = 0
+
+    def __enter__(self):
+        if not self.depth:
+            self.begin()
+        self.depth += 1
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.depth -= 1
+        #Already rolled back by a failure in a joined transaction
+        if self not in _active:
+            return False
+        if excType is not None:
+            self.rollback()
+        elif not self.depth:
+            self.commit()
+        return False
+
+    def onRollback(self, callback):
+        '''
+        Calls callback if the transaction is rolled back, after the scene is restored
+        :param callback: function without arguments
+        '''
+        self.rollbackCallbacks.append(callback)
+
+    def setAttr(self, plug, *values):
+        '''
+        Queues a write, replacing the queued one of the same plug
+        :param plug: string, 'node.attr'
+        :param values: the value, or the components of a compound 'node.translate', x, y, z
+        '''
+        if plug in self.pending:
+            self.merged += 1
+            del self.pending[plug]
+        self.pending[plug] = values[0] if len(values) == 1 else values
+
+    def begin(self):
+        _active.append(self)
+        self.pending = OrderedDict()
+        self.previous = OrderedDict()
+        self.rollbackCallbacks = []
+        self.undoable = bool(cmd.undoInfo(q=True, state=True))
+        if self.undoable:
+            #rollback tells its chunk from the previous undo entry by name
+            self.chunkName = self.name
+            if cmd.undoInfo(q=True, undoName=True) == self.name:
+                self.chunkName = '%s (again)' % self.name
+            cmd.undoInfo(openChunk=True, chunkName=self.chunkName)
+
+    def flush(self):
+        '''
+        Applies the queued writes in one MEL batch
+        '''
+        pending, self.pending = self.pending, OrderedDict()
+        if not pending:
+            return
+        #Without undo the current values are the only way back
+        if not self.undoable:
+            for plug in pending:
+                if plug not in self.previous:
+                    self.previous[plug] = lightNodes.plainValue(cmd.getAttr(plug))
+        mel.eval(_script(pending))
+        self.written += len(pending)
+
+    def commit(self):
+        try:
+            self.flush()
+        except Exception:
+            self.rollback()
+            raise
+        self.rollbackCallbacks = []
+        self.end()
+
+    def rollback(self):
+        '''
+        Drops the queued writes and takes back what the transaction already did
+        '''
+        self.pending = OrderedDict()
+        previous, self.previous = self.previous, OrderedDict()
+        callbacks, self.rollbackCallbacks = self.rollbackCallbacks, []
+        undoable = self.undoable
+        self.end()
+        try:
+            if undoable:
+                #Maya does not queue empty chunks, undoing then would take back the user's previous action
+                if cmd.undoInfo(q=True, undoName=True) == self.chunkName:
+                    cmd.undo()
+            elif previous:
+                mel.eval(_script(previous))
+        finally:
+            for callback in callbacks:
+                callback()
+
+    def end(self):
+        if self in _active:
+            _active.remove(self)
+        if self.undoable:
+            cmd.undoInfo(closeChunk=True)
+            self.undoable = False
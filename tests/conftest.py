@@ -0,0 +1,15 @@
+'''
+The tests run without Maya: the modules are imported from the repository and
+maya.cmds is the recording stand-in of the benchmarks, installed before any of
+them does "from maya import cmds".
+'''
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+sys.path.insert(0, ROOT)
+
+import cmdsStandIn
+
+cmdsStandIn.install()
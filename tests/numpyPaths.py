@@ -0,0 +1,46 @@
+'''
+Test cases run on the NumPy path and on the pure python path of the modules.
+
+A case lists the modules it covers, its pure python twin sets their np to None:
+
+    class LayoutTest(numpyPaths.NumpyCase):
+        modules = [lightPlacement]
+
+    class LayoutPureTest(LayoutTest):
+        useNumpy = False
+'''
+import unittest
+
+
+class NumpyCase(unittest.TestCase):
+    '''
+    Runs its tests with NumPy, skipped when it is not installed
+    '''
+    #Modules whose np is set to None on the pure python path
+    modules = []
+    useNumpy = True
+
+    def setUp(self):
+        if self.useNumpy:
+            if any(module.np is None for module in self.modules):
+                self.skipTest('NumPy is not installed')
+            return
+        for module in self.modules:
+            self.addCleanup(setattr, module, 'np', module.np)
+            module.np = None
+
+    def assertRowsAlmostEqual(self, first, second, places=6):
+        '''
+        Compares two lists of rows (or NumPy arrays) value by value
+        '''
+        first = first.tolist() if hasattr(first, 'tolist') else first
+        second = second.tolist() if hasattr(second, 'tolist') else second
+        self.assertEqual(len(first), len(second))
+        for a, b in zip(first, second):
+            a = a.tolist() if hasattr(a, 'tolist') else a
+            b = b.tolist() if hasattr(b, 'tolist') else b
+            a = list(a) if isinstance(a, (list, tuple)) else [a]
+            b = list(b) if isinstance(b, (list, tuple)) else [b]
+            self.assertEqual(len(a), len(b))
+            for x, y in zip(a, b):
+                self.assertAlmostEqual(x, y, places=places)
@@ -0,0 +1,95 @@
+from maya import cmds
+
+import lightBake
+import lightNodes
+import numpyPaths
+from lightSchema import schema
+
+RAMP = {'type': 'ramp', 'startFrame': 1.0, 'endFrame': 5.0, 'startValue': 0.0, 'endValue': 2.0}
+
+
+def _rows(values):
+    return values.tolist() if hasattr(values, 'tolist') else values
+
+
+class KeyValuesTest(numpyPaths.NumpyCase):
+    modules = [lightBake]
+
+    def testFrameRange(self):
+        self.assertEqual(lightBake.frameRange(1, 3, 0.5), [1.0, 1.5, 2.0, 2.5, 3.0])
+        self.assertEqual(lightBake.frameRange(1, 2.9), [1, 2])
+        self.assertEqual(lightBake.frameRange(5, 1), [])
+
+    def testConstant(self):
+        self.assertRowsAlmostEqual(lightBake.keyValues({'type': 'constant', 'value': 3.0}, [1, 2, 3], 2),
+                                   [[3, 3, 3], [3, 3, 3]])
+
+    def testRampClampedAndShifted(self):
+        values = lightBake.keyValues(RAMP, [0, 1, 3, 5, 6], 2, offset=1.0)
+        self.assertRowsAlmostEqual(values, [[0, 0, 1, 2, 2], [0, 0.5, 1.5, 2, 2]])
+        values = lightBake.keyValues(RAMP, [3], 3, offset=[0.0, -2.0, 2.0])
+        self.assertRowsAlmostEqual(values, [[1], [0], [2]])
+
+    def testNoise(self):
+        source = {'type': 'noise', 'base': 1.0, 'amplitude': 0.5, 'frequency': 0.3, 'seed': 2}
+        frames = lightBake.frameRange(1, 40)
+        values = _rows(lightBake.keyValues(source, frames, 3))
+        self.assertEqual(values, _rows(lightBake.keyValues(source, frames, 3)))
+        for row in values:
+            self.assertTrue(all(0.5 <= x <= 1.5 for x in row))
+            self.assertGreater(len(set(row)), 1)
+        #Every light flickers on its own
+        self.assertNotEqual(values[0], values[1])
+        #Smooth between the lattice points, no jump bigger than the amplitude range over a frame
+        self.assertTrue(all(abs(a - b) < 1.0 for a, b in zip(values[0], values[0][1:])))
+
+
+class KeyValuesPureTest(KeyValuesTest):
+    useNumpy = False
+
+
+class BakeTest(numpyPaths.NumpyCase):
+    modules = [lightBake]
+
+    def setUp(self):
+        super(BakeTest, self).setUp()
+        cmds.clear()
+        schema.invalidate()
+        self.lights = list(lightNodes.createLights('pointLight', 2, 'bake%d').keys())
+
+    def keys(self, light, channel):
+        curve = cmds.listConnections('%s.%s' % (light, channel), s=True, d=False)[0]
+        return [list(x) for x in cmds.getAttr('%s.ktv' % curve)[0]]
+
+    def testKeyValues(self):
+        count = lightBake.bake(self.lights, ['intensity'], 1, 5, RAMP, offset=2.0, step=2.0)
+        self.assertEqual(count, 6)
+        self.assertRowsAlmostEqual(self.keys(self.lights[0], 'intensity'), [[1, 0], [3, 1], [5, 2]])
+        self.assertRowsAlmostEqual(self.keys(self.lights[1], 'intensity'), [[1, 1], [3, 2], [5, 2]])
+
+    def testReplacesAnimation(self):
+        lightBake.bake(self.lights, ['intensity'], 1, 5, RAMP)
+        lightBake.bake(self.lights, ['intensity'], 1, 2, {'type': 'constant', 'value': 4.0})
+        self.assertEqual(len(cmds.listConnections('%s.intensity' % self.lights[0], s=True, d=False)), 1)
+        self.assertRowsAlmostEqual(self.keys(self.lights[0], 'intensity'), [[1, 4], [2, 4]])
+
+    def testColorScalesEachLight(self):
+        cmds.setAttr('%s.color' % self.lights[0], 1.0, 0.0, 0.0)
+        cmds.setAttr('%s.color' % self.lights[1], 0.0, 0.5, 1.0)
+        count = lightBake.bake(self.lights, ['color'], 1, 5, RAMP, step=4.0)
+        self.assertEqual(count, 12)
+        expected = [[[1, 0], [5, 2]], [[1, 0], [5, 0]], [[1, 0], [5, 0]],
+                    [[1, 0], [5, 0]], [[1, 0], [5, 1]], [[1, 0], [5, 2]]]
+        keyed = [self.keys(light, channel) for light in self.lights for channel in lightBake.CHANNELS['color']]
+        for keys, values in zip(keyed, expected):
+            self.assertRowsAlmostEqual(keys, values)
+
+    def testColorFromBases(self):
+        lightBake.bake(self.lights, ['color'], 1, 1, {'type': 'constant', 'value': 0.5},
+                       bases={'color': [(1.0, 1.0, 1.0), (0.0, 0.0, 4.0)]})
+        self.assertRowsAlmostEqual(self.keys(self.lights[1], 'colorB'), [[1, 2]])
+        self.assertRowsAlmostEqual(self.keys(self.lights[1], 'colorR'), [[1, 0]])
+
+
+class BakePureTest(BakeTest):
+    useNumpy = False
@@ -0,0 +1,118 @@
+from maya import cmds
+
+import lightCore
+import lightQuery
+import lightTransaction
+import numpyPaths
+from lightSchema import schema
+
+import unittest
+
+
+class AimRigTest(numpyPaths.NumpyCase):
+    modules = [lightCore.lightPlacement, lightCore.lightModel]
+
+    def setUp(self):
+        super(AimRigTest, self).setUp()
+        cmds.clear()
+        schema.invalidate()
+        self.rig, _ = lightCore.createRig('aimed', 'spotLight', 4, 'Distance')
+        self.info = lightCore.rigInfo(self.rig)
+        self.rows = list(range(len(self.info)))
+
+    def sceneRotates(self):
+        return [cmds.getAttr('%s.rotate' % x)[0] for x in self.info.values()]
+
+    def testBakedAimKeepsTheCache(self):
+        before = self.sceneRotates()
+        self.info.read('rotate', self.rows)
+        lightCore.setAim('aimed', self.info, True, [10.0, 3.0, 2.0], 'bake')
+        self.assertNotEqual(self.sceneRotates(), before)
+        self.assertRowsAlmostEqual(self.info.read('rotate', self.rows), self.sceneRotates())
+
+        cmds.setAttr('%s.translate' % lightCore.aimLocator('aimed'), -5.0, 0.0, 0.0)
+        self.assertTrue(lightCore.updateAim('aimed', self.info))
+        self.assertRowsAlmostEqual(self.info.read('rotate', self.rows), self.sceneRotates())
+
+        #Turned off, the rotations come back and the cache reads them again
+        lightCore.setAim('aimed', self.info, False)
+        self.assertRowsAlmostEqual(self.sceneRotates(), before)
+        self.assertRowsAlmostEqual(self.info.read('rotate', self.rows), before)
+
+    def testQueriesSeeTheAim(self):
+        index = lightQuery.LightIndex([(self.rig, self.info)])
+        self.assertEqual(index.query('rotateY > 0'), {})
+        lightCore.setAim('aimed', self.info, True, [0.0, 0.0, -10.0], 'bake')
+        self.assertEqual(len(index.query('rotateY == 0')[self.rig]), 4)
+
+    def testConstraintAimDropsTheCache(self):
+        self.info.read('rotate', self.rows)
+        lightCore.setAim('aimed', self.info, True, [10.0, 3.0, 2.0], 'constraint')
+        self.assertNotIn('rotate', self.info.columns)
+        self.assertRowsAlmostEqual(self.info.read('rotate', self.rows), self.sceneRotates())
+
+    def testDeleteBakedRig(self):
+        lightCore.setAim('aimed', self.info, True, [10.0, 3.0, 2.0], 'bake')
+        lightCore.deleteRig(self.rig)
+        self.assertFalse(cmds.objExists(self.rig))
+        self.assertFalse(cmds.objExists(lightCore.aimLocator('aimed')))
+        self.assertEqual(cmds.ls(type='spotLight'), [])
+
+    def testUnknownMode(self):
+        self.assertRaises(ValueError, lightCore.setAim, 'aimed', self.info, True, None, 'spin')
+        self.assertFalse(cmds.objExists(lightCore.aimLocator('aimed')))
+
+
+class AimRigPureTest(AimRigTest):
+    useNumpy = False
+
+
+class RigBuilderTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.clear()
+        schema.invalidate()
+        self.builder = lightCore.RigBuilder('built', 'pointLight', 10, 'Distance')
+        self.builder.chunk = 4
+
+    def testEachStepIsItsOwnTransaction(self):
+        cmds.undoEnabled = True
+        self.addCleanup(setattr, cmds, 'undoEnabled', False)
+        self.assertEqual(len(self.builder.step()), 4)
+        self.assertIsNone(lightTransaction.current())
+        self.assertEqual(cmds.undoChunks, [])
+
+        #An edit failing between two steps takes back its own writes only
+        with self.assertRaises(RuntimeError):
+            with lightTransaction.transaction('lightRigger intensity') as transaction:
+                transaction.setAttr('built0Shape.intensity', 3.0)
+                raise RuntimeError('failed')
+        self.assertTrue(cmds.objExists(self.builder.rig))
+
+        while not self.builder.done:
+            self.builder.step()
+        self.assertEqual(len(cmds.listRelatives(self.builder.rig)), 10)
+        self.assertIsNone(lightTransaction.current())
+        self.assertEqual(cmds.undoChunks, [])
+        self.assertGreater(cmds.undoQueue.count('lightRigger createRig') +
+                           cmds.undoQueue.count('lightRigger createRig (again)'), 1)
+
+    def testCancelDeletesWhatWasCreated(self):
+        self.builder.step()
+        rig = self.builder.rig
+        #Moved out of the group while the rig was being built
+        cmds.parent('built1', w=True)
+        self.builder.cancel()
+        self.assertTrue(self.builder.done)
+        self.assertFalse(cmds.objExists(rig))
+        self.assertEqual(cmds.ls(type='pointLight'), [])
+        self.assertEqual(self.builder.step(), [])
+
+    def testFailingStepCancels(self):
+        self.builder.step()
+        rig = self.builder.rig
+        self.builder.lightType = 'not a type'
+        self.assertRaises(ValueError, self.builder.step)
+        self.assertTrue(self.builder.done)
+        self.assertFalse(cmds.objExists(rig))
+        self.assertEqual(cmds.ls(type='pointLight'), [])
@@ -0,0 +1,68 @@
+import lightGradient
+import numpyPaths
+
+POSITIONS = [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [4.0, 0.0, 0.0]]
+
+
+class GradientTest(numpyPaths.NumpyCase):
+    modules = [lightGradient]
+
+    def testLinearParameters(self):
+        self.assertRowsAlmostEqual(lightGradient.parameters(POSITIONS, 'linear', 'x'), [0.0, 0.25, 1.0])
+        #The longest side of the lights is x
+        self.assertRowsAlmostEqual(lightGradient.parameters(POSITIONS, 'linear', 'auto'), [0.0, 0.25, 1.0])
+        self.assertRowsAlmostEqual(lightGradient.parameters(POSITIONS, 'linear', [-1.0, 0.0, 0.0]), [1.0, 0.75, 0.0])
+
+    def testRadialParameters(self):
+        self.assertRowsAlmostEqual(lightGradient.parameters(POSITIONS, 'radial', center=[0.0, 0.0, 0.0]),
+                                   [0.0, 0.25, 1.0])
+        #Around the middle of the lights by default
+        self.assertRowsAlmostEqual(lightGradient.parameters(POSITIONS, 'radial'), [5.0 / 7.0, 2.0 / 7.0, 1.0])
+
+    def testSamePositions(self):
+        self.assertRowsAlmostEqual(lightGradient.parameters([[1.0, 1.0, 1.0]] * 2), [0.0, 0.0])
+
+    def testRamp(self):
+        colors = lightGradient.colors({'type': 'ramp', 'start': [1.0, 0.0, 0.0], 'end': [0.0, 0.0, 1.0], 'axis': 'x'},
+                                      POSITIONS)
+        self.assertRowsAlmostEqual(colors, [[1, 0, 0], [0.75, 0, 0.25], [0, 0, 1]])
+
+    def testKelvin(self):
+        self.assertRowsAlmostEqual(lightGradient.kelvin([6600.0, 1900.0, 100000.0]),
+                                   [[1.0, 1.0, 1.0], [1.0, 0.5167, 0.0], lightGradient.kelvin([40000.0])[0]],
+                                   places=3)
+        colors = lightGradient.colors({'type': 'kelvin', 'start': 1900, 'end': 6600, 'axis': 'x'}, POSITIONS)
+        self.assertRowsAlmostEqual([colors[0], colors[-1]], [[1.0, 0.5167, 0.0], [1.0, 1.0, 1.0]], places=3)
+
+    def testJitter(self):
+        gradient = {'type': 'ramp', 'start': [0.5, 0.5, 0.5], 'end': [0.5, 0.5, 0.5], 'jitter': 0.1, 'seed': 4}
+        colors = lightGradient.colors(gradient, POSITIONS)
+        self.assertRowsAlmostEqual(colors, lightGradient.colors(gradient, POSITIONS))
+        values = [x for color in (colors.tolist() if hasattr(colors, 'tolist') else colors) for x in color]
+        self.assertTrue(all(0.45 <= x < 0.55 for x in values))
+        self.assertGreater(len(set(values)), 1)
+        self.assertNotEqual(values, [x for color in lightGradient.colors(dict(gradient, seed=5), POSITIONS)
+                                     for x in color])
+
+    def testErrors(self):
+        self.assertRaises(ValueError, lightGradient.colors, {'type': 'hsv'}, POSITIONS)
+        self.assertRaises(ValueError, lightGradient.parameters, POSITIONS, 'spiral')
+
+
+class GradientPureTest(GradientTest):
+    useNumpy = False
+
+
+class PathsTest(numpyPaths.NumpyCase):
+    modules = [lightGradient]
+
+    def testSameValues(self):
+        #The jitter hash gives the same values with NumPy and with math
+        gradient = {'type': 'kelvin', 'start': 3000, 'end': 9000, 'shape': 'radial', 'jitter': 0.2, 'seed': 7}
+        positions = [[float(i), float(i % 3), float(i * i % 5)] for i in range(20)]
+        colors = lightGradient.colors(gradient, positions)
+        np, lightGradient.np = lightGradient.np, None
+        try:
+            self.assertRowsAlmostEqual(colors, lightGradient.colors(gradient, positions))
+        finally:
+            lightGradient.np = np
@@ -0,0 +1,60 @@
+from maya import cmds
+
+import lightCore
+import lightNodes
+
+import unittest
+
+
+class CreateLightsTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.clear()
+        cmds.stats.reset()
+
+    def testOneBatch(self):
+        group = cmds.group(empty=True, n='grp')
+        values = [{'translate': [1.0, 2.0, 3.0], 'intensity': 4.0}, {'color': [0.0, 0.5, 1.0]}]
+        lights = lightNodes.createLights('spotLight', 2, 'key%d', 0, values, group)
+        self.assertEqual(list(lights.items()), [('key0Shape', 'key0'), ('key1Shape', 'key1')])
+        self.assertEqual(cmds.stats.calls['mel.eval'], 1)
+        self.assertEqual(cmds.objectType('key0Shape'), 'spotLight')
+        self.assertEqual(cmds.listRelatives('key1', p=True), ['grp'])
+        self.assertEqual(cmds.getAttr('key0.translate'), [(1.0, 2.0, 3.0)])
+        self.assertEqual(cmds.getAttr('key0Shape.intensity'), 4.0)
+        self.assertEqual(cmds.getAttr('key1Shape.color'), [(0.0, 0.5, 1.0)])
+        self.assertEqual(cmds.setMembers[lightNodes.LIGHT_SET], ['key0', 'key1'])
+
+    def testNamesInUseAreSkipped(self):
+        cmds.group(empty=True, n='fill1')
+        cmds.group(empty=True, n='fill2Shape')
+        lights = lightNodes.createLights('pointLight', 3, 'fill%d')
+        self.assertEqual(list(lights.values()), ['fill0', 'fill3', 'fill4'])
+        self.assertEqual(lightNodes.createLights('pointLight', 0), {})
+
+    def testRefusedBeforeAnythingIsCreated(self):
+        cmds.group(empty=True, n='grp')
+        for args in [('spotLight;sphere', 1, 'a%d'), ('spotLight', 1, 'x";system("touch /tmp/pwn");//%d'),
+                     ('spotLight', 1, 'my rig%d'), ('spotLight', 1, '100%%%d'), ('spotLight', 1, 'noNumber'),
+                     ('spotLight', 1, 'a%d', 0, None, 'grp"; sphere; "')]:
+            self.assertRaises(ValueError, lightNodes.createLights, *args)
+        self.assertNotIn('mel.eval', cmds.stats.calls)
+        lightNodes.createLights('spotLight', 1, 'a%d', 0, None, '|grp')
+        self.assertEqual(cmds.listRelatives('a0', p=True), ['grp'])
+
+    def testRigNames(self):
+        for name in ['x";system("touch /tmp/pwn");//', 'my rig', '50%', '', None]:
+            self.assertRaises(ValueError, lightCore.createRig, name, 'spotLight', 2)
+            self.assertRaises(ValueError, lightCore.RigBuilder, name, 'spotLight', 2)
+        self.assertNotIn('mel.eval', cmds.stats.calls)
+        self.assertEqual(cmds.ls(type='spotLight'), [])
+        rig, _ = lightCore.createRig('ok_2', 'spotLight', 2)
+        self.assertRaises(ValueError, lightCore.createRig, 'ok_2', 'spotLight', 2)
+        self.assertRaises(ValueError, lightCore.rigFromLights, 'bad name', ['ok_20'])
+
+    def testParents(self):
+        cmds.group(empty=True, n='grp')
+        lights = lightNodes.createLights('pointLight', 2, 'p%d', 0, None, 'grp')
+        cmds.parent(cmds.spaceLocator(n='loc')[0], 'grp')
+        shapes = cmds.listRelatives(cmds.listRelatives('grp'), type='pointLight')
+        self.assertEqual(lightNodes.parentsOf(shapes), list(lights.values()))
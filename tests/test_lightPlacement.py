@@ -0,0 +1,135 @@
+import math
+
+import lightPlacement
+import numpyPaths
+
+
+def _rotationRows(rotate):
+    #Rows of the XYZ euler rotation in degrees, Maya's row vector convention
+    x, y, z = [math.radians(v) for v in rotate]
+    cx, sx, cy, sy, cz, sz = math.cos(x), math.sin(x), math.cos(y), math.sin(y), math.cos(z), math.sin(z)
+    return [[cy * cz, cy * sz, -sy],
+            [sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy],
+            [cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy]]
+
+
+def _facing(rotate, parentRows=None):
+    #World direction of -Z of a rotation, under a parent rotation if given
+    rows = _rotationRows(rotate)
+    if parentRows:
+        rows = [[sum(row[k] * parentRows[k][j] for k in range(3)) for j in range(3)] for row in rows]
+    return [-v for v in rows[2]]
+
+
+def _unit(vector):
+    length = math.sqrt(sum(v * v for v in vector))
+    return [v / length for v in vector]
+
+
+class LayoutTest(numpyPaths.NumpyCase):
+    modules = [lightPlacement]
+
+    def testLine(self):
+        layout = lightPlacement.line([0.0, 0.0, 0.0], [0.0, 0.0, 5.0], 3)
+        self.assertEqual(len(layout), 3)
+        self.assertRowsAlmostEqual(layout.translates, [[0, 0, 0], [0, 0, 5], [0, 0, 10]])
+        #+X along the line
+        self.assertRowsAlmostEqual(layout.rotates, [[0, -90, 0]] * 3)
+
+    def testRingFacesCenter(self):
+        layout = lightPlacement.ring([0.0, 0.0, 0.0], [2.0, 1.0, 0.0], 4)
+        self.assertRowsAlmostEqual(layout.translates, [[2, 1, 0], [0, 1, 2], [-2, 1, 0], [0, 1, -2]])
+        for translate, rotate in layout:
+            self.assertRowsAlmostEqual([_facing(rotate)], [_unit([-translate[0], 0.0, -translate[2]])])
+
+    def testGrid(self):
+        layout = lightPlacement.grid([0.0, 0.0, 0.0], [2.0, 2.0, 2.0], 4)
+        self.assertRowsAlmostEqual(layout.translates, [[0, 0, 0], [2, 0, 0], [0, 2, 2], [2, 2, 2]])
+        self.assertRowsAlmostEqual(layout.rotates, [[-90, 0, 0]] * 4)
+
+    def testGridPartialRow(self):
+        layout = lightPlacement.grid([0.0, 0.0, 0.0], [2.0, 0.0, 2.0], 3)
+        self.assertRowsAlmostEqual(layout.translates, [[0, 0, 0], [2, 0, 0], [0, 0, 2]])
+
+    def testSphereAndDome(self):
+        center = [1.0, 2.0, 3.0]
+        for dome in (False, True):
+            layout = lightPlacement.sphere(center, [1.0, 2.0, 6.0], 50, dome)
+            self.assertEqual(len(layout), 50)
+            for translate, rotate in layout:
+                offset = [t - c for t, c in zip(translate, center)]
+                self.assertAlmostEqual(math.sqrt(sum(v * v for v in offset)), 3.0)
+                self.assertRowsAlmostEqual([_facing(rotate)], [_unit([-v for v in offset])])
+                if dome:
+                    self.assertGreaterEqual(offset[1], 0.0)
+
+    def testCurveByArcLength(self):
+        layout = lightPlacement.curve([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0]], 5)
+        self.assertRowsAlmostEqual(layout.translates, [[0, 0, 0], [0.5, 0, 0], [1, 0, 0], [1, 0.5, 0], [1, 1, 0]])
+        self.assertRowsAlmostEqual(layout.rotates, [[0, 0, 0]] * 2 + [[0, 0, 90]] * 3)
+
+    def testEmpty(self):
+        for func in (lightPlacement.line, lightPlacement.grid, lightPlacement.sphere):
+            self.assertEqual(len(func([0.0, 0.0, 0.0], [1.0, 1.0, 1.0], 0)), 0)
+
+
+class LayoutPureTest(LayoutTest):
+    useNumpy = False
+
+
+class StickTest(numpyPaths.NumpyCase):
+    modules = [lightPlacement]
+
+    def testStick(self):
+        identity = lightPlacement.translateMatrix(0.0, 0.0, 0.0)
+        layout = lightPlacement.stick([identity])
+        self.assertRowsAlmostEqual(layout.translates, [[0, 0, -0.5]])
+        self.assertRowsAlmostEqual(layout.rotates, [[0, 0, 0]])
+
+        #Object at (1, 2, 3) turned 90 degrees around Y and scaled by 2, the offset scales, the light does not
+        matrix = []
+        for row in _rotationRows([0.0, 90.0, 0.0]):
+            matrix.extend([2.0 * v for v in row] + [0.0])
+        matrix.extend([1.0, 2.0, 3.0, 1.0])
+        layout = lightPlacement.stick([identity, matrix], lightPlacement.translateMatrix(0.0, 1.0, 0.0))
+        self.assertRowsAlmostEqual(layout.translates, [[0, 1, -0.5], [0, 4, 3]])
+        self.assertRowsAlmostEqual(layout.rotates, [[0, 0, 0], [0, 90, 0]])
+
+
+class StickPureTest(StickTest):
+    useNumpy = False
+
+
+class AimTest(numpyPaths.NumpyCase):
+    modules = [lightPlacement]
+
+    def testAimAt(self):
+        rotates = lightPlacement.aimAt([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]],
+                                       [0.0, 0.0, -5.0])
+        self.assertRowsAlmostEqual(rotates, [[0, 0, 0]] * 3)
+        self.assertRowsAlmostEqual(lightPlacement.aimAt([[0.0, 0.0, 0.0]], [5.0, 0.0, 0.0]), [[0, -90, 0]])
+
+    def testAimAtEveryLight(self):
+        translates = [[1.0, 0.0, 0.0], [-2.0, 3.0, 1.0], [0.5, -1.0, 4.0]]
+        target = [0.0, 5.0, 0.0]
+        for translate, rotate in zip(translates, lightPlacement.aimAt(translates, target)):
+            self.assertRowsAlmostEqual([_facing(rotate)], [_unit([t - p for p, t in zip(translate, target)])])
+
+    def testAimAtUnderParent(self):
+        #Parent turned 90 degrees around Y, scaled by 2 and moved to (0, 0, 10)
+        parentRows = _rotationRows([0.0, 90.0, 0.0])
+        parentMatrix = []
+        for row in parentRows:
+            parentMatrix.extend([2.0 * v for v in row] + [0.0])
+        parentMatrix.extend([0.0, 0.0, 10.0, 1.0])
+        translates = [[0.0, 0.0, 0.0], [1.0, 2.0, 0.0]]
+        target = [3.0, 1.0, -4.0]
+        rotates = lightPlacement.aimAt(translates, target, parentMatrix)
+        for translate, rotate in zip(translates, rotates):
+            world = [sum(2.0 * translate[k] * parentRows[k][j] for k in range(3)) + parentMatrix[12 + j]
+                     for j in range(3)]
+            self.assertRowsAlmostEqual([_facing(rotate, parentRows)], [_unit([t - w for w, t in zip(world, target)])])
+
+
+class AimPureTest(AimTest):
+    useNumpy = False
@@ -0,0 +1,91 @@
+from maya import cmds
+
+import lightModel
+import lightNodes
+import lightQuery
+import numpyPaths
+from lightSchema import schema
+
+
+class ParseTest(numpyPaths.NumpyCase):
+    modules = [lightQuery]
+
+    def testComparison(self):
+        self.assertEqual(lightQuery.parse('intensity > 50'), ('cmp', 'intensity', '>', 50.0))
+        self.assertEqual(lightQuery.parse('intensity=-1.5e2'), ('cmp', 'intensity', '==', -150.0))
+        self.assertEqual(lightQuery.parse('type == spot*'), ('cmp', 'type', '==', 'spot*'))
+        self.assertEqual(lightQuery.parse('name != "*_rim light*"'), ('cmp', 'name', '!=', '*_rim light*'))
+        self.assertEqual(lightQuery.parse("rig == 'key 2'"), ('cmp', 'rig', '==', 'key 2'))
+        self.assertEqual(lightQuery.parse('emitDiffuse == TRUE'), ('cmp', 'emitDiffuse', '==', 1.0))
+
+    def testPrecedence(self):
+        a, b, c = ('cmp', 'a', '>', 1.0), ('cmp', 'b', '<', 2.0), ('cmp', 'c', '==', 3.0)
+        self.assertEqual(lightQuery.parse('a > 1 or b < 2 and not c == 3'), ('or', a, ('and', b, ('not', c))))
+        self.assertEqual(lightQuery.parse('(a > 1 or b < 2) and c == 3'), ('and', ('or', a, b), c))
+        self.assertEqual(lightQuery.parse('a > 1 AND b < 2 Or c == 3'), ('or', ('and', a, b), c))
+        self.assertEqual(lightQuery.parse('not not a > 1'), ('not', ('not', a)))
+
+    def testErrors(self):
+        for text in ['', '   ', 'intensity >', 'intensity 5', '(intensity > 1', 'intensity > 1)',
+                     'and == 1', 'intensity > 1 or', 'intensity > (', 'intensity ! 2']:
+            self.assertRaises(ValueError, lightQuery.parse, text)
+
+
+class ParsePureTest(ParseTest):
+    useNumpy = False
+
+
+class IndexTest(numpyPaths.NumpyCase):
+    modules = [lightQuery, lightModel]
+
+    def setUp(self):
+        super(IndexTest, self).setUp()
+        cmds.clear()
+        schema.invalidate()
+        self.models = {}
+        for rig, lightType, intensities in [('key_lgtRig', 'spotLight', [0.5, 1.0, 2.0]),
+                                            ('fill_lgtRig', 'pointLight', [2.0, 3.0])]:
+            name = rig.split('_')[0]
+            values = [{'intensity': x, 'color': [x / 4.0, 0.5, 1.0]} for x in intensities]
+            lights = lightNodes.createLights(lightType, len(values), name + '%d', values=values)
+            self.models[rig] = lightModel.RigModel.fromLights(name, rig, lights, lightType)
+        self.index = lightQuery.LightIndex([(rig, self.models[rig]) for rig in ['key_lgtRig', 'fill_lgtRig']])
+
+    def query(self, text):
+        return dict((rig, sorted(shapes)) for rig, shapes in self.index.query(text).items())
+
+    def testRanges(self):
+        self.assertEqual(self.query('intensity > 1'),
+                         {'key_lgtRig': ['key2Shape'], 'fill_lgtRig': ['fill0Shape', 'fill1Shape']})
+        self.assertEqual(self.query('intensity >= 1 and intensity < 3'),
+                         {'key_lgtRig': ['key1Shape', 'key2Shape'], 'fill_lgtRig': ['fill0Shape']})
+        self.assertEqual(self.query('intensity == 2'), {'key_lgtRig': ['key2Shape'], 'fill_lgtRig': ['fill0Shape']})
+        self.assertEqual(self.query('intensity != 2 and intensity <= 1'), {'key_lgtRig': ['key0Shape', 'key1Shape']})
+        self.assertEqual(self.query('intensity > 10'), {})
+
+    def testFields(self):
+        self.assertEqual(self.query('type == point*'), {'fill_lgtRig': ['fill0Shape', 'fill1Shape']})
+        self.assertEqual(self.query('rig == key and not name == key0*'), {'key_lgtRig': ['key1Shape', 'key2Shape']})
+        self.assertEqual(self.query('colorR < 0.3 or intensity == 3'),
+                         {'key_lgtRig': ['key0Shape', 'key1Shape'], 'fill_lgtRig': ['fill1Shape']})
+
+    def testAttributeOfOneType(self):
+        #Point lights have no coneAngle, they never match
+        self.assertEqual(set(self.query('coneAngle > 0')), set(['key_lgtRig']))
+        self.assertEqual(set(self.query('not coneAngle > 0')), set(['fill_lgtRig']))
+
+    def testEditsRefreshTheIndex(self):
+        self.query('intensity > 2.5')
+        self.models['key_lgtRig'].assign('intensity', 9.0, [0])
+        self.assertEqual(self.query('intensity > 2.5'),
+                         {'key_lgtRig': ['key0Shape'], 'fill_lgtRig': ['fill1Shape']})
+        self.index.removeRig('fill_lgtRig')
+        self.assertEqual(self.query('intensity > 2.5'), {'key_lgtRig': ['key0Shape']})
+
+    def testErrors(self):
+        for text in ['missing > 1', 'type < 2', 'intensity == abc']:
+            self.assertRaises(ValueError, self.index.query, text)
+
+
+class IndexPureTest(IndexTest):
+    useNumpy = False
@@ -0,0 +1,61 @@
+from maya import cmds
+
+import lightCore
+import lightRegistry
+
+import unittest
+
+
+def _registry(name, rigs=()):
+    #Registry node as a referenced or imported file brings it
+    node = cmds.createNode('network', n=name)
+    cmds.addAttr(node, ln='rigs', at='message', multi=True)
+    for rig in rigs:
+        cmds.connectAttr('%s.message' % rig, '%s.rigs' % node, nextAvailable=True)
+    return node
+
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.clear()
+
+    def testRigsOfEveryRegistry(self):
+        lightCore.createRig('local', 'pointLight', 2)
+        referenced = cmds.group(empty=True, n='ns:shot_lgtRig')
+        imported = cmds.group(empty=True, n='other_lgtRig')
+        _registry('ns:lightRigRegistry', [referenced])
+        _registry('lightRigRegistry1', [imported])
+        self.assertEqual(sorted(lightRegistry.rigs()), ['local_lgtRig', 'ns:shot_lgtRig', 'other_lgtRig'])
+        self.assertEqual(lightRegistry.registry(), 'lightRigRegistry')
+
+        lightRegistry.unregister(imported)
+        self.assertNotIn(imported, lightRegistry.rigs())
+
+    def testImportedRegistryIsUsed(self):
+        node = _registry('lightRigRegistry1')
+        rig, _ = lightCore.createRig('local', 'pointLight', 2)
+        self.assertEqual(lightRegistry.registry(), node)
+        self.assertEqual(lightRegistry.rigs(), [rig])
+        self.assertFalse(cmds.objExists('lightRigRegistry'))
+
+    def testMigration(self):
+        legacy = cmds.group(empty=True, n='old_lgtRig')
+        namespaced = cmds.group(empty=True, n='ns:older_lgtRig')
+        cmds.group(empty=True, n='old_lgtRigs')
+        self.assertEqual(sorted(lightRegistry.rigs()), [namespaced, legacy])
+        self.assertEqual(lightRegistry.rigName(legacy), 'old')
+        self.assertTrue(lightRegistry.isRig(namespaced))
+
+        #Once the scene has its registry, later rigs are not scanned for
+        cmds.group(empty=True, n='late_lgtRig')
+        self.assertEqual(sorted(lightRegistry.rigs()), [namespaced, legacy])
+
+    def testMigrationNextToAReferencedRegistry(self):
+        referenced = cmds.group(empty=True, n='ns:shot_lgtRig')
+        lightRegistry.register(referenced)
+        cmds.rename(lightRegistry.registry(), 'ns:lightRigRegistry')
+        legacy = cmds.group(empty=True, n='old_lgtRig')
+        self.assertEqual(sorted(lightRegistry.rigs()), ['ns:shot_lgtRig', legacy])
+        #The referenced rig stays in its own registry only
+        self.assertEqual(cmds.listConnections('lightRigRegistry.rigs', s=True, d=False), [legacy])
@@ -0,0 +1,89 @@
+from maya import cmds
+
+import json
+import os
+import shutil
+import tempfile
+
+import lightCore
+import lightRigIO
+from lightSchema import schema
+
+import unittest
+
+
+class RigIOTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.clear()
+        schema.invalidate()
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.rig, self.info = lightCore.createRig('shot', 'spotLight', 3, 'Distance')
+        self.shapes = self.info.keys()
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def testRoundTrip(self):
+        lightCore.setAttr(self.rig, 'intensity', 3.0)
+        cmds.setAttr('%s.coneAngle' % self.shapes[1], 60.0)
+        cmds.addAttr(self.shapes[2], ln='flicker', at='double')
+        cmds.setAttr('%s.flicker' % self.shapes[2], 0.5)
+        lightCore.setAim('shot', self.info, True, [0.0, 5.0, 0.0], 'bake')
+        translates = [cmds.getAttr('%s.translate' % x) for x in self.info.values()]
+        rotates = [cmds.getAttr('%s.rotate' % x) for x in self.info.values()]
+
+        for fileName in ('shot.rig', 'shot.rig.gz'):
+            path = self.path(fileName)
+            self.assertEqual(lightRigIO.exportRig(self.rig, path, lightRigIO.EXPORT_ATTRS + ['flicker']), 3)
+            header, lights = lightRigIO.readRig(path)
+            self.assertEqual((header['name'], header['lightType'], header['count']), ('shot', 'spotLight', 3))
+            self.assertEqual(header['userAttrs'], {'flicker': 'double'})
+            self.assertEqual(header['aim']['mode'], 'bake')
+            self.assertEqual([x['flicker'] for x in lights], [None, None, 0.5])
+
+            rig = lightRigIO.importRig(path, 'copy')
+            shapes = lightCore.rigInfo(rig).keys()
+            transforms = lightCore.rigInfo(rig).values()
+            self.assertEqual([cmds.objectType(x) for x in shapes], ['spotLight'] * 3)
+            self.assertEqual([cmds.getAttr('%s.translate' % x) for x in transforms], translates)
+            self.assertEqual([cmds.getAttr('%s.rotate' % x) for x in transforms], rotates)
+            self.assertEqual([cmds.getAttr('%s.intensity' % x) for x in shapes], [3.0] * 3)
+            self.assertEqual(cmds.getAttr('%s.coneAngle' % shapes[1]), 60.0)
+            self.assertEqual([cmds.objExists('%s.flicker' % x) for x in shapes], [False, False, True])
+            self.assertEqual(cmds.getAttr('%s.flicker' % shapes[2]), 0.5)
+            self.assertEqual(lightCore.aimMode('copy'), 'bake')
+            #The name is in use now
+            self.assertIsNone(lightRigIO.importRig(path, 'copy'))
+            lightCore.deleteRig(rig)
+
+    def testHeaderValidation(self):
+        path = self.path('shot.rig')
+        lightRigIO.exportRig(self.rig, path)
+        with open(path) as f:
+            header, rows = json.loads(f.readline()), f.read()
+        bad = [('format', 'other'), ('version', lightRigIO.VERSION + 1), ('name', 'x";system("touch /tmp/pwn");//'),
+               ('name', 'my rig'), ('columns', ['translate']), ('columns', header['columns'] + ['a b']),
+               ('lightType', 'sphere'), ('userAttrs', {'flicker': 'double'}), ('matrix', [1, 0, 0])]
+        before = sorted(cmds.ls(type='spotLight'))
+        for key, value in bad:
+            changed = self.path('changed.rig')
+            with open(changed, 'w') as f:
+                f.write(json.dumps(dict(header, **{key: value})) + '\n' + rows)
+            self.assertRaises(ValueError, lightRigIO.importRig, changed, 'copy')
+        self.assertRaises(ValueError, lightRigIO.importRig, path, 'my copy')
+        self.assertEqual(sorted(cmds.ls(type='spotLight')), before)
+        self.assertFalse(cmds.objExists('copy_lgtRig'))
+
+    def testUnknownLightTypeInARow(self):
+        path = self.path('shot.rig')
+        lightRigIO.exportRig(self.rig, path)
+        with open(path) as f:
+            lines = f.readlines()
+        lines[2] = lines[2].replace('"spotLight"', '"sphere"')
+        with open(path, 'w') as f:
+            f.writelines(lines)
+        header, lights = lightRigIO.readRig(path)
+        self.assertEqual(next(lights)['type'], 'spotLight')
+        self.assertRaises(ValueError, next, lights)
@@ -0,0 +1,38 @@
+from maya import cmds
+
+import lightCore
+from lightSchema import schema
+
+import unittest
+
+
+class SchemaTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.clear()
+        schema.invalidate()
+        self.rig, self.info = lightCore.createRig('r', 'spotLight', 3, 'Distance')
+        self.shapes = self.info.keys()
+
+    def testTypeAttributesAreCached(self):
+        info = schema.info('spotLight', 'coneAngle', self.shapes[0])
+        self.assertTrue(info.exists)
+        self.assertIs(schema.info('spotLight', 'coneAngle', self.shapes[2]), info)
+        self.assertEqual(schema.nodesWith('spotLight', 'coneAngle', self.shapes), self.shapes)
+        self.assertFalse(schema.exists('spotLight', 'nothing', self.shapes[0]))
+
+    def testAttributesAddedByHandAreCheckedPerNode(self):
+        #On the first and last light only, the first light of the type does not decide for the others
+        cmds.addAttr([self.shapes[0], self.shapes[2]], ln='flicker', at='double')
+        self.assertEqual(schema.nodesWith('spotLight', 'flicker', self.shapes), [self.shapes[0], self.shapes[2]])
+        self.assertFalse(schema.exists('spotLight', 'flicker', self.shapes[1]))
+        self.assertFalse(schema.info('spotLight', 'flicker', self.shapes[1]).exists)
+        self.assertEqual(schema.info('spotLight', 'flicker', self.shapes[2]).type, 'double')
+
+        lightCore.setAttr(self.rig, 'flicker', 2.0)
+        self.assertEqual([cmds.getAttr('%s.flicker' % x) for x in (self.shapes[0], self.shapes[2])], [2.0, 2.0])
+
+    def testAttributeAddedLater(self):
+        self.assertEqual(schema.nodesWith('spotLight', 'flicker', self.shapes), [])
+        cmds.addAttr(self.shapes[1], ln='flicker', at='double')
+        self.assertEqual(lightCore.lightsWithAttr(lightCore.lightsByType(self.info), 'flicker'), [self.shapes[1]])
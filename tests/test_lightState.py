@@ -0,0 +1,67 @@
+from maya import cmds
+
+import lightCore
+import lightState
+import lightTransaction
+from lightSchema import schema
+
+import unittest
+
+
+class RigStateTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.clear()
+        schema.invalidate()
+        self.rig, self.info = lightCore.createRig('mirrored', 'pointLight', 3)
+        self.state = lightState.RigState('mirrored', self.info)
+        self.shapes = self.info.keys()
+        cmds.stats.reset()
+
+    def intensities(self):
+        return [cmds.getAttr('%s.intensity' % x) for x in self.shapes]
+
+    def testReadsComeFromTheMirror(self):
+        scene = self.intensities()
+        self.assertEqual(self.state.get('intensity', self.shapes), scene)
+        calls = cmds.stats.calls['getAttr']
+        self.assertEqual(self.state.get('intensity', self.shapes), scene)
+        self.assertEqual(self.state.value('intensity', self.shapes[1:]), scene[1])
+        self.assertEqual(cmds.stats.calls['getAttr'], calls)
+
+    def testUnchangedWritesAreSkipped(self):
+        self.state.write('intensity', 2.0, self.shapes[:2])
+        self.assertEqual(self.intensities()[:2], [2.0, 2.0])
+        self.state.write('intensity', 2.0, self.shapes)
+        self.assertEqual(self.intensities(), [2.0, 2.0, 2.0])
+        self.assertEqual((self.state.written, self.state.skipped), (3, 2))
+        self.state.writeEach('intensity', [2.0, 5.0, 2.0], self.shapes)
+        self.assertEqual(self.intensities(), [2.0, 5.0, 2.0])
+        self.assertEqual((self.state.written, self.state.skipped), (4, 4))
+
+    def testRevalidate(self):
+        self.state.get('intensity', self.shapes)
+        cmds.setAttr('%s.intensity' % self.shapes[0], 7.0)
+        self.assertNotEqual(self.state.value('intensity', self.shapes), 7.0)
+        self.state.revalidate(['intensity'])
+        self.assertEqual(self.state.value('intensity', self.shapes), 7.0)
+
+        #Pending writes survive a revalidate
+        self.state.set('intensity', 3.0, self.shapes)
+        self.state.revalidate()
+        self.assertEqual(self.state.get('intensity', self.shapes), [3.0] * 3)
+        self.state.flush()
+        self.assertEqual(self.intensities(), [3.0] * 3)
+
+    def testRollbackDropsTheMirror(self):
+        before = self.intensities()
+        with self.assertRaises(RuntimeError):
+            with lightTransaction.transaction('lightRigger intensity'):
+                self.state.write('intensity', 4.0, self.shapes)
+                raise RuntimeError('failed')
+        self.assertEqual(self.intensities(), before)
+        self.assertEqual(self.state.get('intensity', self.shapes), before)
+        self.assertEqual(self.state.written, 0)
+        #Written again since the mirror no longer holds the value
+        self.state.write('intensity', 4.0, self.shapes)
+        self.assertEqual(self.intensities(), [4.0] * 3)
@@ -0,0 +1,88 @@
+from maya import cmds
+
+import lightTransaction
+
+import unittest
+
+
+class TransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        cmds.clear()
+        cmds.stats.reset()
+        self.light = cmds.createNode('pointLight', n='keyShape')
+
+    def intensity(self):
+        return cmds.getAttr('keyShape.intensity')
+
+    def testWritesAreQueuedAndMerged(self):
+        with lightTransaction.transaction('lightRigger intensity') as transaction:
+            for value in (2.0, 3.0, 4.0):
+                transaction.setAttr('keyShape.intensity', value)
+            transaction.setAttr('keyShape.color', 0.0, 0.5, 1.0)
+            self.assertNotEqual(self.intensity(), 4.0)
+        self.assertEqual(self.intensity(), 4.0)
+        self.assertEqual(cmds.getAttr('keyShape.color'), [(0.0, 0.5, 1.0)])
+        self.assertEqual(cmds.stats.calls['mel.eval'], 1)
+        self.assertEqual((transaction.written, transaction.merged), (2, 2))
+        self.assertIsNone(lightTransaction.current())
+
+    def testJoining(self):
+        with lightTransaction.transaction('outer') as outer:
+            with lightTransaction.transaction('inner') as inner:
+                self.assertIs(inner, outer)
+                inner.setAttr('keyShape.intensity', 2.0)
+            #Applied with the transaction it joined
+            self.assertNotEqual(self.intensity(), 2.0)
+        self.assertEqual(self.intensity(), 2.0)
+
+    def testRollbackWithoutUndo(self):
+        before = self.intensity()
+        dropped = []
+        with self.assertRaises(RuntimeError):
+            with lightTransaction.transaction('outer') as transaction:
+                transaction.onRollback(lambda: dropped.append(True))
+                transaction.setAttr('keyShape.intensity', 2.0)
+                transaction.flush()
+                self.assertEqual(self.intensity(), 2.0)
+                #A failure in a joined transaction rolls the whole one back
+                with lightTransaction.transaction('inner') as inner:
+                    inner.setAttr('keyShape.intensity', 3.0)
+                    raise RuntimeError('failed')
+        self.assertEqual(self.intensity(), before)
+        self.assertEqual(dropped, [True])
+        self.assertIsNone(lightTransaction.current())
+
+    def testCallbacksDroppedOnCommit(self):
+        dropped = []
+        with lightTransaction.transaction() as transaction:
+            transaction.onRollback(lambda: dropped.append(True))
+        with self.assertRaises(RuntimeError):
+            with lightTransaction.transaction():
+                raise RuntimeError('failed')
+        self.assertEqual(dropped, [])
+
+    def testUndoChunks(self):
+        cmds.undoEnabled = True
+        self.addCleanup(setattr, cmds, 'undoEnabled', False)
+        with lightTransaction.transaction('lightRigger intensity') as transaction:
+            transaction.setAttr('keyShape.intensity', 2.0)
+        with lightTransaction.transaction('lightRigger intensity') as transaction:
+            transaction.setAttr('keyShape.intensity', 3.0)
+        self.assertEqual(cmds.undoQueue[-2:], ['lightRigger intensity', 'lightRigger intensity (again)'])
+
+        #The failed chunk is undone, the previous entry is left alone
+        with self.assertRaises(RuntimeError):
+            with lightTransaction.transaction('lightRigger intensity') as transaction:
+                transaction.setAttr('keyShape.intensity', 4.0)
+                transaction.flush()
+                raise RuntimeError('failed')
+        self.assertEqual(cmds.undone, ['lightRigger intensity'])
+        self.assertEqual(cmds.undoQueue[-1], 'lightRigger intensity (again)')
+
+        #Nothing done, nothing queued, nothing undone
+        with self.assertRaises(RuntimeError):
+            with lightTransaction.transaction('lightRigger intensity'):
+                raise RuntimeError('failed')
+        self.assertEqual(len(cmds.undone), 1)
+        self.assertEqual(cmds.undoChunks, [])